@@ -4,28 +4,91 @@ app.py
 Módulo de interface web para o Chatbot Documental Inteligente, incluindo:
 - Configuração e inicialização do Streamlit (título, ícone e layout)
 - Carregamento dos módulos internos (LLM e contexto) com tratamento de erro
+- Recursos (clientes, modelo, coleção) em 'st.cache_resource' e assets estáticos em 'st.cache_data'
 - Injeção de CSS customizado para estilização de mensagens e cabeçalho
 - Renderização do cabeçalho centralizado (logo, título e subtítulo) em HTML puro
 - Gestão de histórico de conversas via 'st.session_state'
+- Memória da conversa (interações recentes + resumo, com orçamento de tokens) compartilhada
+  no processo via 'st.cache_resource' e identificada por sessão
+- Tenant (departamento) da sessão escolhido na barra lateral, quando há mais de um configurado
+- Filtros por faceta na barra lateral (documentos, tipos, páginas e período de ingestão),
+  aplicados como pré-filtros da busca
 - Campo de entrada de perguntas ('st.chat_input') e botão para limpar histórico
-- Processamento das perguntas: busca de contexto, chamada ao LLM e medição de tempo
-- Exibição das interações com estilos distintos (usuário, bot, erro) e detalhes em expander
+- Processamento das perguntas: resposta pré-computada (perguntas frequentes) ou busca de
+  contexto e chamada ao LLM, com medição de tempo
+- Exibição das interações com estilos distintos (usuário, bot, erro) e detalhes em expander,
+  incluindo o tempo gasto em cada etapa (embedding, busca, agrupamento, prompt e LLM)
+- Histórico em janela: apenas as últimas interações são renderizadas por completo,
+  as anteriores ficam recolhidas e paginadas, renderizadas somente sob demanda
 """
 
 # ——————————————————————————————
 # Biliotecas
+import os
 import time
+import uuid
 import base64
+from datetime import date
 import streamlit as st
+from dotenv import load_dotenv
 
-# Importação de módulos internos
-try:
-    from llm.llm import obter_resposta_llama
-    from app_config.app_context import get_context
+from metrics.instrumentation import coletar_tempos, span
+from metrics.profiling import perfilar
+from app_config.prompt_builder import MENSAGEM_SEM_CONTEXTO
+from store.tenants import TENANTS, TENANT_DEFAULT
+
+# ——————————————————————————————
+# Carrega variáveis de ambiente
+load_dotenv()
+
+# Quantidade de interações renderizadas por completo (e tamanho da página do histórico anterior)
+HISTORY_WINDOW = int(os.getenv("HISTORY_WINDOW", 5))
+
+
+# ——————————————————————————————
+@st.cache_resource(show_spinner=False)
+def carregar_recursos():
+    """
+    Carrega uma única vez por processo os módulos internos e os recursos pesados
+    que eles mantêm (coleção do Chroma, função de embedding e cliente do LLM).
+    """
+    # Cliente do serviço de inferência (HTTP se SERVICE_URL definido, senão no próprio processo)
+    from service.client import get_context, obter_resposta_llama, obter_resposta_precomputada
     from app_config.prompt_builder import build_prompt
-except ImportError as e:
-    st.error(f"Erro crítico: módulos não encontrados – {e}")
-    st.stop()
+    return get_context, obter_resposta_llama, obter_resposta_precomputada, build_prompt
+
+
+@st.cache_resource(show_spinner=False)
+def carregar_conversas():
+    """
+    Memória das conversas de todas as sessões do processo (limitada por LRU e ociosidade),
+    com resumo das interações antigas gerado pelo LLM.
+    """
+    from service.client import gerar_texto
+    from app_config.conversation import ConversationStore
+    return ConversationStore(resumir=gerar_texto)
+
+
+@st.cache_data(show_spinner=False, ttl=60)
+def carregar_facetas(tenant: str) -> dict:
+    """Valores das facetas do tenant para os filtros (atualizados a cada minuto, após novas ingestões)."""
+    from service.client import obter_facetas
+    return obter_facetas(tenant)
+
+
+@st.cache_data(show_spinner=False)
+def carregar_texto(caminho: str) -> str:
+    """Lê um asset de texto (ex.: CSS) uma única vez."""
+    with open(caminho, encoding="utf-8") as f:
+        return f.read()
+
+
+@st.cache_data(show_spinner=False)
+def carregar_imagem_b64(caminho: str) -> str:
+    """Lê uma imagem e a codifica em base64 uma única vez."""
+    with open(caminho, "rb") as f:
+        return base64.b64encode(f.read()).decode()
+
 
 # ——————————————————————————————
 # Configura as propriedades gerais da página no Streamlit
@@ -35,122 +98,21 @@ st.set_page_config(
     layout="wide"
 )
 
+# Importação de módulos internos
+try:
+    get_context, obter_resposta_llama, obter_resposta_precomputada, build_prompt = carregar_recursos()
+    conversas = carregar_conversas()
+except ImportError as e:
+    st.error(f"Erro crítico: módulos não encontrados – {e}")
+    st.stop()
+
 # ——————————————————————————————
-# CSS personalizado para estilizar a interface
-st.markdown("""
-<style>
-    /* Estilo para mensagens do usuário */
-    .user-message {
-        padding: 1rem;
-        border-radius: 15px;
-        background: #3C3D37;
-        margin: 1rem 0;
-        max-width: 80%;
-        float: right;
-        color: #FFFFFF;
-        border: 1px solid #697565;
-        box-shadow: 0 2px 5px rgba(0, 0, 0, 0.1);
-        font-family: 'Roboto', sans-serif;
-        font-size: 16px;
-        animation: fadeIn 0.3s ease-in;
-    }
-    .user-message b { font-weight: bold; }
-
-    /* Estilo para mensagens do bot */
-    .bot-message {
-        padding: 1rem;
-        border-radius: 15px;
-        background: #3A6073;
-        margin: 1rem 0;
-        max-width: 80%;
-        float: left;
-        color: #FFFFFF;
-        border: 1px solid #A3BFFA;
-        box-shadow: 0 2px 5px rgba(0, 0, 0, 0.1);
-        font-family: 'Roboto', sans-serif;
-        font-size: 16px;
-        line-height: 1.6;
-        animation: fadeIn 0.3s ease-in;
-    }
-    .bot-message b { font-weight: bold; }
-
-    /* Estilo para mensagens de erro */
-    .error-message {
-        padding: 1rem;
-        border-radius: 15px;
-        background: #5C2D2D;
-        margin: 1rem 0;
-        max-width: 80%;
-        float: left;
-        color: #FFFFFF;
-        border: 1px solid #EF5350;
-        box-shadow: 0 2px 5px rgba(0, 0, 0, 0.1);
-        font-family: 'Roboto', sans-serif;
-        font-size: 16px;
-        animation: fadeIn 0.3s ease-in;
-    }
-
-    /* Animação de entrada para mensagens */
-    @keyframes fadeIn {
-        from { 
-               opacity: 0; transform: translateY(10px); 
-        }       
-        to { 
-             opacity: 1; transform: translateY(0); 
-        }
-    }
-
-    /* Estilo para divisores */
-    .stDivider { 
-                 background-color: #0088CC;
-                 height: 1px; 
-                 opacity: 0.3;
-    }
-    
-    /* Estilo para legendas */
-    .stCaption { 
-                 color: #A3BFFA !important;
-    }
-
-    /* Estilo para o expander */
-    .stExpander {
-        background-color: #2A2C33;
-        border: 1px solid #697565;
-        border-radius: 10px;
-        padding: 0.5rem;
-    }
-    .stExpander div { color: #FFFFFF; font-family: 'Roboto', sans-serif; font-size: 14px; }
-    .stExpander p { color: #FFFFFF; }
-
-    /* Divisor dentro do expander */
-    .expander-divider { background-color: #A3BFFA; height: 1px; opacity: 0.3; margin: 0.5rem 0; }
-    .fontes-container { display: inline; color: #A3BFFA; font-size: 14px; }
-    .stExpander > div > div > div > div > p {
-        font-size: 18px !important;
-        font-weight: bold !important;
-        color: #A9A9A9 !important;
-    }
-
-    /* Cabeçalho centralizado: logo, título e subtítulo */
-    .header-container {
-        display: flex;
-        flex-direction: column;
-        align-items: center;
-        margin-bottom: 1rem;
-    }
-    .header-container img {
-        width: 200px;
-        height: auto;
-        margin-bottom: 0.5rem;
-        display: block;
-    }
-</style>
-""", unsafe_allow_html=True)
+# CSS personalizado para estilizar a interface (lido de static/style.css)
+st.markdown(f"<style>{carregar_texto('static/style.css')}</style>", unsafe_allow_html=True)
 
 # ——————————————————————————————
-# carregue o logo e transforme em base64
-with open("logo.png", "rb") as f:
-    logo_b64 = base64.b64encode(f.read()).decode()
+# logo em base64 (em cache entre reruns)
+logo_b64 = carregar_imagem_b64("logo.png")
 
 # ——————————————————————————————
 # Rodapé com seu nome
@@ -187,6 +149,58 @@ st.markdown(f"""
 # Estado de sessão para armazenar o histórico de conversas
 if "history" not in st.session_state:
     st.session_state.history = []
+# Identificador da sessão na memória de conversas
+if "conversa_id" not in st.session_state:
+    st.session_state.conversa_id = uuid.uuid4().hex
+
+
+def reiniciar_conversa() -> None:
+    """Limpa o histórico exibido e a memória da conversa usada nos prompts."""
+    st.session_state.history = []
+    conversas.esquecer(st.session_state.conversa_id)
+
+
+# ——————————————————————————————
+# Tenant da sessão: cada sessão consulta a coleção de um único departamento.
+# Trocar de tenant inicia uma nova conversa
+if "tenant" not in st.session_state:
+    st.session_state.tenant = TENANT_DEFAULT
+if len(TENANTS) > 1:
+    st.sidebar.selectbox(
+        "🏢 Departamento", sorted(TENANTS), key="tenant",
+        on_change=reiniciar_conversa
+    )
+
+# ——————————————————————————————
+# Filtros por faceta: restringem a busca aos trechos escolhidos antes do top-k
+filtros = {}
+try:
+    facetas = carregar_facetas(st.session_state.tenant)
+except Exception as e:
+    st.sidebar.warning(f"Filtros indisponíveis: {e}")
+    facetas = None
+if facetas and facetas["source"]:
+    with st.sidebar.expander("🔎 Filtros da busca"):
+        documentos = st.multiselect("Documentos", facetas["source"])
+        tipos = st.multiselect("Tipos de arquivo", facetas["tipo"])
+        if documentos:
+            filtros["source"] = documentos
+        if tipos:
+            filtros["tipo"] = tipos
+
+        if facetas["pagina"] and facetas["pagina"][1] > facetas["pagina"][0]:
+            # Exibidas a partir de 1; o metadado 'page' dos PDFs começa em 0
+            primeira, ultima = (pagina + 1 for pagina in facetas["pagina"])
+            paginas = st.slider("Páginas", primeira, ultima, (primeira, ultima))
+            if paginas != (primeira, ultima):
+                filtros["pagina_min"], filtros["pagina_max"] = (pagina - 1 for pagina in paginas)
+
+        if facetas["dia"]:
+            inicio, fim = (date.fromisoformat(dia) for dia in facetas["dia"])
+            periodo = st.date_input("Ingestão entre", (inicio, fim), min_value=inicio, max_value=fim)
+            # Durante a escolha do intervalo, o widget retorna apenas a data inicial
+            if len(periodo) == 2 and tuple(periodo) != (inicio, fim):
+                filtros["desde"], filtros["ate"] = (dia.isoformat() for dia in periodo)
 
 # ——————————————————————————————
 # Área de entrada de perguntas com botão de limpar
@@ -200,7 +214,7 @@ with st.container():
 
     # Embaixo, fora do col_c, podemos manter o botão de limpar (ou mover para col_r, se quiser)
     if st.button("🗑️ Limpar Histórico"):
-        st.session_state.history = []
+        reiniciar_conversa()
         st.experimental_rerun()
 
 # ——————————————————————————————
@@ -209,22 +223,52 @@ if user_question:
     with st.spinner("Buscando resposta nos documentos..."):
         start_time = time.time()
         try:
+            # Profiling opcional por pergunta (variável PROFILE); no-op quando desativado
+            with perfilar("app_pergunta"), coletar_tempos() as etapas:
+                conversa_id = st.session_state.conversa_id
 
-            # 1) Recupera contexto, lista de fontes e distância média
-            contexto, fontes, distancia_media = get_context(user_question)
+                # Continuações ("e isso?") são combinadas com a pergunta anterior para a busca
+                consulta = conversas.consulta(conversa_id, user_question)
 
-            # 2) Monta prompt único reutilizável
-            prompt = build_prompt(user_question, contexto)
+                # 0) Pergunta frequente com resposta pré-computada ainda válida: sem busca nem geração
+                #    (apenas perguntas autônomas e sem filtros, cujo sentido não depende da conversa)
+                precomputada = None
+                if consulta == user_question and not filtros:
+                    precomputada = obter_resposta_precomputada(user_question, tenant=st.session_state.tenant)
+                if precomputada is not None:
+                    resposta = precomputada["resposta"]
+                    contexto = precomputada["contexto"]
+                    fontes = precomputada["fontes"]
+                    distancia_media = precomputada["distancia_media"]
+                else:
+                    # 1) Recupera contexto, lista de fontes e distância média
+                    contexto, fontes, distancia_media = get_context(
+                        consulta, tenant=st.session_state.tenant, filtros=filtros or None
+                    )
+
+                    # Nenhum trecho relevante: responde direto, sem acionar o LLM
+                    # (e sem registrar na memória, como no bot do Telegram)
+                    if not contexto.strip():
+                        resposta = MENSAGEM_SEM_CONTEXTO
+                    else:
+                        # 2) Monta prompt único reutilizável, com o histórico limitado da conversa
+                        with span("prompt.build"):
+                            prompt = build_prompt(user_question, contexto, conversas.historico(conversa_id))
 
-            # 4) Gera a resposta via Gemma 3
-            resposta = obter_resposta_llama(pergunta=prompt, contexto="")
+                        # 4) Gera a resposta via Gemma 3
+                        resposta = obter_resposta_llama(pergunta=prompt, contexto="")
 
-            # 5) Formata a mensagem de retorno incluindo fontes e distância média
+            # Memória da conversa: o resumo das interações antigas é atualizado em segundo plano
+            if resposta != MENSAGEM_SEM_CONTEXTO and not resposta.startswith("Erro"):
+                conversas.registrar(conversa_id, user_question, resposta, consulta)
+
+            # 5) Formata a mensagem de retorno incluindo fontes, distância média e tempos por etapa
             processing_time = time.time() - start_time
             st.session_state.history.append({
                 "pergunta": user_question,
                 "resposta": resposta,
                 "tempo": f"{processing_time:.2f}s",
+                "etapas": etapas,
                 "fontes": fontes,
                 "contexto": contexto,
                 "distancia_media": distancia_media
@@ -238,25 +282,39 @@ if user_question:
             })
 
 # ——————————————————————————————
-# Renderiza o histórico de conversas
-with st.container():
-    for entry in st.session_state.history:
+def renderizar_interacao(entry: dict, detalhes: bool = True) -> None:
+    """
+    Renderiza uma interação (pergunta e resposta) do histórico.
+
+    Args:
+        entry (dict): Item de 'st.session_state.history'.
+        detalhes (bool): Se True, inclui o expander com tempo, fontes e contexto.
+    """
+    st.markdown(
+        f"<div class='user-message'>🙃 <b>VOCÊ:</b> {entry['pergunta']}</div>",
+        unsafe_allow_html=True
+    )
+    if entry.get("erro"):
         st.markdown(
-            f"<div class='user-message'>🙃 <b>VOCÊ:</b> {entry['pergunta']}</div>",
+            f"<div class='error-message'>❌ <b>ERRO:</b> {entry['resposta']}</div>",
             unsafe_allow_html=True
         )
-        if entry.get("erro"):
-            st.markdown(
-                f"<div class='error-message'>❌ <b>ERRO:</b> {entry['resposta']}</div>",
-                unsafe_allow_html=True
-            )
-        else:
-            st.markdown(
-                f"<div class='bot-message'>🤖 <b>ASSISTENTE:</b> {entry['resposta']}</div>",
-                unsafe_allow_html=True
-            )
+    else:
+        st.markdown(
+            f"<div class='bot-message'>🤖 <b>ASSISTENTE:</b> {entry['resposta']}</div>",
+            unsafe_allow_html=True
+        )
+        if detalhes:
             with st.expander("📋 **Detalhes da Resposta:**"):
                 st.markdown(f"**⏱️ Tempo de processamento:** {entry['tempo']}")
+                if entry.get('etapas'):
+                    etapas_str = " · ".join(
+                        f"{etapa}: {segundos * 1000:.0f} ms" for etapa, segundos in entry['etapas'].items()
+                    )
+                    st.markdown(
+                        f"**🧭 Tempo por etapa:** <span class='fontes-container'>{etapas_str}</span>",
+                        unsafe_allow_html=True
+                    )
                 st.markdown("<div class='expander-divider'></div>", unsafe_allow_html=True)
                 if entry['fontes']:
                     fontes_str = ", ".join(entry['fontes'])
@@ -269,4 +327,26 @@ with st.container():
                 st.markdown("<div class='expander-divider'></div>", unsafe_allow_html=True)
                 st.markdown("**🔍 Contexto utilizado:**")
                 st.write(entry['contexto'])
-        st.divider()
+    st.divider()
+
+
+# ——————————————————————————————
+# Renderiza o histórico de conversas em janela: o custo do rerun independe do tamanho da conversa
+with st.container():
+    history = st.session_state.history
+    anteriores = history[:-HISTORY_WINDOW] if len(history) > HISTORY_WINDOW else []
+    recentes = history[len(anteriores):]
+
+    # Interações antigas: recolhidas e renderizadas só quando solicitadas, uma página por vez
+    if anteriores:
+        if st.toggle(f"🕘 Mostrar {len(anteriores)} interações anteriores", key="mostrar_anteriores"):
+            paginas = (len(anteriores) + HISTORY_WINDOW - 1) // HISTORY_WINDOW
+            pagina = st.number_input(
+                "Página (1 = mais recente)", min_value=1, max_value=paginas, value=1, key="pagina_historico"
+            )
+            fim = len(anteriores) - (pagina - 1) * HISTORY_WINDOW
+            for entry in anteriores[max(0, fim - HISTORY_WINDOW):fim]:
+                renderizar_interacao(entry, detalhes=False)
+
+    for entry in recentes:
+        renderizar_interacao(entry)
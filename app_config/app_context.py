@@ -3,11 +3,26 @@ app_context_filter.py
 
 Extensão do helper de contexto para o Chatbot Documental.
 Fornece uma função avançada de recuperação de contexto que:
-  1. Busca trechos mais relevantes no ChromaDB (documents, metadatas, distances)
+  1. Busca trechos mais relevantes no ChromaDB (ids, metadatas, distances)
   2. Agrupa por tema (campo 'title' nos metadados)
   3. Seleciona apenas o tema com menor distância média
   4. Dentro desse tema, escolhe o documento (fonte) mais relevante
-  5. Retorna o contexto (trechos do documento selecionado), a lista de fontes e a distância média
+  5. Retorna o contexto (trechos do documento selecionado, lidos sob demanda), a lista de fontes e a distância média
+
+A busca é adaptativa: começa com RETRIEVAL_K_MIN trechos e só amplia (até k) quando
+as distâncias estão "planas"; trechos além de DISTANCE_CUTOFF são descartados e os
+quase redundantes removidos por MMR (retriever/mmr.py). Se nenhum trecho passar do
+corte, o contexto volta vazio e os chamadores não acionam o LLM.
+
+Com RERANK_ENABLED=1, os RERANK_TOP_N candidatos são buscados de uma vez (sem a busca
+adaptativa, que pararia nos primeiros trechos), reordenados por um cross-encoder
+(retriever/reranker.py) e apenas os RERANK_TOP_K melhores seguem para a seleção.
+
+Cada busca é feita na coleção de um tenant (store/tenants.py); sem tenant, usa o padrão.
+
+Filtros opcionais por faceta (fonte, tipo de arquivo, intervalo de páginas e de datas de
+ingestão) são aplicados na própria busca, antes do top-k (store/facet_index.py): todo o
+orçamento de k fica com trechos que atendem aos filtros.
 """
 
 # ——————————————————————————————
@@ -27,12 +42,30 @@ load_dotenv()
 K_RESULTS = int(os.getenv("K_RESULTS"))
 
 # Limite de caracteres do contexto final a enviar ao LLM
-MAX_CONTEXT_LENGTH = 2000
+MAX_CONTEXT_LENGTH = int(os.getenv("MAX_CONTEXT_LENGTH", 2000))
+
+# Busca adaptativa: profundidade inicial e diferença mínima de distância entre o
+# primeiro e o último trecho para considerar a distribuição "não plana" (sem ampliar)
+RETRIEVAL_K_MIN = int(os.getenv("RETRIEVAL_K_MIN", 3))
+RETRIEVAL_FLAT_SPREAD = float(os.getenv("RETRIEVAL_FLAT_SPREAD", 0.05))
+
+# Distância cosseno máxima de um trecho para ser usado (1.0 desativa o corte)
+DISTANCE_CUTOFF = float(os.getenv("DISTANCE_CUTOFF", 0.7))
+
+# MMR: peso da relevância e similaridade a partir da qual trechos são redundantes
+MMR_ENABLED = os.getenv("MMR_ENABLED", "1") == "1"
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", 0.7))
+MMR_DUP_SIMILARITY = float(os.getenv("MMR_DUP_SIMILARITY", 0.95))
 
 # ——————————————————————————————
 # Importação de módulos internos do projeto
 try:
-    from store.chroma_store import collection
+    from store.chroma_store import buscar, query_batcher, embed_query_timeout, obter_textos, obter_embeddings
+    from store.tenants import validar_tenant
+    from store.facet_index import normalizar_filtros
+    from retriever.mmr import mmr
+    from metrics.instrumentation import registry, span
+    from retriever.reranker import reranker, RERANK_TOP_N, RERANK_TOP_K
     from llm.llm import obter_resposta_llama
 
 except ImportError as e:
@@ -41,86 +74,203 @@ except ImportError as e:
     st.stop()
 
 
+# ——————————————————————————————
+def selecionar_documento(
+    metadados: List[dict],
+    distances: List[float]
+) -> Tuple[str | None, List[int], float]:
+    """
+    Escolhe, entre os trechos recuperados, o documento mais relevante por tema e fonte.
+
+    Steps:
+      2. Agrupa trechos por tema (campo 'title' nos metadados).
+      3. Identifica o tema com menor distância média.
+      4. Filtra trechos apenas desse tema e agrupa por documento (fonte).
+      5. Seleciona o documento mais relevante (menor distância média).
+
+    Args:
+        metadados (List[dict]): Metadados dos trechos, na ordem retornada pela busca.
+        distances (List[float]): Distâncias dos trechos à pergunta, na mesma ordem.
+
+    Returns:
+        Tuple[str | None, List[int], float]:
+            - fonte (str | None): Documento escolhido (None se não houver trechos).
+            - indices (List[int]): Posições, na lista original, dos trechos desse documento.
+            - distancia_media (float): Distância média desses trechos.
+    """
+    if not metadados:
+        return None, [], 0.0
+
+    # 2) Extrai temas de cada trecho via campo 'title'
+    temas = [
+        meta.get("title", "Desconhecido")
+        for meta in metadados
+    ]
+
+    # 3) Agrupa distâncias por tema para calcular média
+    tema_distancia = {}
+    for tema, dist in zip(temas, distances):
+        tema_distancia.setdefault(tema, []).append(dist)
+
+    # 4) Seleciona o tema com menor distância média
+    tema_mais_relevante = min(
+        tema_distancia,
+        key=lambda t: sum(tema_distancia[t]) / len(tema_distancia[t])
+    )
+
+    # 5) Filtra trechos e distâncias pelo tema escolhido e agrupa por documento
+    doc_distancia = {}
+    doc_indices = {}
+    for i, (meta, tema, dist) in enumerate(zip(metadados, temas, distances)):
+        if tema == tema_mais_relevante:
+            source = meta.get("source", "Desconhecido")
+            doc_distancia.setdefault(source, []).append(dist)
+            doc_indices.setdefault(source, []).append(i)
+
+    if not doc_distancia:
+        return None, [], 0.0
+
+    # 6) Escolhe o documento (source) com menor distância média
+    doc_mais_relevante = min(
+        doc_distancia,
+        key=lambda d: sum(doc_distancia[d]) / len(doc_distancia[d])
+    )
+    distancia_media = sum(doc_distancia[doc_mais_relevante]) / len(doc_distancia[doc_mais_relevante])
+    return doc_mais_relevante, doc_indices[doc_mais_relevante], distancia_media
+
+
+# ——————————————————————————————
+def busca_adaptativa(
+    query_embedding: list[float],
+    k_min: int,
+    k_max: int,
+    tenant: str | None = None,
+    filtros: dict | None = None
+) -> Tuple[List[str], List[dict], List[float]]:
+    """
+    Busca começando com k_min trechos e dobrando a profundidade, até k_max, enquanto
+    a distribuição de distâncias estiver plana (muitos candidatos igualmente bons).
+
+    Returns:
+        Tuple[List[str], List[dict], List[float]]: Ids, metadados e distâncias.
+    """
+    k = max(1, min(k_min, k_max))
+    while True:
+        ids, metadados, distances = buscar(query_embedding, k, tenant, filtros)
+        if (
+            k >= k_max
+            or len(ids) < k
+            or distances[-1] - distances[0] > RETRIEVAL_FLAT_SPREAD
+            # O próximo trecho já passaria do corte: ampliar não traria nada útil
+            or distances[-1] > DISTANCE_CUTOFF
+        ):
+            return ids, metadados, distances
+        k = min(2 * k, k_max)
+
+
 # ——————————————————————————————
 def get_context(
     query: str,
-    k: int = K_RESULTS
+    k: int = K_RESULTS,
+    tenant: str | None = None,
+    filtros: dict | None = None
 ) -> Tuple[str, List[str], float]:
     """
     Busca e filtra o contexto mais relevante no ChromaDB por tema e documento.
 
     Steps:
-      1. Executa consulta no ChromaDB pedindo documentos, metadados e distâncias.
+      1. Gera o embedding da pergunta via micro-batcher e consulta o ChromaDB
+         (ou o índice comprimido) pedindo apenas ids, metadados e distâncias,
+         restrita aos trechos que atendem aos filtros, com profundidade adaptativa (de RETRIEVAL_K_MIN até k). Descarta trechos
+         além de DISTANCE_CUTOFF (nenhum restante: contexto vazio) e remove os
+         redundantes por MMR. Com o rerank ativo, busca diretamente RERANK_TOP_N candidatos
+         (sem profundidade adaptativa), aplica o mesmo corte e MMR, reordena-os com o
+         cross-encoder e mantém os RERANK_TOP_K mais relevantes.
       2. Agrupa trechos por tema (campo 'title' nos metadados).
       3. Identifica o tema com menor distância média.
       4. Filtra trechos apenas desse tema e agrupa por documento (fonte).
       5. Seleciona o documento mais relevante (menor distância média).
-      6. Concatena os trechos do documento selecionado, limita tamanho e retorna.
+      6. Busca sob demanda o texto apenas dos trechos do documento selecionado,
+         concatena, limita tamanho e retorna.
 
     Args:
         query (str): Pergunta inserida pelo usuário.
-        k (int): Número de chunks a recuperar inicialmente.
+        k (int): Número máximo de chunks a recuperar (profundidade da busca adaptativa).
+        tenant (str | None): Tenant cuja coleção é consultada (None: tenant padrão).
+        filtros (dict | None): Facetas que restringem a busca, ex.: {"source": "rotina_6.pdf",
+                               "pagina_min": 3, "pagina_max": 10} (ver store/facet_index.py).
 
     Returns:
         Tuple[str, List[str], float]:
-            - contexto (str): Trechos concatenados do documento mais relevante.
+            - contexto (str): Trechos concatenados do documento mais relevante
+                              ("" se nenhum trecho passou do corte de distância).
             - fontes (List[str]): Lista com o nome do arquivo/fonte selecionada.
             - distancia_media (float): Distância média dos trechos utilizados.
+
+    Raises:
+        ValueError: Se o tenant não estiver configurado ou algum filtro for inválido (fora do
+                    tratamento de erros da busca, para não ser confundido com "nenhum contexto encontrado").
     """
+    tenant = validar_tenant(tenant)
+    filtros = normalizar_filtros(filtros)
     try:
-        # 1) Query no Chroma: documentos, metadados e distâncias
-        result = collection.query(
-            query_texts=[query],
-            n_results=k,
-            include=["documents", "metadatas", "distances"]
-        )
-        documentos = result["documents"][0]
-        metadados = result["metadatas"][0]
-        distances = result["distances"][0]
-
-        # 2) Extrai temas de cada trecho via campo 'title'
-        temas = [
-            meta.get("title", "Desconhecido")
-            for meta in metadados
-        ]
-
-        # 3) Agrupa distâncias por tema para calcular média
-        tema_distancia = {}
-        for tema, dist in zip(temas, distances):
-            tema_distancia.setdefault(tema, []).append(dist)
-
-        # 4) Seleciona o tema com menor distância média
-        tema_mais_relevante = min(
-            tema_distancia,
-            key=lambda t: sum(tema_distancia[t]) / len(tema_distancia[t])
-        )
+        # 1) Embedding da pergunta (em lote com consultas concorrentes) e query no Chroma
+        with span("retrieval.embed_query"):
+            query_embedding = query_batcher.embed(query, timeout=embed_query_timeout)
+        with span("retrieval.search"):
+            if reranker is not None:
+                # O cross-encoder precisa de todos os candidatos: a busca adaptativa
+                # pararia em RETRIEVAL_K_MIN sempre que as distâncias não fossem planas
+                k_min = k_max = max(k, RERANK_TOP_N)
+            else:
+                k_min, k_max = RETRIEVAL_K_MIN, k
+            ids, metadados, distances = busca_adaptativa(query_embedding, k_min, k_max, tenant, filtros)
 
-        # 5) Filtra trechos e distâncias pelo tema escolhido e agrupa por documento
-        doc_distancia = {}
-        doc_trechos = {}
-        fontes_filtradas = set()
-
-        for doc, meta, tema, dist in zip(documentos, metadados, temas, distances):
-            if tema == tema_mais_relevante:
-                source = meta.get("source", "Desconhecido")
-                doc_distancia.setdefault(source, []).append(dist)
-                doc_trechos.setdefault(source, []).append(doc)
-                fontes_filtradas.add(source)
-
-        # Se não encontrou nenhum trecho para o tema, retorna vazio
-        if not doc_distancia:
-            return "", [], 0.0
-
-        # 6) Escolhe o documento (source) com menor distância média
-        doc_mais_relevante = min(
-            doc_distancia,
-            key=lambda d: sum(doc_distancia[d]) / len(doc_distancia[d])
+        # 1a) Corte por distância: trechos fracos não chegam ao LLM
+        mantidos = [i for i, dist in enumerate(distances) if dist <= DISTANCE_CUTOFF]
+        registry.counter("retrieval_chunks_cut_total", "Trechos descartados pelo corte de distância").inc(
+            len(ids) - len(mantidos)
         )
-        distancia_media = sum(doc_distancia[doc_mais_relevante]) / len(doc_distancia[doc_mais_relevante])
+        if not mantidos:
+            registry.counter("retrieval_no_context_total", "Perguntas sem nenhum trecho abaixo do corte").inc()
+            return "", [], distances[0] if distances else 0.0
+
+        # 1b) MMR: remove trechos quase redundantes e prioriza a diversidade
+        if MMR_ENABLED and len(mantidos) > 1:
+            with span("retrieval.mmr"):
+                ordem = mmr(
+                    query_embedding,
+                    obter_embeddings([ids[i] for i in mantidos], tenant),
+                    lambda_=MMR_LAMBDA,
+                    limite_similaridade=MMR_DUP_SIMILARITY
+                )
+                mantidos = [mantidos[i] for i in ordem]
+        ids, metadados, distances = ([lista[i] for i in mantidos] for lista in (ids, metadados, distances))
+
+        # 1c) Rerank opcional: poucos trechos, mais relevantes, chegam ao prompt
+        textos = None
+        if reranker is not None and ids:
+            with span("retrieval.rerank"):
+                textos = obter_textos(ids, tenant)
+                ordem = reranker.rerank(query, textos)
+                # Estouro do orçamento: mantém a ordem do bi-encoder
+                ordem = (ordem if ordem is not None else list(range(len(ids))))[:RERANK_TOP_K]
+                ids, metadados, distances, textos = (
+                    [lista[i] for i in ordem] for lista in (ids, metadados, distances, textos)
+                )
+
+        # Etapas 2–6: agrupamento por tema e documento
+        with span("retrieval.grouping"):
+            doc_mais_relevante, indices, distancia_media = selecionar_documento(metadados, distances)
+
+            # Se não encontrou nenhum trecho para o tema, retorna vazio
+            if doc_mais_relevante is None:
+                return "", [], 0.0
 
-        # 7) Concatena apenas os trechos do documento selecionado e aplica limite de tamanho
-        trechos = doc_trechos[doc_mais_relevante]
-        contexto = "\n\n".join(trechos)[:MAX_CONTEXT_LENGTH]
+        # 7) Busca o texto apenas dos trechos selecionados, concatena e aplica limite de tamanho
+        with span("retrieval.fetch_text"):
+            trechos = [textos[i] for i in indices] if textos is not None else obter_textos([ids[i] for i in indices], tenant)
+            contexto = "\n\n".join(trechos)[:MAX_CONTEXT_LENGTH]
 
         # Retorna contexto, lista de fontes (única) e distância média
         return contexto, [doc_mais_relevante], distancia_media
@@ -0,0 +1,276 @@
+"""
+app_config/conversation.py
+
+Memória de conversa com orçamento estrito de tokens, compartilhada pelo Telegram e pelo Streamlit:
+- Últimas interações mantidas na íntegra (até MEMORY_TURNS, dentro do orçamento); a mais
+  recente é sempre mantida, com a resposta truncada se sozinha exceder o orçamento
+- Interações mais antigas condensadas em um resumo acumulado, gerado de forma assíncrona
+  (uma thread dedicada) depois de cada resposta, sem atrasar o usuário
+- Reescrita das perguntas de continuação ("e como faço isso?") para a busca de contexto,
+  combinando-as com a pergunta anterior
+- Limite de memória por conversa (orçamento de tokens + resumo limitado), número máximo de
+  conversas em LRU e descarte das conversas ociosas, para o uso de memória do host ficar
+  limitado mesmo com milhares de chats
+"""
+
+# ——————————————————————————————
+import os
+import re
+import time
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Hashable
+from dotenv import load_dotenv
+
+from app_config.prompt_builder import CHARS_POR_TOKEN, estimar_tokens, build_summary_prompt
+from metrics.instrumentation import registry
+
+# ——————————————————————————————
+# Configuração da memória de conversa
+load_dotenv()
+MEMORY_ENABLED = os.getenv("MEMORY_ENABLED", "1") == "1"
+# Interações mantidas na íntegra e orçamento total (resumo + interações) de tokens no prompt
+MEMORY_TURNS = int(os.getenv("MEMORY_TURNS", 3))
+MEMORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", 512))
+MEMORY_SUMMARY_TOKENS = int(os.getenv("MEMORY_SUMMARY_TOKENS", 128))
+# Resumo pelo LLM (1) ou apenas extrativo, com as perguntas anteriores (0)
+MEMORY_SUMMARY_LLM = os.getenv("MEMORY_SUMMARY_LLM", "1") == "1"
+# Conversas mantidas em memória e tempo (s) sem mensagens até uma conversa ser descartada
+MEMORY_MAX_CHATS = int(os.getenv("MEMORY_MAX_CHATS", 5000))
+MEMORY_IDLE_S = float(os.getenv("MEMORY_IDLE_S", 3600))
+# Perguntas com até este número de palavras são tratadas como continuação
+MEMORY_FOLLOWUP_WORDS = int(os.getenv("MEMORY_FOLLOWUP_WORDS", 3))
+
+# Termos que indicam referência à conversa anterior
+PALAVRAS_REFERENCIA = {
+    "isso", "isto", "disso", "disto", "nisso", "nisto", "desse", "dessa", "deste", "desta",
+    "nesse", "nessa", "neste", "nesta", "ele", "ela", "eles", "elas", "dele", "dela",
+    "deles", "delas", "nele", "nela", "mesmo", "mesma", "anterior", "acima", "também"
+}
+CONECTIVOS_INICIAIS = ("e ", "mas ", "então ", "entao ", "porém ", "e se ", "e quanto ")
+
+
+# ——————————————————————————————
+def eh_continuacao(pergunta: str) -> bool:
+    """Indica se a pergunta depende da conversa anterior (curta, com referência ou conectivo inicial)."""
+    texto = pergunta.casefold().strip()
+    palavras = re.findall(r"\w+", texto)
+    return (
+        len(palavras) <= MEMORY_FOLLOWUP_WORDS
+        or bool(PALAVRAS_REFERENCIA.intersection(palavras))
+        or texto.startswith(CONECTIVOS_INICIAIS)
+    )
+
+
+# ——————————————————————————————
+class ConversationMemory:
+    """
+    Memória de uma conversa: interações recentes na íntegra e resumo das anteriores.
+
+    Cada interação guarda a pergunta, a resposta e a consulta usada na busca
+    (a pergunta reescrita, no caso de continuações); a consulta da última interação
+    fica também em 'ultima_consulta', independente da janela verbatim.
+    """
+
+    def __init__(self):
+        self.turnos: deque[tuple[str, str, str]] = deque()
+        self.ultima_consulta: str | None = None
+        self.resumo = ""
+        self.pendentes: list[tuple[str, str]] = []
+        self.resumindo = False
+        self.ultimo_uso = time.monotonic()
+        self.lock = threading.Lock()
+
+    def historico(self) -> str:
+        """Resumo e interações recentes, prontos para o prompt (vazio em conversas novas)."""
+        with self.lock:
+            partes = [f"Resumo: {self.resumo}"] if self.resumo else []
+            partes += [f"Usuário: {pergunta}\nAssistente: {resposta}" for pergunta, resposta, _ in self.turnos]
+        return "\n".join(partes)
+
+    def reescrever_consulta(self, pergunta: str) -> str:
+        """
+        Consulta usada na busca de contexto: continuações são combinadas com a consulta
+        da interação anterior; as demais perguntas são usadas como estão.
+        """
+        with self.lock:
+            anterior = self.ultima_consulta
+        if anterior is None or not eh_continuacao(pergunta):
+            return pergunta
+        # Mantém a consulta curta: a combinação não acumula indefinidamente
+        return f"{anterior[-400:]} {pergunta}"
+
+    def tamanho(self) -> int:
+        """Caracteres mantidos (interações, resumo e pendentes de resumo)."""
+        with self.lock:
+            return (
+                len(self.resumo)
+                + sum(len(p) + len(r) + len(c) for p, r, c in self.turnos)
+                + sum(len(p) + len(r) for p, r in self.pendentes)
+                + len(self.ultima_consulta or "")
+            )
+
+
+# ——————————————————————————————
+class ConversationStore:
+    """
+    Conversas em LRU, com descarte das ociosas e resumo assíncrono das interações antigas.
+
+    O orçamento de tokens é dividido entre o resumo (até 'resumo_tokens') e as interações
+    recentes (o restante); interações que não cabem, ou além de 'turnos', saem da memória
+    verbatim e são incorporadas ao resumo por uma única thread em segundo plano. A interação
+    mais recente nunca sai: se sozinha exceder o orçamento, sua resposta é truncada.
+    """
+
+    def __init__(
+        self,
+        resumir: Callable[[str], str] | None = None,
+        turnos: int = MEMORY_TURNS,
+        orcamento_tokens: int = MEMORY_TOKEN_BUDGET,
+        resumo_tokens: int = MEMORY_SUMMARY_TOKENS,
+        max_conversas: int = MEMORY_MAX_CHATS,
+        ocioso_s: float = MEMORY_IDLE_S,
+        ativa: bool = MEMORY_ENABLED
+    ):
+        """
+        Args:
+            resumir (Callable[[str], str] | None): Função que gera texto a partir de um prompt
+                livre e levanta exceção em falhas (ex.: llm.llm.gerar_texto); None, ou
+                MEMORY_SUMMARY_LLM=0, usa apenas o resumo extrativo.
+            turnos (int): Máximo de interações mantidas na íntegra.
+            orcamento_tokens (int): Tokens máximos do histórico (resumo + interações) no prompt.
+            resumo_tokens (int): Parte do orçamento reservada ao resumo.
+            max_conversas (int): Número máximo de conversas em memória.
+            ocioso_s (float): Tempo sem mensagens após o qual uma conversa é descartada.
+            ativa (bool): False desativa a memória (sem histórico nem reescrita).
+        """
+        self.ativa = ativa
+        self.resumir = resumir if MEMORY_SUMMARY_LLM else None
+        self.turnos = turnos
+        self.resumo_tokens = min(resumo_tokens, orcamento_tokens // 2)
+        self.turnos_tokens = orcamento_tokens - self.resumo_tokens
+        self.max_conversas = max_conversas
+        self.ocioso_s = ocioso_s
+        self._conversas: OrderedDict[Hashable, ConversationMemory] = OrderedDict()
+        self._lock = threading.Lock()
+        # Uma única thread: os resumos não disputam o LLM com mais de uma geração extra
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="resumo-conversa")
+
+        self._resumos = registry.counter("conversation_summaries_total", "Resumos de conversa atualizados")
+        self._reescritas = registry.counter("conversation_query_rewrites_total", "Perguntas de continuação reescritas")
+        self._descartes = registry.counter("conversation_evictions_total", "Conversas descartadas por LRU ou ociosidade")
+        registry.gauge("conversations_open", lambda: len(self._conversas), "Conversas com memória ativa")
+
+    # ——————————————————————————————
+    def obter(self, conversa_id: Hashable) -> ConversationMemory:
+        """Memória da conversa (criada se necessário), descartando as ociosas e as excedentes."""
+        agora = time.monotonic()
+        with self._lock:
+            memoria = self._conversas.get(conversa_id)
+            if memoria is None:
+                memoria = ConversationMemory()
+                self._conversas[conversa_id] = memoria
+            self._conversas.move_to_end(conversa_id)
+            memoria.ultimo_uso = agora
+
+            # Da menos para a mais recente: para na primeira conversa ativa dentro do limite
+            while len(self._conversas) > 1:
+                antiga_id, antiga = next(iter(self._conversas.items()))
+                if len(self._conversas) <= self.max_conversas and agora - antiga.ultimo_uso <= self.ocioso_s:
+                    break
+                self._conversas.pop(antiga_id)
+                self._descartes.inc()
+        return memoria
+
+    def esquecer(self, conversa_id: Hashable) -> None:
+        """Descarta a memória de uma conversa (ex.: histórico limpo ou troca de tenant)."""
+        with self._lock:
+            self._conversas.pop(conversa_id, None)
+
+    def consulta(self, conversa_id: Hashable, pergunta: str) -> str:
+        """Consulta para a busca de contexto (ver ConversationMemory.reescrever_consulta)."""
+        if not self.ativa:
+            return pergunta
+        consulta = self.obter(conversa_id).reescrever_consulta(pergunta)
+        if consulta != pergunta:
+            self._reescritas.inc()
+        return consulta
+
+    def historico(self, conversa_id: Hashable) -> str:
+        """Histórico da conversa para o prompt, dentro do orçamento de tokens."""
+        if not self.ativa:
+            return ""
+        return self.obter(conversa_id).historico()
+
+    # ——————————————————————————————
+    def registrar(self, conversa_id: Hashable, pergunta: str, resposta: str, consulta: str | None = None) -> None:
+        """
+        Acrescenta uma interação respondida e agenda o resumo das que saíram da janela.
+
+        Args:
+            conversa_id (Hashable): Chat do Telegram ou sessão do Streamlit.
+            pergunta (str): Pergunta do usuário.
+            resposta (str): Resposta enviada.
+            consulta (str | None): Consulta usada na busca (padrão: a própria pergunta).
+        """
+        if not self.ativa:
+            return
+        memoria = self.obter(conversa_id)
+        consulta = consulta or pergunta
+        with memoria.lock:
+            memoria.ultima_consulta = consulta
+            memoria.turnos.append((pergunta, self._truncar_resposta(pergunta, resposta), consulta))
+            while len(memoria.turnos) > 1 and (
+                len(memoria.turnos) > self.turnos
+                or sum(estimar_tokens(f"{p}\n{r}") for p, r, _ in memoria.turnos) > self.turnos_tokens
+            ):
+                pergunta_antiga, resposta_antiga, _ = memoria.turnos.popleft()
+                memoria.pendentes.append((pergunta_antiga, resposta_antiga))
+            agendar = bool(memoria.pendentes) and not memoria.resumindo
+            if agendar:
+                memoria.resumindo = True
+        if agendar:
+            self._executor.submit(self._resumir, memoria)
+
+    def _truncar_resposta(self, pergunta: str, resposta: str) -> str:
+        """Resposta cortada para que a interação (pergunta + resposta) caiba em 'turnos_tokens'."""
+        limite = self.turnos_tokens * CHARS_POR_TOKEN - len(pergunta) - 1
+        if len(resposta) <= limite:
+            return resposta
+        return resposta[:max(limite - 1, 0)] + "…"
+
+    def _resumir(self, memoria: ConversationMemory) -> None:
+        """Incorpora ao resumo as interações pendentes, até não restar nenhuma."""
+        while True:
+            with memoria.lock:
+                lote, memoria.pendentes = memoria.pendentes, []
+                resumo = memoria.resumo
+                if not lote:
+                    memoria.resumindo = False
+                    return
+            novo = self._gerar_resumo(resumo, lote)
+            with memoria.lock:
+                memoria.resumo = novo
+            self._resumos.inc()
+
+    def _gerar_resumo(self, resumo: str, lote: list[tuple[str, str]]) -> str:
+        """Resumo pelo LLM (se configurado) ou extrativo, sempre limitado a 'resumo_tokens'."""
+        limite = self.resumo_tokens * CHARS_POR_TOKEN
+        if self.resumir is not None:
+            try:
+                texto = self.resumir(build_summary_prompt(resumo, lote, self.resumo_tokens)).strip()
+                if texto:
+                    return texto[:limite]
+            except Exception as error:
+                print(f"⚠️ Falha ao resumir a conversa, usando resumo extrativo: {error}")
+
+        # Extrativo: perguntas anteriores, mantendo as mais recentes quando excede o limite
+        texto = "; ".join([resumo] * bool(resumo) + [pergunta for pergunta, _ in lote])
+        return texto[-limite:]
+
+    def stats(self) -> dict:
+        """Conversas em memória e caracteres mantidos no total."""
+        with self._lock:
+            memorias = list(self._conversas.values())
+        return {"conversas": len(memorias), "caracteres": sum(m.tamanho() for m in memorias)}
@@ -0,0 +1,114 @@
+"""
+app_config/job_queue.py
+
+Fila de trabalhos assíncrona usada pelo bot do Telegram:
+- Uma fila por chat, consumida em ordem por uma única task
+- Limite global de trabalhos em execução ('workers') e de admissão ('max_pending')
+- Estimativa da posição de um novo pedido e indicador opcional por chat ("digitando...")
+"""
+
+# ——————————————————————————————
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+
+# ——————————————————————————————
+class ChatJobQueue:
+    """
+    Fila de trabalhos por chat com limite global de admissão.
+
+    Cada chat possui sua própria asyncio.Queue, consumida por uma única task,
+    garantindo que as mensagens de um mesmo chat sejam respondidas em ordem.
+    Chats diferentes competem apenas pelos 'workers' slots de execução.
+    A task consumidora termina quando a fila do chat esvazia, de modo que
+    chats ociosos não mantêm recursos alocados; um indicador opcional (ex.:
+    "digitando...") acompanha a vida dessa task, um por chat.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        """
+        Args:
+            workers (int): Número máximo de trabalhos executando simultaneamente.
+            max_pending (int): Número máximo de trabalhos admitidos (em execução + em espera).
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._filas: dict[int, asyncio.Queue] = {}
+        self._pendentes_chat: dict[int, int] = {}
+        self._slots = asyncio.Semaphore(workers)
+
+    def submit(
+        self,
+        chat_id: int,
+        job: Callable[[], Awaitable[None]],
+        indicador: Callable[[], Awaitable[None]] | None = None
+    ) -> int | None:
+        """
+        Admite um trabalho na fila do chat.
+
+        Args:
+            chat_id (int): Identificador do chat de origem.
+            job (Callable[[], Awaitable[None]]): Corrotina a executar.
+            indicador (Callable[[], Awaitable[None]] | None): Corrotina mantida em execução
+                enquanto o chat tiver trabalhos; só é iniciada se o chat ainda não tiver
+                uma task consumidora, e é cancelada quando a fila do chat esvazia.
+
+        Returns:
+            int | None: Posição estimada na fila de espera (0 se começa imediatamente),
+                        ou None se o limite global de admissão foi atingido.
+        """
+        if self.pending >= self.max_pending:
+            return None
+
+        posicao = self.posicao_estimada(chat_id)
+        self.pending += 1
+        self._pendentes_chat[chat_id] = self._pendentes_chat.get(chat_id, 0) + 1
+
+        fila = self._filas.get(chat_id)
+        if fila is None:
+            fila = asyncio.Queue()
+            self._filas[chat_id] = fila
+            asyncio.create_task(self._consumir(chat_id, fila, indicador))
+        fila.put_nowait(job)
+        return posicao
+
+    def posicao_estimada(self, chat_id: int) -> int:
+        """
+        Estima a posição de um novo pedido do chat na fila de espera (0 = começa já).
+
+        Os pedidos do próprio chat executam um por vez, então cada pendente conta uma
+        posição; cada outro chat com trabalhos ocupa (ou aguarda) no máximo um slot por
+        vez, e só os que excedem os slots livres ficam à frente. É uma estimativa: a
+        ordem entre chats diferentes depende de quem obtém o slot primeiro.
+        """
+        do_chat = self._pendentes_chat.get(chat_id, 0)
+        outros_chats = len(self._pendentes_chat) - (chat_id in self._pendentes_chat)
+        return do_chat + max(0, outros_chats - self.workers + 1)
+
+    async def _consumir(
+        self,
+        chat_id: int,
+        fila: asyncio.Queue,
+        indicador: Callable[[], Awaitable[None]] | None = None
+    ) -> None:
+        """Executa, em ordem, os trabalhos de um chat até sua fila esvaziar."""
+        tarefa_indicador = asyncio.create_task(indicador()) if indicador else None
+        try:
+            while not fila.empty():
+                job = fila.get_nowait()
+                try:
+                    async with self._slots:
+                        await job()
+                except Exception as error:
+                    logging.error(f"Erro no trabalho do chat {chat_id}: {error}")
+                finally:
+                    self.pending -= 1
+                    self._pendentes_chat[chat_id] -= 1
+        finally:
+            # Sem 'await' entre a verificação de fila vazia e a remoção: não há corrida
+            self._filas.pop(chat_id, None)
+            self._pendentes_chat.pop(chat_id, None)
+            if tarefa_indicador is not None:
+                tarefa_indicador.cancel()
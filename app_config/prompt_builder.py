@@ -1,11 +1,28 @@
 # prompt_to_model/prompt_builder.py
+import math
 
-def build_prompt(question: str, context: str) -> str:
+# Média aproximada de caracteres por token do Gemma em português
+CHARS_POR_TOKEN = 4
+
+# Resposta usada quando nenhum trecho passa do corte de distância (o LLM não é acionado)
+MENSAGEM_SEM_CONTEXTO = "Não encontrei contexto relevante nos documentos."
+
+
+def estimar_tokens(texto: str) -> int:
+    """
+    Estima a quantidade de tokens de um texto para o LLM, sem carregar o tokenizer.
+    """
+    return math.ceil(len(texto) / CHARS_POR_TOKEN)
+
+
+def build_prompt(question: str, context: str, history: str = "") -> str:
     """
     Constrói o prompt completo para o modelo utilizado (Ex: Gemma 3),
-    combinando instruções fixas, a pergunta do usuário
-    e o contexto extraído dos documentos.
+    combinando instruções fixas, a pergunta do usuário,
+    o contexto extraído dos documentos e, se houver, a conversa anterior
+    (resumo e últimas interações, já limitados pela memória da conversa).
     """
+    conversa = f"**Conversa anterior (use apenas para entender a pergunta):**\n{history}\n\n" if history else ""
     return (
         "Você é um assistente virtual com profundo conhecimento no domínio do usuário, "
         "capaz de fornecer respostas técnicas e detalhadas com base em informações extraídas de documentos.\n\n"
@@ -22,9 +39,26 @@ def build_prompt(question: str, context: str) -> str:
         
         "4. Mantenha a linguagem clara, objetiva e em português formal, mas acessível a não-especialistas.\n\n"
         
+        f"{conversa}"
         f"**Pergunta:** {question}\n\n"
         f"**Contexto (trechos extraídos dos documentos):**\n{context}\n\n"
         
         "Com base nessas informações, forneça uma resposta estruturada, passo a passo, "
         "que atenda inteiramente à pergunta e reflita fielmente o conteúdo dos documentos.\n"
     )
+
+
+def build_summary_prompt(summary: str, turns: list[tuple[str, str]], max_tokens: int) -> str:
+    """
+    Constrói o prompt que condensa interações antigas de uma conversa no resumo acumulado,
+    usado pela memória da conversa (app_config/conversation.py).
+    """
+    interacoes = "\n".join(f"Usuário: {pergunta}\nAssistente: {resposta}" for pergunta, resposta in turns)
+    return (
+        "Atualize o resumo de uma conversa entre um usuário e um assistente de documentos.\n"
+        f"Escreva em português, em no máximo {max_tokens * 3 // 4} palavras, mantendo apenas "
+        "os assuntos, documentos, termos e decisões necessários para entender perguntas futuras.\n\n"
+        f"**Resumo atual:**\n{summary or '(vazio)'}\n\n"
+        f"**Novas interações:**\n{interacoes}\n\n"
+        "Responda apenas com o resumo atualizado.\n"
+    )
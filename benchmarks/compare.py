@@ -0,0 +1,98 @@
+"""
+benchmarks/compare.py
+
+Compara dois resultados de benchmarks/run.py (base x candidato) e aponta regressões:
+- Latências de consulta (p50/p95/p99 por k) e ponta a ponta: piora se aumentarem
+- Vazão de ingestão por etapa (MB/s): piora se diminuir
+- Tamanho do índice em disco: piora se aumentar
+
+Sai com código 1 quando alguma métrica piora mais que o limite, permitindo uso em scripts.
+
+Uso:
+    python -m benchmarks.compare base.json candidato.json --threshold 10
+"""
+
+# ——————————————————————————————
+import sys
+import json
+import argparse
+
+
+# ——————————————————————————————
+def _metricas(resultado: dict) -> dict:
+    """
+    Extrai as métricas comparáveis de um resultado.
+
+    Returns:
+        dict: {nome: (valor, maior_e_melhor)}
+    """
+    metricas = {}
+    for k, stats in resultado.get("consultas", {}).items():
+        for p in ("p50_ms", "p95_ms", "p99_ms"):
+            metricas[f"consultas.k={k}.{p}"] = (stats.get(p), False)
+    for p in ("p50_ms", "p95_ms", "p99_ms"):
+        if p in resultado.get("ponta_a_ponta", {}):
+            metricas[f"ponta_a_ponta.{p}"] = (resultado["ponta_a_ponta"][p], False)
+    for etapa, valor in resultado.get("ingestao", {}).get("mb_por_segundo", {}).items():
+        metricas[f"ingestao.{etapa}.mb_por_segundo"] = (valor, True)
+    if "disco_bytes" in resultado.get("indice", {}):
+        metricas["indice.disco_bytes"] = (resultado["indice"]["disco_bytes"], False)
+    return metricas
+
+
+def comparar(base: dict, candidato: dict, limite_pct: float) -> list[dict]:
+    """
+    Compara as métricas em comum entre dois resultados.
+
+    Args:
+        base (dict): Resultado de referência.
+        candidato (dict): Resultado a avaliar.
+        limite_pct (float): Variação percentual tolerada antes de considerar regressão.
+
+    Returns:
+        list[dict]: Uma linha por métrica com valores, variação e indicação de regressão.
+    """
+    m_base = _metricas(base)
+    m_cand = _metricas(candidato)
+    linhas = []
+    for nome in sorted(set(m_base) & set(m_cand)):
+        (vb, maior_melhor), (vc, _) = m_base[nome], m_cand[nome]
+        if not vb or vc is None:
+            continue
+        variacao = (vc - vb) / vb * 100
+        piora = -variacao if maior_melhor else variacao
+        linhas.append({
+            "metrica": nome,
+            "base": vb,
+            "candidato": vc,
+            "variacao_pct": variacao,
+            "regressao": piora > limite_pct
+        })
+    return linhas
+
+
+# ——————————————————————————————
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara dois resultados de benchmark")
+    parser.add_argument("base")
+    parser.add_argument("candidato")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Piora tolerada, em %%")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.candidato, encoding="utf-8") as f:
+        candidato = json.load(f)
+
+    print(f"Base: {base.get('commit')}  |  Candidato: {candidato.get('commit')}\n")
+    linhas = comparar(base, candidato, args.threshold)
+    for linha in linhas:
+        marca = "❌" if linha["regressao"] else "✅"
+        print(
+            f"{marca} {linha['metrica']:<40} {linha['base']:>14.3f} → {linha['candidato']:>14.3f} "
+            f"({linha['variacao_pct']:+.1f}%)"
+        )
+
+    regressoes = [linha for linha in linhas if linha["regressao"]]
+    print(f"\n{len(regressoes)} regressão(ões) acima de {args.threshold}%")
+    sys.exit(1 if regressoes else 0)
@@ -0,0 +1,104 @@
+"""
+benchmarks/compression_eval.py
+
+Avaliação do índice comprimido (store/compressed_index.py) sobre os vetores já indexados:
+- Lê os embeddings da coleção do ChromaDB
+- Para cada dimensão PCA informada, monta um índice comprimido em uma pasta temporária
+- Usa como consultas uma amostra dos próprios vetores, levemente perturbados
+  (o que simula perguntas próximas de trechos existentes sem precisar do modelo)
+- Compara com a busca exata em float32: recall@k sem re-rank (apenas o espaço
+  comprimido) e com re-rank exato de 'fator·k' candidatos, latência por consulta
+  e memória dos vetores comprimidos x float32
+
+Uso:
+    python -m benchmarks.compression_eval --dims 64 128 192 --k 5 --factor 4 --output compressao.json
+"""
+
+# ——————————————————————————————
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.eval_retrieval import _normalizar
+from store.compressed_index import CompressedIndex
+
+
+# ——————————————————————————————
+def recall(esperados: np.ndarray, obtidos: list[list[int]]) -> float:
+    """Fração média dos vizinhos exatos presentes nos resultados."""
+    k = esperados.shape[1]
+    return float(np.mean([len(set(e) & set(o)) / k for e, o in zip(esperados, obtidos)]))
+
+
+def avaliar_dimensao(vetores: np.ndarray, consultas: np.ndarray, exatos: np.ndarray,
+                     dimensao: int, k: int, fator: int) -> dict:
+    """Monta o índice comprimido com a dimensão informada e mede recall, latência e memória."""
+    with tempfile.TemporaryDirectory(prefix="chatbot_pca_") as pasta:
+        indice = CompressedIndex(pasta, dimensao=dimensao)
+        ids = [str(i) for i in range(len(vetores))]
+        indice.add(ids, vetores)
+        inicio = time.perf_counter()
+        indice.ajustar()
+        tempo_ajuste = time.perf_counter() - inicio
+
+        linha = {"dimensao": dimensao, "ajuste_s": tempo_ajuste, **indice.stats()}
+        for rotulo, candidatos in (("sem_rerank", k), ("com_rerank", fator * k)):
+            resultados = []
+            inicio = time.perf_counter()
+            for q in consultas:
+                encontrados, _ = indice.search(q, k, candidatos=candidatos)
+                resultados.append([int(i) for i in encontrados])
+            linha[f"recall_{rotulo}"] = recall(exatos, resultados)
+            linha[f"latencia_{rotulo}_ms"] = (time.perf_counter() - inicio) / len(consultas) * 1000
+        return linha
+
+
+# ——————————————————————————————
+def main():
+    parser = argparse.ArgumentParser(description="Memória x recall do índice comprimido (PCA + int8)")
+    parser.add_argument("--dims", type=int, nargs="+", default=[64, 128, 192])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--factor", type=int, default=4, help="Candidatos reordenados = factor·k")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.05, help="Perturbação das consultas")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tenant", help="Tenant cujos vetores são avaliados (padrão: TENANT_DEFAULT)")
+    parser.add_argument("--output", help="Arquivo JSON de saída (opcional)")
+    args = parser.parse_args()
+
+    from store.chroma_store import obter_tenant
+
+    dados = obter_tenant(args.tenant).collection.get(include=["embeddings"])
+    vetores = _normalizar(np.asarray(dados["embeddings"], dtype=np.float32))
+    if len(vetores) < max(args.dims):
+        print(f"⚠️ Apenas {len(vetores)} vetores indexados: é preciso ao menos {max(args.dims)}.")
+        return
+
+    rng = np.random.default_rng(args.seed)
+    amostra = vetores[rng.choice(len(vetores), min(args.queries, len(vetores)), replace=False)]
+    consultas = _normalizar(amostra + args.noise * rng.standard_normal(amostra.shape).astype(np.float32))
+    exatos = np.argsort(-(consultas @ vetores.T), axis=1)[:, :args.k]
+    print(f"📋 {len(vetores)} vetores de dimensão {vetores.shape[1]}, {len(consultas)} consultas, k={args.k}")
+
+    linhas = []
+    for dimensao in args.dims:
+        linha = avaliar_dimensao(vetores, consultas, exatos, dimensao, args.k, args.factor)
+        linhas.append(linha)
+        print(
+            f"   d={dimensao:<4} memória {linha['bytes_memoria'] / 1024 ** 2:7.2f}MB "
+            f"(float32 {linha['bytes_float32'] / 1024 ** 2:7.2f}MB, economia {linha['economia']:.0%}) | "
+            f"recall@{args.k} {linha['recall_sem_rerank']:.3f} -> {linha['recall_com_rerank']:.3f} com re-rank | "
+            f"{linha['latencia_com_rerank_ms']:.2f}ms/consulta"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(linhas, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"✅ Resultados gravados em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+benchmarks/corpus.py
+
+Gerador de corpus sintético para benchmarks de escalabilidade, incluindo:
+- Texto "português-like" determinístico (vocabulário fixo + palavras sintéticas por sílabas)
+- Arquivos PDF (via PyMuPDF), CSV e TXT no formato esperado pelos loaders
+- Tamanho total configurável (ex.: 10MB até 10GB), dividido em arquivos de tamanho fixo
+- Geração de perguntas a partir do mesmo vocabulário, para as consultas do benchmark
+
+Uso:
+    python -m benchmarks.corpus --output /tmp/corpus --size 100MB
+"""
+
+# ——————————————————————————————
+import csv
+import random
+import argparse
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+# ——————————————————————————————
+# Vocabulário base com termos de rotinas e políticas internas
+VOCABULARIO = (
+    "atendimento cliente solicitação procedimento política empresa colaborador férias "
+    "reembolso despesas aprovação gestor prazo documento registro sistema cadastro "
+    "pagamento fornecedor contrato auditoria segurança informação acesso senha relatório "
+    "treinamento equipe reunião projeto orçamento compra estoque entrega qualidade "
+    "reclamação solução chamado suporte técnico manutenção equipamento benefício salário "
+    "jornada trabalho remoto ponto horário escala plantão responsável área setor diretoria"
+).split()
+CONECTORES = "o a os as de do da dos das em no na para com por que e ou se ao à".split()
+SILABAS = "ba be bi bo bu ca ce ci co cu da de di do du fa fe fi fo la le li lo lu ma me mi mo mu na ne no pa pe po ra re ri ro sa se si so ta te ti to va ve vi".split()
+
+UNIDADES = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+
+# ——————————————————————————————
+def parse_tamanho(valor: str) -> int:
+    """Converte '10MB', '2GB' ou '512KB' em bytes."""
+    valor = valor.strip().upper()
+    for sufixo, fator in UNIDADES.items():
+        if valor.endswith(sufixo):
+            return int(float(valor[:-len(sufixo)]) * fator)
+    return int(valor)
+
+
+class GeradorTexto:
+    """Gera frases e parágrafos pseudo-aleatórios, reprodutíveis a partir de uma semente."""
+
+    def __init__(self, seed: int = 42, palavras_sinteticas: int = 5000):
+        self.rng = random.Random(seed)
+        sinteticas = {
+            "".join(self.rng.choice(SILABAS) for _ in range(self.rng.randint(2, 4)))
+            for _ in range(palavras_sinteticas)
+        }
+        self.palavras = VOCABULARIO * 20 + sorted(sinteticas)
+
+    def frase(self) -> str:
+        palavras = []
+        for _ in range(self.rng.randint(8, 20)):
+            palavras.append(self.rng.choice(self.palavras))
+            if self.rng.random() < 0.3:
+                palavras.append(self.rng.choice(CONECTORES))
+        return " ".join(palavras).capitalize() + "."
+
+    def paragrafo(self) -> str:
+        return " ".join(self.frase() for _ in range(self.rng.randint(3, 7)))
+
+    def pergunta(self) -> str:
+        termos = self.rng.sample(VOCABULARIO, 3)
+        return f"Qual o procedimento de {termos[0]} para {termos[1]} e {termos[2]}?"
+
+
+# ——————————————————————————————
+def _gerar_txt(caminho: Path, gerador: GeradorTexto, alvo: int) -> int:
+    escritos = 0
+    with open(caminho, "w", encoding="utf-8") as f:
+        while escritos < alvo:
+            bloco = gerador.paragrafo() + "\n\n"
+            f.write(bloco)
+            escritos += len(bloco.encode("utf-8"))
+    return caminho.stat().st_size
+
+
+def _gerar_csv(caminho: Path, gerador: GeradorTexto, alvo: int) -> int:
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["documento_nome", "categoria", "documento_conteudo"])
+        i = 0
+        while f.tell() < alvo:
+            writer.writerow([f"documento_{i}", gerador.rng.choice(VOCABULARIO), gerador.paragrafo()])
+            i += 1
+    return caminho.stat().st_size
+
+
+def _gerar_pdf(caminho: Path, gerador: GeradorTexto, alvo: int) -> int:
+    # O texto de uma página A4 em fonte 9 ocupa ~3KB; estima o número de páginas pelo alvo
+    paginas = max(1, alvo // 3000)
+    with fitz.open() as doc:
+        for _ in range(paginas):
+            page = doc.new_page()
+            texto = "\n\n".join(gerador.paragrafo() for _ in range(3))
+            page.insert_textbox(fitz.Rect(50, 50, 545, 792), texto, fontsize=9)
+        doc.save(str(caminho), deflate=True)
+    return caminho.stat().st_size
+
+
+GERADORES = {".txt": _gerar_txt, ".csv": _gerar_csv, ".pdf": _gerar_pdf}
+
+
+def gerar_corpus(
+    destino: str,
+    tamanho_total: int,
+    tamanho_arquivo: int = 1024 ** 2,
+    proporcao: dict | None = None,
+    seed: int = 42
+) -> dict:
+    """
+    Gera um corpus sintético com PDFs, CSVs e TXTs até atingir 'tamanho_total' bytes.
+
+    Args:
+        destino (str): Pasta de saída (criada se necessário).
+        tamanho_total (int): Tamanho alvo do corpus, em bytes.
+        tamanho_arquivo (int): Tamanho alvo de cada arquivo, em bytes.
+        proporcao (dict | None): Fração de cada tipo, ex.: {".pdf": 0.4, ".csv": 0.3, ".txt": 0.3}.
+        seed (int): Semente para geração reprodutível.
+
+    Returns:
+        dict: {'arquivos', 'bytes', 'por_tipo': {extensão: bytes}}
+    """
+    proporcao = proporcao or {".pdf": 0.4, ".csv": 0.3, ".txt": 0.3}
+    pasta = Path(destino)
+    pasta.mkdir(parents=True, exist_ok=True)
+
+    gerador = GeradorTexto(seed)
+    por_tipo = {ext: 0 for ext in proporcao}
+    arquivos = 0
+    total = 0
+    while total < tamanho_total:
+        # Escolhe o tipo mais atrasado em relação à proporção desejada
+        ext = min(proporcao, key=lambda e: por_tipo[e] / (proporcao[e] * tamanho_total))
+        alvo = min(tamanho_arquivo, tamanho_total - total)
+        escritos = GERADORES[ext](pasta / f"sintetico_{arquivos:06d}{ext}", gerador, alvo)
+        por_tipo[ext] += escritos
+        total += escritos
+        arquivos += 1
+
+    return {"arquivos": arquivos, "bytes": total, "por_tipo": por_tipo}
+
+
+# ——————————————————————————————
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera corpus sintético para benchmarks")
+    parser.add_argument("--output", required=True, help="Pasta de saída")
+    parser.add_argument("--size", default="10MB", help="Tamanho total (ex.: 10MB, 1GB, 10GB)")
+    parser.add_argument("--file-size", default="1MB", help="Tamanho de cada arquivo")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    resumo = gerar_corpus(args.output, parse_tamanho(args.size), parse_tamanho(args.file_size), seed=args.seed)
+    print(f"✅ Corpus gerado em {args.output}: {resumo['arquivos']} arquivos, {resumo['bytes'] / 1024 ** 2:.1f} MB")
+    print("   Por tipo:", {ext: f"{b / 1024 ** 2:.1f} MB" for ext, b in resumo["por_tipo"].items()})
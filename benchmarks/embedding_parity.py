@@ -0,0 +1,136 @@
+"""
+benchmarks/embedding_parity.py
+
+Verificação de paridade do modo quantizado de embeddings (embeddings/embedder.py):
+- Gera embeddings dos mesmos textos com o modelo fp32 e com o modelo int8
+- Reporta a similaridade cosseno entre os pares de vetores (média, mínima, p1)
+- Reporta a concordância do top-k de uma busca com ambos os modos
+  (perguntas sintéticas contra os textos), isto é, quantos vizinhos coincidem
+- Mede o tempo de encoding de cada modo e o ganho de velocidade
+
+Os textos vêm dos chunks da pasta de dados (--data-dir) ou, na falta dela,
+do gerador de corpus sintético. Roda totalmente offline com EMBED_OFFLINE=1.
+
+Uso:
+    python -m benchmarks.embedding_parity --data-dir data --k 5 --output parity.json
+"""
+
+# ——————————————————————————————
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.eval_retrieval import _normalizar
+
+
+# ——————————————————————————————
+def medir_encoding(textos: list[str], quantizacao: str, repeticoes: int) -> tuple[np.ndarray, float]:
+    """
+    Gera os embeddings no modo informado e mede o melhor tempo entre as repetições.
+
+    Returns:
+        tuple[np.ndarray, float]: Embeddings normalizados e tempo (s) do encoding completo.
+    """
+    from embeddings.embedder import carregar_modelo, embed_texts
+
+    # Carregamento e aquecimento fora da medição
+    carregar_modelo(quantizacao)
+    embed_texts(textos[:8], quantizacao, show_progress_bar=False)
+
+    melhor = float("inf")
+    vetores = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        vetores = embed_texts(textos, quantizacao, show_progress_bar=False)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return _normalizar(np.asarray(vetores, dtype=np.float32)), melhor
+
+
+def concordancia_top_k(consultas_a: np.ndarray, docs_a: np.ndarray,
+                       consultas_b: np.ndarray, docs_b: np.ndarray, k: int) -> float:
+    """Fração média dos k vizinhos mais próximos que coincidem entre os dois modos."""
+    k = min(k, docs_a.shape[0])
+    top_a = np.argsort(-(consultas_a @ docs_a.T), axis=1)[:, :k]
+    top_b = np.argsort(-(consultas_b @ docs_b.T), axis=1)[:, :k]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(top_a, top_b)]))
+
+
+def carregar_textos(data_dir: str | None, limite: int, seed: int) -> list[str]:
+    """Chunks dos documentos da pasta ou, sem pasta, parágrafos sintéticos."""
+    if data_dir and Path(data_dir).is_dir():
+        from benchmarks.eval_retrieval import carregar_documentos
+        from retriever.retriever import chunk_documents
+
+        textos = [
+            chunk["text"]
+            for raw_docs in carregar_documentos(data_dir).values()
+            for chunk in chunk_documents(raw_docs)
+        ]
+        if textos:
+            return textos[:limite]
+
+    from benchmarks.corpus import GeradorTexto
+    gerador = GeradorTexto(seed)
+    return [gerador.paragrafo() for _ in range(limite)]
+
+
+# ——————————————————————————————
+def main():
+    parser = argparse.ArgumentParser(description="Paridade e velocidade dos embeddings int8 x fp32")
+    parser.add_argument("--data-dir", help="Pasta dos documentos (senão, usa texto sintético)")
+    parser.add_argument("--limit", type=int, default=1000, help="Máximo de textos avaliados")
+    parser.add_argument("--queries", type=int, default=100, help="Perguntas sintéticas para o top-k")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições de cada medição de tempo")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Arquivo JSON de saída (opcional)")
+    args = parser.parse_args()
+
+    from benchmarks.corpus import GeradorTexto
+
+    textos = carregar_textos(args.data_dir, args.limit, args.seed)
+    gerador = GeradorTexto(args.seed + 1)
+    perguntas = [gerador.pergunta() for _ in range(args.queries)]
+    print(f"📋 {len(textos)} textos, {len(perguntas)} perguntas")
+
+    docs_fp32, tempo_fp32 = medir_encoding(textos, "none", args.repeat)
+    docs_int8, tempo_int8 = medir_encoding(textos, "int8", args.repeat)
+    consultas_fp32, _ = medir_encoding(perguntas, "none", 1)
+    consultas_int8, _ = medir_encoding(perguntas, "int8", 1)
+
+    cossenos = np.sum(docs_fp32 * docs_int8, axis=1)
+    resultado = {
+        "textos": len(textos),
+        "cosseno_medio": float(np.mean(cossenos)),
+        "cosseno_minimo": float(np.min(cossenos)),
+        "cosseno_p1": float(np.percentile(cossenos, 1)),
+        f"concordancia_top{args.k}": concordancia_top_k(
+            consultas_fp32, docs_fp32, consultas_int8, docs_int8, args.k
+        ),
+        "tempo_fp32_s": tempo_fp32,
+        "tempo_int8_s": tempo_int8,
+        "textos_por_s_fp32": len(textos) / tempo_fp32,
+        "textos_por_s_int8": len(textos) / tempo_int8,
+        "speedup": tempo_fp32 / tempo_int8
+    }
+
+    print(
+        f"🎯 Cosseno fp32 x int8: média {resultado['cosseno_medio']:.4f} | "
+        f"mínimo {resultado['cosseno_minimo']:.4f} | p1 {resultado['cosseno_p1']:.4f}"
+    )
+    print(f"🔎 Concordância do top-{args.k}: {resultado[f'concordancia_top{args.k}']:.1%}")
+    print(
+        f"⚡ fp32 {resultado['textos_por_s_fp32']:.1f} textos/s | "
+        f"int8 {resultado['textos_por_s_int8']:.1f} textos/s | speedup {resultado['speedup']:.2f}x"
+    )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"✅ Resultado gravado em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
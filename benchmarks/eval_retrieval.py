@@ -0,0 +1,279 @@
+"""
+benchmarks/eval_retrieval.py
+
+Avaliação qualidade x latência da recuperação, para ajustar chunking e k sem reingestões completas:
+- Lê um golden set de pares pergunta -> fonte(s) esperada(s) (JSON ou CSV)
+- Varre combinações de chunk_size, chunk_overlap, k e MAX_CONTEXT_LENGTH
+- Reaproveita embeddings em cache (por hash do modelo e do texto), de modo que chunks
+  idênticos entre configurações e execuções não sejam embutidos novamente
+- Busca em memória (similaridade cosseno exata) e aplica a mesma seleção de
+  documento de 'get_context' ('selecionar_documento')
+- Reporta recall@k, MRR@k, acerto do documento escolhido, tokens estimados do prompt
+  e latência de busca + seleção; sugere a configuração mais barata que mantém a acurácia
+
+Formato do golden set:
+    JSON: [{"pergunta": "...", "fonte": "rotina_6.pdf"}, ...]   ('fonte' pode ser lista)
+    CSV:  colunas 'pergunta' e 'fonte' (várias fontes separadas por ';')
+
+Uso:
+    python -m benchmarks.eval_retrieval --golden golden.json --data-dir data \\
+        --chunk-sizes 300 500 800 --overlaps 0 50 --k 1 3 5 --max-context 1000 2000
+"""
+
+# ——————————————————————————————
+import os
+import csv
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import itertools
+from pathlib import Path
+
+import numpy as np
+from dotenv import load_dotenv
+
+# ——————————————————————————————
+load_dotenv()
+EVAL_CACHE_DIR = os.getenv("EVAL_CACHE_DIR", ".cache/eval")
+
+
+# ——————————————————————————————
+class EmbeddingCache:
+    """
+    Cache persistente de embeddings indexado pelo SHA-1 do modelo e do texto (SQLite + bytes float32).
+
+    'modelo' identifica o modelo, o backend e a quantização: vetores fp32/da API nunca
+    são reaproveitados em uma execução int8/local (e vice-versa).
+    """
+
+    def __init__(self, cache_dir: str, embed_fn, modelo: str, lote: int = 256):
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        self.embed_fn = embed_fn
+        self.modelo = modelo
+        self.lote = lote
+        self.reaproveitados = 0
+        self.calculados = 0
+        self._conn = sqlite3.connect(os.path.join(cache_dir, "embeddings.sqlite3"))
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, vetor BLOB)")
+
+    def embed(self, textos: list[str]) -> np.ndarray:
+        """Retorna a matriz de embeddings (float32), calculando apenas os textos ausentes do cache."""
+        hashes = [hashlib.sha1(f"{self.modelo}\0{t}".encode("utf-8")).hexdigest() for t in textos]
+        vetores: dict[str, np.ndarray] = {}
+        unicos = list(dict.fromkeys(hashes))
+        for i in range(0, len(unicos), 900):
+            parte = unicos[i:i + 900]
+            linhas = self._conn.execute(
+                f"SELECT hash, vetor FROM embeddings WHERE hash IN ({','.join('?' * len(parte))})", parte
+            ).fetchall()
+            vetores.update({h: np.frombuffer(v, dtype=np.float32) for h, v in linhas})
+        self.reaproveitados += len(vetores)
+
+        faltantes = [(h, t) for h, t in dict(zip(hashes, textos)).items() if h not in vetores]
+        for i in range(0, len(faltantes), self.lote):
+            parte = faltantes[i:i + self.lote]
+            novos = np.asarray(self.embed_fn([t for _, t in parte]), dtype=np.float32)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+                [(h, v.tobytes()) for (h, _), v in zip(parte, novos)]
+            )
+            vetores.update({h: v for (h, _), v in zip(parte, novos)})
+            self.calculados += len(parte)
+        self._conn.commit()
+        return np.stack([vetores[h] for h in hashes]) if hashes else np.zeros((0, 0), dtype=np.float32)
+
+
+# ——————————————————————————————
+def carregar_golden(caminho: str) -> list[dict]:
+    """Lê o golden set e normaliza 'fonte' para um conjunto de nomes de arquivo."""
+    if caminho.lower().endswith(".csv"):
+        with open(caminho, encoding="utf-8") as f:
+            itens = [
+                {"pergunta": linha["pergunta"], "fonte": linha["fonte"].split(";")}
+                for linha in csv.DictReader(f)
+            ]
+    else:
+        with open(caminho, encoding="utf-8") as f:
+            itens = json.load(f)
+    for item in itens:
+        fontes = item["fonte"] if isinstance(item["fonte"], list) else [item["fonte"]]
+        item["fonte"] = {f.strip() for f in fontes if f.strip()}
+    return itens
+
+
+def carregar_documentos(data_dir: str) -> dict[str, list[dict]]:
+    """Carrega (uma única vez) os documentos brutos de cada arquivo suportado."""
+    from loaders.pdf_loader import load_pdf
+    from loaders.csv_loader import load_csv
+    from loaders.txt_loader import load_txt
+
+    loaders = {".pdf": load_pdf, ".csv": load_csv, ".txt": load_txt}
+    brutos = {}
+    for file_path in sorted(Path(data_dir).iterdir()):
+        loader = loaders.get(file_path.suffix.lower())
+        if loader:
+            brutos[file_path.name] = loader(str(file_path))
+    return brutos
+
+
+def _normalizar(matriz: np.ndarray) -> np.ndarray:
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    return matriz / np.maximum(normas, 1e-12)
+
+
+# ——————————————————————————————
+def avaliar_configuracao(
+    golden: list[dict],
+    q_vetores: np.ndarray,
+    chunks: list[dict],
+    c_vetores: np.ndarray,
+    ks: list[int],
+    max_contexts: list[int]
+) -> list[dict]:
+    """
+    Avalia uma configuração de chunking para todos os valores de k e de MAX_CONTEXT_LENGTH.
+
+    Returns:
+        list[dict]: Uma linha de métricas por combinação (k, max_context).
+    """
+    from app_config.app_context import selecionar_documento
+    from app_config.prompt_builder import build_prompt, estimar_tokens
+
+    if not chunks or not golden:
+        return []
+    metadados = [c["metadata"] for c in chunks]
+    fontes = [m["source"] for m in metadados]
+    k_max = min(max(ks), len(chunks))
+    linhas = []
+
+    for k in ks:
+        k_efetivo = min(k, len(chunks))
+        for max_ctx in max_contexts:
+            acertos_recall = acertos_doc = 0
+            soma_rr = 0.0
+            tokens = []
+            latencias = []
+
+            for item, q in zip(golden, q_vetores):
+                inicio = time.perf_counter()
+                # Busca exata por similaridade cosseno e seleção como em get_context
+                distancias = 1.0 - c_vetores @ q
+                top = np.argpartition(distancias, k_max - 1)[:k_max]
+                top = top[np.argsort(distancias[top])][:k_efetivo]
+                doc, indices, _ = selecionar_documento([metadados[i] for i in top], distancias[top].tolist())
+                latencias.append(time.perf_counter() - inicio)
+
+                esperadas = item["fonte"]
+                fontes_top = [fontes[i] for i in top]
+                acertos_recall += any(f in esperadas for f in fontes_top)
+                rank = next((r for r, f in enumerate(fontes_top, 1) if f in esperadas), None)
+                soma_rr += 1.0 / rank if rank else 0.0
+                acertos_doc += doc in esperadas
+
+                contexto = "\n\n".join(chunks[top[i]]["text"] for i in indices)[:max_ctx]
+                tokens.append(estimar_tokens(build_prompt(item["pergunta"], contexto)))
+
+            n = len(golden)
+            latencias.sort()
+            linhas.append({
+                "k": k,
+                "max_context": max_ctx,
+                "recall_at_k": acertos_recall / n,
+                "mrr_at_k": soma_rr / n,
+                "acerto_documento": acertos_doc / n,
+                "prompt_tokens_medio": sum(tokens) / n,
+                "latencia_p50_ms": latencias[n // 2] * 1000,
+                "latencia_p95_ms": latencias[min(n - 1, int(0.95 * n))] * 1000
+            })
+    return linhas
+
+
+def assinatura_modelo() -> str:
+    """Modelo, backend e quantização dos embeddings configurados (chave do cache)."""
+    from store.chroma_store import embed_backend, model_name, embedding_fn
+    if embed_backend == "local":
+        from embeddings.embedder import EMBED_MODEL_PATH
+        return f"local:{EMBED_MODEL_PATH}:{embedding_fn.quantizacao}"
+    return f"{embed_backend}:{model_name}"
+
+
+def recomendar(linhas: list[dict], tolerancia: float) -> dict | None:
+    """Configuração com menos tokens de prompt cuja acurácia fica dentro da tolerância da melhor."""
+    if not linhas:
+        return None
+    melhor = max(linha["acerto_documento"] for linha in linhas)
+    aceitas = [linha for linha in linhas if linha["acerto_documento"] >= melhor - tolerancia]
+    return min(aceitas, key=lambda linha: (linha["prompt_tokens_medio"], linha["latencia_p50_ms"]))
+
+
+# ——————————————————————————————
+def main():
+    parser = argparse.ArgumentParser(description="Avaliação de recuperação: qualidade x custo")
+    parser.add_argument("--golden", required=True, help="Golden set (JSON ou CSV)")
+    parser.add_argument("--data-dir", default=os.getenv("DATA_DIR"), help="Pasta dos documentos")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[300, 500, 800])
+    parser.add_argument("--overlaps", type=int, nargs="+", default=[0, 50, 100])
+    parser.add_argument("--chunk-mode", choices=["chars", "tokens"], default="chars",
+                        help="Unidade de --chunk-sizes/--overlaps")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--max-context", type=int, nargs="+", default=[1000, 2000, 4000])
+    parser.add_argument("--tolerance", type=float, default=0.02, help="Perda de acurácia aceitável")
+    parser.add_argument("--output", default="eval_results.json")
+    args = parser.parse_args()
+
+    from retriever.retriever import chunk_documents
+    from store.chroma_store import embedding_fn
+
+    golden = carregar_golden(args.golden)
+    brutos = carregar_documentos(args.data_dir)
+    cache = EmbeddingCache(EVAL_CACHE_DIR, embedding_fn, assinatura_modelo())
+    q_vetores = _normalizar(cache.embed([item["pergunta"] for item in golden]))
+    print(f"📋 {len(golden)} perguntas, {len(brutos)} arquivos em {args.data_dir}")
+
+    linhas = []
+    for chunk_size, overlap in itertools.product(args.chunk_sizes, args.overlaps):
+        if overlap >= chunk_size:
+            continue
+        chunks = []
+        for nome, raw_docs in brutos.items():
+            for chunk in chunk_documents(raw_docs, chunk_size=chunk_size, chunk_overlap=overlap, modo=args.chunk_mode):
+                chunk["metadata"] = {**chunk.get("metadata", {}), "source": nome}
+                chunks.append(chunk)
+        if not chunks:
+            print(f"⚠️ size={chunk_size} overlap={overlap}: nenhum chunk gerado, configuração ignorada")
+            continue
+
+        c_vetores = _normalizar(cache.embed([c["text"] for c in chunks]))
+        for linha in avaliar_configuracao(golden, q_vetores, chunks, c_vetores, args.k, args.max_context):
+            linha.update({"chunk_size": chunk_size, "chunk_overlap": overlap, "chunks": len(chunks)})
+            linhas.append(linha)
+            print(
+                f"   size={chunk_size:<5} overlap={overlap:<4} k={linha['k']:<3} ctx={linha['max_context']:<5} "
+                f"recall={linha['recall_at_k']:.3f} mrr={linha['mrr_at_k']:.3f} "
+                f"doc={linha['acerto_documento']:.3f} tokens={linha['prompt_tokens_medio']:.0f} "
+                f"p50={linha['latencia_p50_ms']:.2f}ms"
+            )
+
+    sugestao = recomendar(linhas, args.tolerance)
+    resultado = {
+        "config": vars(args),
+        "embeddings": {"reaproveitados": cache.reaproveitados, "calculados": cache.calculados},
+        "resultados": linhas,
+        "recomendacao": sugestao
+    }
+    Path(args.output).write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    print(f"\n♻️  Embeddings reaproveitados: {cache.reaproveitados} | calculados: {cache.calculados}")
+    if sugestao:
+        print(
+            f"🏆 Sugestão: chunk_size={sugestao['chunk_size']} chunk_overlap={sugestao['chunk_overlap']} "
+            f"K_RESULTS={sugestao['k']} MAX_CONTEXT_LENGTH={sugestao['max_context']} "
+            f"(acerto={sugestao['acerto_documento']:.3f}, tokens={sugestao['prompt_tokens_medio']:.0f})"
+        )
+    print(f"✅ Resultados gravados em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+benchmarks/mock_ollama.py
+
+Servidor HTTP que imita a rota /api/generate do Ollama para benchmarks ponta a ponta:
+- Responde com streaming (NDJSON) ou corpo único, como o Ollama real
+- Gera tokens a uma taxa configurável (tokens/s) após um tempo de prefill proporcional ao prompt
+- Preenche prompt_eval_count, eval_count e os campos *_duration (ns) usados pelas métricas
+
+Uso:
+    python -m benchmarks.mock_ollama --port 11435 --token-rate 20
+"""
+
+# ——————————————————————————————
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# ——————————————————————————————
+def criar_servidor(
+    porta: int,
+    token_rate: float = 20.0,
+    tokens_resposta: int = 64,
+    prefill_rate: float = 500.0,
+    host: str = "127.0.0.1"
+) -> ThreadingHTTPServer:
+    """
+    Cria (sem iniciar) o servidor mock do Ollama.
+
+    Args:
+        porta (int): Porta TCP.
+        token_rate (float): Tokens gerados por segundo.
+        tokens_resposta (int): Quantidade de tokens de cada resposta.
+        prefill_rate (float): Tokens de prompt processados por segundo (define o tempo até o 1º token).
+        host (str): Endereço de escuta.
+    """
+
+    class MockOllamaHandler(BaseHTTPRequestHandler):
+
+        def do_POST(self):
+            if self.path != "/api/generate":
+                self.send_error(404)
+                return
+            dados = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            # Aproximação de tokens do prompt: ~4 caracteres por token
+            prompt_tokens = max(1, len(dados.get("prompt", "")) // 4)
+            prefill = prompt_tokens / prefill_rate
+            geracao = tokens_resposta / token_rate
+
+            final = {
+                "model": dados.get("model"),
+                "done": True,
+                "prompt_eval_count": prompt_tokens,
+                "prompt_eval_duration": int(prefill * 1e9),
+                "load_duration": 0,
+                "eval_count": tokens_resposta,
+                "eval_duration": int(geracao * 1e9)
+            }
+
+            time.sleep(prefill)
+            if dados.get("stream", True):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+                for i in range(tokens_resposta):
+                    time.sleep(1 / token_rate)
+                    linha = {"model": dados.get("model"), "response": f"tok{i} ", "done": False}
+                    self.wfile.write(json.dumps(linha).encode() + b"\n")
+                    self.wfile.flush()
+                self.wfile.write(json.dumps({**final, "response": ""}).encode() + b"\n")
+            else:
+                time.sleep(geracao)
+                corpo = json.dumps({
+                    **final,
+                    "response": " ".join(f"tok{i}" for i in range(tokens_resposta))
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, porta), MockOllamaHandler)
+    server.daemon_threads = True
+    return server
+
+
+def iniciar_em_thread(porta: int, **kwargs) -> ThreadingHTTPServer:
+    """Inicia o servidor mock em uma thread daemon e o retorna."""
+    server = criar_servidor(porta, **kwargs)
+    threading.Thread(target=server.serve_forever, name="mock-ollama", daemon=True).start()
+    return server
+
+
+# ——————————————————————————————
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock da API /api/generate do Ollama")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--token-rate", type=float, default=20.0, help="Tokens gerados por segundo")
+    parser.add_argument("--tokens", type=int, default=64, help="Tokens por resposta")
+    parser.add_argument("--prefill-rate", type=float, default=500.0, help="Tokens de prompt por segundo")
+    args = parser.parse_args()
+
+    server = criar_servidor(args.port, args.token_rate, args.tokens, args.prefill_rate)
+    print(f"🧪 Mock do Ollama em http://127.0.0.1:{args.port}/api/generate ({args.token_rate} tokens/s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,233 @@
+"""
+benchmarks/run.py
+
+Benchmark offline de escalabilidade do Chatbot Documental, incluindo:
+- Ingestão por etapa (loader, chunking, embedding + upsert) com vazão em MB/s e chunks/s
+- Tamanho do índice em disco (pasta do Chroma) e memória residente (RSS) do processo
+- Latência p50/p95/p99 de 'get_context' para vários valores de k
+- Latência ponta a ponta (contexto + prompt + LLM) contra um mock do Ollama com taxa de tokens configurável
+- Resultados em JSON, para comparação entre commits com benchmarks/compare.py
+
+O benchmark usa uma pasta temporária do Chroma e o mock do Ollama, sem tocar nos dados reais.
+
+Uso:
+    python -m benchmarks.run --size 10MB --k 1 3 5 10 --output resultados.json
+    python -m benchmarks.run --corpus /caminho/corpus --output resultados.json
+"""
+
+# ——————————————————————————————
+import os
+import sys
+import json
+import time
+import shutil
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+from pathlib import Path
+
+from metrics.medicao import tamanho_pasta, percentis
+
+
+# ——————————————————————————————
+def rss_bytes() -> int:
+    """Memória residente atual do processo (Linux: /proc; demais: pico via getrusage)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        try:
+            import resource
+        except ImportError:  # Windows
+            return 0
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico if sys.platform == "darwin" else pico * 1024
+
+
+def commit_atual() -> str | None:
+    """Hash do commit atual do repositório, se disponível."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+# ——————————————————————————————
+def medir_ingestao(corpus: str) -> dict:
+    """
+    Ingere todos os arquivos do corpus medindo cada etapa separadamente.
+
+    Returns:
+        dict: Tempos, bytes e chunks por etapa e por tipo de arquivo.
+    """
+    # Mesmas etapas por arquivo do pipeline.py (loader, chunking + ids/metadados, indexação)
+    from pipeline import LOADERS, carregar_arquivo, preparar_chunks, indexar_chunks
+
+    etapas = {"loader": 0.0, "chunking": 0.0, "embedding_upsert": 0.0}
+    por_tipo = {}
+    total_bytes = 0
+    total_chunks = 0
+
+    for file_path in sorted(Path(corpus).iterdir()):
+        suffix = file_path.suffix.lower()
+        if suffix not in LOADERS:
+            continue
+        tamanho = file_path.stat().st_size
+
+        inicio = time.perf_counter()
+        raw_docs = carregar_arquivo(file_path)
+        t_loader = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        chunks = preparar_chunks(file_path, raw_docs)
+        t_chunk = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        indexar_chunks(chunks, [])
+        t_upsert = time.perf_counter() - inicio
+
+        etapas["loader"] += t_loader
+        etapas["chunking"] += t_chunk
+        etapas["embedding_upsert"] += t_upsert
+        tipo = por_tipo.setdefault(suffix, {"arquivos": 0, "bytes": 0, "chunks": 0, "segundos": 0.0})
+        tipo["arquivos"] += 1
+        tipo["bytes"] += tamanho
+        tipo["chunks"] += len(chunks)
+        tipo["segundos"] += t_loader + t_chunk + t_upsert
+        total_bytes += tamanho
+        total_chunks += len(chunks)
+        print(f"   📂 {file_path.name}: {len(chunks)} chunks em {t_loader + t_chunk + t_upsert:.2f}s")
+
+    mb = total_bytes / 1024 ** 2
+    return {
+        "bytes": total_bytes,
+        "chunks": total_chunks,
+        "segundos_por_etapa": etapas,
+        "mb_por_segundo": {e: (mb / s if s else None) for e, s in etapas.items()},
+        "chunks_por_segundo": {e: (total_chunks / s if s else None) for e, s in etapas.items()},
+        "por_tipo": por_tipo
+    }
+
+
+def medir_consultas(perguntas: list[str], ks: list[int]) -> dict:
+    """Mede a latência de 'get_context' para cada k."""
+    from app_config.app_context import get_context
+
+    # Aquecimento: carrega o índice HNSW e o modelo antes de medir
+    get_context(perguntas[0], k=max(ks))
+
+    resultados = {}
+    for k in ks:
+        amostras = []
+        for pergunta in perguntas:
+            inicio = time.perf_counter()
+            get_context(pergunta, k=k)
+            amostras.append(time.perf_counter() - inicio)
+        resultados[str(k)] = percentis(amostras)
+        print(f"   🔎 k={k}: p50={resultados[str(k)]['p50_ms']:.1f}ms p99={resultados[str(k)]['p99_ms']:.1f}ms")
+    return resultados
+
+
+def medir_ponta_a_ponta(perguntas: list[str], k: int) -> dict:
+    """Mede contexto + prompt + geração (contra o mock do Ollama), sem cache de respostas."""
+    from app_config.app_context import get_context
+    from app_config.prompt_builder import build_prompt
+    from llm.llm import obter_resposta_llama
+
+    amostras = []
+    for pergunta in perguntas:
+        inicio = time.perf_counter()
+        contexto, _, _ = get_context(pergunta, k=k)
+        prompt = build_prompt(pergunta, contexto)
+        obter_resposta_llama(pergunta=prompt, contexto="", usar_cache=False)
+        amostras.append(time.perf_counter() - inicio)
+    return percentis(amostras)
+
+
+# ——————————————————————————————
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline de escalabilidade do chatbot")
+    parser.add_argument("--corpus", help="Pasta com um corpus existente (senão, gera um sintético)")
+    parser.add_argument("--size", default="10MB", help="Tamanho do corpus sintético (ex.: 10MB, 1GB, 10GB)")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10], help="Valores de k para get_context")
+    parser.add_argument("--queries", type=int, default=200, help="Consultas por valor de k")
+    parser.add_argument("--e2e-queries", type=int, default=20, help="Consultas ponta a ponta (0 desativa)")
+    parser.add_argument("--token-rate", type=float, default=20.0, help="Tokens/s do mock do Ollama")
+    parser.add_argument("--mock-port", type=int, default=11435)
+    parser.add_argument("--workdir", help="Pasta de trabalho (padrão: temporária, removida ao final)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="chatbot_bench_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    # Isola o benchmark: Chroma, cache de respostas e Ollama apontam para recursos descartáveis.
+    # Precisa ocorrer antes de importar os módulos do projeto, que leem o ambiente na importação.
+    os.environ["CHROMA_PERSIST_DIR"] = str(workdir / "chroma")
+    os.environ["LLM_CACHE_DIR"] = str(workdir / "llm_cache")
+    os.environ["OLLAMA_URL"] = f"http://127.0.0.1:{args.mock_port}/api/generate"
+
+    from benchmarks.corpus import GeradorTexto, gerar_corpus, parse_tamanho
+    from benchmarks.mock_ollama import iniciar_em_thread
+
+    corpus = args.corpus
+    resumo_corpus = None
+    if not corpus:
+        corpus = str(workdir / "corpus")
+        print(f"🧪 Gerando corpus sintético de {args.size} em {corpus}...")
+        resumo_corpus = gerar_corpus(corpus, parse_tamanho(args.size), seed=args.seed)
+
+    resultados = {
+        "commit": commit_atual(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "config": vars(args),
+        "corpus": resumo_corpus or {"pasta": corpus}
+    }
+
+    rss_inicial = rss_bytes()
+    print("📥 Medindo ingestão...")
+    resultados["ingestao"] = medir_ingestao(corpus)
+    rss_pos_ingestao = rss_bytes()
+
+    gerador = GeradorTexto(args.seed + 1)
+    perguntas = [gerador.pergunta() for _ in range(args.queries)]
+
+    print("🔎 Medindo consultas...")
+    resultados["consultas"] = medir_consultas(perguntas, args.k)
+    rss_pos_consultas = rss_bytes()
+
+    resultados["indice"] = {
+        "disco_bytes": tamanho_pasta(os.environ["CHROMA_PERSIST_DIR"]),
+        "rss_inicial_bytes": rss_inicial,
+        "rss_pos_ingestao_bytes": rss_pos_ingestao,
+        "rss_pos_consultas_bytes": rss_pos_consultas
+    }
+
+    if args.e2e_queries > 0:
+        print(f"🤖 Medindo ponta a ponta (mock do Ollama a {args.token_rate} tokens/s)...")
+        mock = iniciar_em_thread(args.mock_port, token_rate=args.token_rate)
+        try:
+            k_e2e = args.k[len(args.k) // 2]
+            resultados["ponta_a_ponta"] = {
+                "k": k_e2e,
+                **medir_ponta_a_ponta(random.Random(args.seed).sample(perguntas, min(args.e2e_queries, len(perguntas))), k_e2e)
+            }
+        finally:
+            mock.shutdown()
+
+    Path(args.output).write_text(json.dumps(resultados, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"✅ Resultados gravados em {args.output}")
+
+    if not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+embeddings/batcher.py
+
+Micro-batching de embeddings de consulta, incluindo:
+- Fila compartilhada por todas as threads que precisam embutir uma pergunta
+- Thread coletora que agrupa pedidos por até 'max_wait_ms' ou 'max_batch' itens
+- Uma única chamada à função de embedding por lote, com devolução do vetor a cada chamador
+- Métricas de tamanho de lote e de tempo de espera na fila
+"""
+
+# ——————————————————————————————
+import time
+import queue
+import threading
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Callable, Sequence
+
+
+# ——————————————————————————————
+class QueryEmbeddingBatcher:
+    """
+    Agrupa pedidos concorrentes de embedding em lotes.
+
+    Sob carga (várias sessões do Streamlit e chats do Telegram ao mesmo tempo),
+    os pedidos que chegam dentro da janela 'max_wait_ms' são codificados em um
+    único forward pass do modelo; sem concorrência, o atraso extra é limitado
+    a essa janela.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[list[str]], Sequence],
+        max_batch: int = 32,
+        max_wait_ms: float = 5.0,
+        amostras_metricas: int = 1000
+    ):
+        """
+        Args:
+            embed_fn (Callable): Função que recebe uma lista de textos e devolve seus vetores.
+            max_batch (int): Número máximo de textos por lote.
+            max_wait_ms (float): Tempo máximo (ms) de espera para completar um lote.
+            amostras_metricas (int): Quantidade de tempos de espera recentes mantidos para percentis.
+        """
+        self.embed_fn = embed_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._fila: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._tamanhos_lote = Counter()
+        self._esperas = deque(maxlen=amostras_metricas)
+        self._total_textos = 0
+
+        self._thread = threading.Thread(target=self._loop, name="query-embed-batcher", daemon=True)
+        self._thread.start()
+
+    def embed(self, texto: str, timeout: float | None = None) -> list[float]:
+        """
+        Retorna o embedding de um texto, aguardando o lote em que ele for processado.
+
+        Args:
+            texto (str): Texto da consulta.
+            timeout (float | None): Tempo máximo de espera, em segundos.
+
+        Returns:
+            list[float]: Vetor de embedding do texto.
+        """
+        futuro = Future()
+        self._fila.put((texto, futuro, time.perf_counter()))
+        return futuro.result(timeout=timeout)
+
+    @staticmethod
+    def _validar(vetores, esperados: int) -> list[list[float]]:
+        """
+        Confere se a função de embedding devolveu um vetor numérico por pedido.
+
+        A API do Hugging Face pode responder com um dict de erro (ex.: {"error": ...,
+        "estimated_time": ...} enquanto o modelo carrega); sem esta checagem, as chaves
+        do dict seriam entregues como "vetores" e os demais pedidos nunca seriam resolvidos.
+
+        Raises:
+            ValueError: Se a resposta não for uma lista com 'esperados' vetores.
+        """
+        if isinstance(vetores, dict):
+            raise ValueError(f"Resposta inválida da função de embedding: {vetores.get('error', vetores)}")
+        try:
+            vetores = [[float(x) for x in vetor] for vetor in vetores]
+        except (TypeError, ValueError) as error:
+            raise ValueError(f"Resposta inválida da função de embedding: {error}") from error
+        if len(vetores) != esperados or any(not vetor for vetor in vetores):
+            raise ValueError(f"Função de embedding devolveu {len(vetores)} vetores para {esperados} textos")
+        return vetores
+
+    def _loop(self) -> None:
+        """Coleta pedidos da fila, forma lotes e despacha os vetores."""
+        while True:
+            # Bloqueia até o primeiro pedido; a janela do lote começa nele
+            pedidos = [self._fila.get()]
+            prazo = time.perf_counter() + self.max_wait
+            while len(pedidos) < self.max_batch:
+                restante = prazo - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    pedidos.append(self._fila.get(timeout=restante))
+                except queue.Empty:
+                    break
+
+            inicio = time.perf_counter()
+            try:
+                vetores = self._validar(self.embed_fn([texto for texto, _, _ in pedidos]), len(pedidos))
+                for (_, futuro, _), vetor in zip(pedidos, vetores):
+                    futuro.set_result(vetor)
+            except Exception as error:
+                for _, futuro, _ in pedidos:
+                    futuro.set_exception(error)
+
+            with self._lock:
+                self._tamanhos_lote[len(pedidos)] += 1
+                self._total_textos += len(pedidos)
+                self._esperas.extend(inicio - enfileirado for _, _, enfileirado in pedidos)
+
+    def metrics(self) -> dict:
+        """
+        Retorna métricas acumuladas do micro-batching.
+
+        Returns:
+            dict: {'lotes', 'textos', 'lote_medio', 'lotes_por_tamanho',
+                   'espera_media_ms', 'espera_p95_ms', 'espera_max_ms'}
+        """
+        with self._lock:
+            lotes = sum(self._tamanhos_lote.values())
+            esperas = sorted(self._esperas)
+            tamanhos = dict(sorted(self._tamanhos_lote.items()))
+            textos = self._total_textos
+
+        def ms(valor: float) -> float:
+            return round(valor * 1000, 3)
+
+        return {
+            "lotes": lotes,
+            "textos": textos,
+            "lote_medio": textos / lotes if lotes else 0.0,
+            "lotes_por_tamanho": tamanhos,
+            "espera_media_ms": ms(sum(esperas) / len(esperas)) if esperas else 0.0,
+            "espera_p95_ms": ms(esperas[int(0.95 * (len(esperas) - 1))]) if esperas else 0.0,
+            "espera_max_ms": ms(esperas[-1]) if esperas else 0.0
+        }
@@ -2,34 +2,103 @@
 embeddings/embedder.py
 
 Módulo responsável por gerar embeddings a partir de textos usando o SentenceTransformer.
+
+O modelo roda localmente na CPU (EMBED_DEVICE) e pode usar quantização dinâmica
+int8 das camadas lineares (EMBED_QUANTIZE=int8), que acelera a inferência em
+hosts sem GPU com perda mínima de qualidade (ver benchmarks/embedding_parity.py).
+Com EMBED_OFFLINE=1, o modelo é carregado apenas de arquivos locais (pasta em
+EMBED_MODEL_PATH ou cache do Hugging Face), sem acesso à rede.
 """
 
 # ——————————————————————————————
+import os
+from functools import lru_cache
+
 from numpy import ndarray
+from dotenv import load_dotenv
+
+# ——————————————————————————————
+# Configuração do modelo local
+load_dotenv()
+EMBED_MODEL_PATH = os.getenv("EMBED_MODEL_PATH", "all-MiniLM-L6-v2")
+EMBED_QUANTIZE = os.getenv("EMBED_QUANTIZE", "none")
+EMBED_DEVICE = os.getenv("EMBED_DEVICE", "cpu")
+EMBED_OFFLINE = os.getenv("EMBED_OFFLINE", "0") == "1"
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 64))
+
+if EMBED_OFFLINE:
+    # Impede qualquer tentativa de download; lido pelo huggingface_hub na importação
+    os.environ["HF_HUB_OFFLINE"] = "1"
+    os.environ["TRANSFORMERS_OFFLINE"] = "1"
+
 from sentence_transformers import SentenceTransformer
 
-# Inicializa o modelo de embeddings all-MiniLM-L6-v2
-_model = SentenceTransformer("all-MiniLM-L6-v2")
+
+# ——————————————————————————————
+@lru_cache(maxsize=2)
+def carregar_modelo(quantizacao: str = EMBED_QUANTIZE) -> SentenceTransformer:
+    """
+    Carrega (uma única vez por modo) o modelo de embeddings.
+
+    Args:
+        quantizacao (str): "none" (fp32) ou "int8" (quantização dinâmica das
+                           camadas nn.Linear, apenas em CPU).
+
+    Returns:
+        SentenceTransformer: Modelo pronto para 'encode'.
+    """
+    model = SentenceTransformer(EMBED_MODEL_PATH, device=EMBED_DEVICE, local_files_only=EMBED_OFFLINE)
+
+    if quantizacao == "int8":
+        import torch
+
+        # Pesos das camadas lineares em int8; ativações quantizadas em tempo de execução
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif quantizacao != "none":
+        raise ValueError(f"EMBED_QUANTIZE inválido: {quantizacao!r} (use 'none' ou 'int8')")
+
+    model.eval()
+    return model
 
 
 # ——————————————————————————————
-def embed_texts(texts: list[str]) -> ndarray:
+def embed_texts(texts: list[str], quantizacao: str = EMBED_QUANTIZE, show_progress_bar: bool = True) -> ndarray:
     """
     Converte uma lista de textos em embeddings numéricos.
 
     Args:
         texts (list[str]): Lista de strings a serem transformadas em embeddings.
+        quantizacao (str): Modo de inferência ("none" ou "int8"; padrão: EMBED_QUANTIZE).
+        show_progress_bar (bool): Exibe a barra de progresso do SentenceTransformer.
 
     Returns:
         list[list[float]]: Lista de vetores de embeddings correspondentes a cada texto de entrada.
     """
-    embeddings = _model.encode(texts, show_progress_bar=True)
+    embeddings = carregar_modelo(quantizacao).encode(
+        texts,
+        batch_size=EMBED_BATCH_SIZE,
+        show_progress_bar=show_progress_bar
+    )
     return embeddings
 
 
+# ——————————————————————————————
+class LocalEmbeddingFunction:
+    """
+    Função de embedding compatível com o ChromaDB que usa o modelo local
+    (fp32 ou int8) em vez da API de inferência do Hugging Face.
+    """
+
+    def __init__(self, quantizacao: str = EMBED_QUANTIZE):
+        self.quantizacao = quantizacao
+
+    def __call__(self, input: list[str]) -> list[list[float]]:
+        return embed_texts(list(input), self.quantizacao, show_progress_bar=False).tolist()
+
+
 # ——————————————————————————————
 if __name__ == "__main__":
     # Teste rápido da função embed_texts
     samples = ["Texto de exemplo para embedding.", "Outro pedaço de texto."]
     embs = embed_texts(samples)
-    print(f"✅ Gerados {len(embs)} embeddings, dimensão do primeiro: {len(embs[0])}")
+    print(f"✅ Gerados {len(embs)} embeddings ({EMBED_QUANTIZE}), dimensão do primeiro: {len(embs[0])}")
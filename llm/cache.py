@@ -0,0 +1,205 @@
+"""
+llm/cache.py
+
+Cache persistente (em disco) de respostas do LLM, incluindo:
+- Chave determinística: hash SHA-256 de modelo, prompt completo e opções de geração
+- Armazenamento em SQLite (biblioteca padrão), seguro para múltiplas threads e processos
+- Despejo LRU limitado por número de entradas e por tamanho total em bytes
+- Contadores de acertos (hits) e falhas (misses) para acompanhamento
+"""
+
+# ——————————————————————————————
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+
+
+# ——————————————————————————————
+def gerar_chave(modelo: str, prompt: str, options: dict) -> str:
+    """
+    Gera a chave do cache a partir do modelo, do prompt completo e das opções.
+
+    As opções são serializadas com chaves ordenadas, de modo que dicionários
+    equivalentes produzam sempre a mesma chave.
+
+    Args:
+        modelo (str): Nome do modelo (ex.: "gemma3:1b").
+        prompt (str): Prompt completo enviado ao modelo.
+        options (dict): Parâmetros de geração.
+
+    Returns:
+        str: Hash SHA-256 em hexadecimal.
+    """
+    conteudo = json.dumps(
+        {"model": modelo, "prompt": prompt, "options": options},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+# ——————————————————————————————
+def opcoes_deterministicas(options: dict) -> bool:
+    """
+    Indica se as opções de geração produzem saídas reprodutíveis.
+
+    Considera determinística a combinação de temperatura 0 com semente fixa
+    ('seed'), situação em que o Ollama devolve sempre o mesmo texto.
+
+    Args:
+        options (dict): Parâmetros de geração.
+
+    Returns:
+        bool: True se a resposta pode ser reaproveitada com segurança.
+    """
+    return options.get("temperature") == 0 and options.get("seed") is not None
+
+
+# ——————————————————————————————
+class ResponseCache:
+    """
+    Cache LRU de respostas do LLM persistido em um arquivo SQLite.
+
+    Cada entrada guarda a resposta, seu tamanho e o instante do último acesso;
+    ao ultrapassar 'max_entries' ou 'max_bytes', as entradas acessadas há mais
+    tempo são removidas primeiro.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = 10000, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            cache_dir (str): Pasta onde o arquivo 'respostas.sqlite3' será criado.
+            max_entries (int): Número máximo de respostas armazenadas.
+            max_bytes (int): Tamanho máximo somado das respostas, em bytes.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            os.path.join(cache_dir, "respostas.sqlite3"),
+            check_same_thread=False,
+            timeout=30
+        )
+        # WAL permite leituras concorrentes enquanto outro processo grava
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS respostas (
+                chave TEXT PRIMARY KEY,
+                modelo TEXT NOT NULL,
+                resposta TEXT NOT NULL,
+                tamanho INTEGER NOT NULL,
+                criado_em REAL NOT NULL,
+                acessado_em REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_respostas_acesso ON respostas (acessado_em)"
+        )
+        self._conn.commit()
+
+    def get(self, chave: str) -> str | None:
+        """
+        Busca uma resposta pela chave, atualizando seu instante de acesso.
+
+        Returns:
+            str | None: Resposta armazenada ou None se não houver entrada.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT resposta FROM respostas WHERE chave = ?", (chave,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE respostas SET acessado_em = ? WHERE chave = ?",
+                (time.time(), chave)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, chave: str, modelo: str, resposta: str) -> None:
+        """
+        Armazena (ou substitui) uma resposta e aplica o despejo LRU.
+        """
+        agora = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?, ?)",
+                (chave, modelo, resposta, len(resposta.encode("utf-8")), agora, agora)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Remove as entradas menos recentemente usadas até respeitar os limites."""
+        total, tamanho = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM respostas"
+        ).fetchone()
+
+        # Excesso de entradas: remove as mais antigas de uma só vez
+        excesso = total - self.max_entries
+        if excesso > 0:
+            self._conn.execute(
+                "DELETE FROM respostas WHERE chave IN ("
+                "SELECT chave FROM respostas ORDER BY acessado_em LIMIT ?)",
+                (excesso,)
+            )
+            tamanho = self._conn.execute(
+                "SELECT COALESCE(SUM(tamanho), 0) FROM respostas"
+            ).fetchone()[0]
+
+        # Excesso de bytes: remove em lotes até caber no limite
+        while tamanho > self.max_bytes:
+            antigas = self._conn.execute(
+                "SELECT chave, tamanho FROM respostas ORDER BY acessado_em LIMIT 100"
+            ).fetchall()
+            if not antigas:
+                break
+            remover = []
+            for chave, t in antigas:
+                remover.append((chave,))
+                tamanho -= t
+                if tamanho <= self.max_bytes:
+                    break
+            self._conn.executemany("DELETE FROM respostas WHERE chave = ?", remover)
+
+    def clear(self) -> None:
+        """Remove todas as entradas e zera os contadores."""
+        with self._lock:
+            self._conn.execute("DELETE FROM respostas")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Retorna estatísticas de uso do cache.
+
+        Returns:
+            dict: {'hits', 'misses', 'hit_rate', 'entradas', 'bytes'}
+        """
+        with self._lock:
+            entradas, tamanho = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM respostas"
+            ).fetchone()
+        consultas = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / consultas if consultas else 0.0,
+            "entradas": entradas,
+            "bytes": tamanho
+        }
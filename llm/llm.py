@@ -3,13 +3,26 @@ llm/llm.py
 
 Módulo responsável por interagir com o serviço Ollama para gerar respostas
 do modelo local Gemma.3, montando prompts com contexto recuperado.
+
+Respostas geradas com opções determinísticas (temperatura 0 e 'seed' fixa),
+ou com LLM_CACHE_FORCE=1, são reaproveitadas a partir de um cache em disco.
+As conversas usam DEFAULT_OPTIONS (temperatura 0.7), portanto o cache é opcional
+para elas; os caminhos de reprodução (ex.: warm.py, respostas pré-computadas)
+usam DETERMINISTIC_OPTIONS e sempre passam pelo cache.
 """
 
 # ——————————————————————————————
 import os
+import json
+import time
+from typing import Iterator
+
 import requests
 from dotenv import load_dotenv
 
+from llm.cache import ResponseCache, gerar_chave, opcoes_deterministicas
+from metrics.instrumentation import registry, registrar_tempo, span
+
 # ——————————————————————————————
 # Carrega variáveis de ambiente do arquivo .env
 load_dotenv()
@@ -26,15 +39,165 @@ DEFAULT_OPTIONS = {
     "top_p": 0.9,
     "num_ctx": 4096
 }
+# Opções reprodutíveis (temperatura 0 e semente fixa), cacheáveis sem LLM_CACHE_FORCE
+DETERMINISTIC_OPTIONS = {
+    **DEFAULT_OPTIONS,
+    "temperature": 0,
+    "seed": int(os.getenv("LLM_SEED", 42))
+}
+
+# ——————————————————————————————
+# Cache persistente de respostas (usado apenas com opções determinísticas ou se forçado)
+LLM_CACHE_FORCE = os.getenv("LLM_CACHE_FORCE", "0") == "1"
+response_cache = ResponseCache(
+    cache_dir=os.getenv("LLM_CACHE_DIR", ".cache/llm"),
+    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", 10000)),
+    max_bytes=int(os.getenv("LLM_CACHE_MAX_MB", 256)) * 1024 * 1024
+)
+_cache_hits = registry.counter("llm_cache_hits_total", "Acertos do cache de respostas")
+_cache_misses = registry.counter("llm_cache_misses_total", "Falhas do cache de respostas")
 
 
 # ——————————————————————————————
+def _montar_prompt(pergunta: str, contexto: str) -> str:
+    """Monta o prompt com contexto e instruções específicas enviado ao Ollama."""
+    return f"""Você é um assistente especializado que responde perguntas com base no contexto fornecido.
+
+
+Contexto:
+{contexto}
+
+Pergunta: {pergunta}
+
+Instruções:
+1. Responda de forma clara e detalhada, procure elaborar bem as respsotas.
+2. Baseie sua resposta estritamente no contexto fornecido.
+3. Se a resposta estiver no contexto, diga informe de qual arquivo foi tirado.
+4. Use português claro e formal.
+
+Resposta:"""
+
+
+def _registrar_metricas_ollama(data: dict, ttft: float | None = None) -> None:
+    """
+    Registra tempos e contagens de tokens informados pelo Ollama na resposta final.
+
+    Args:
+        data (dict): JSON final do Ollama (campos *_count em tokens, *_duration em ns).
+        ttft (float | None): Tempo até o primeiro token medido no cliente (streaming);
+            se None, é estimado por load_duration + prompt_eval_duration.
+    """
+    prompt_tokens = data.get("prompt_eval_count") or 0
+    gerados = data.get("eval_count") or 0
+    geracao = (data.get("eval_duration") or 0) / 1e9
+
+    if ttft is None and "prompt_eval_duration" in data:
+        ttft = ((data.get("load_duration") or 0) + data["prompt_eval_duration"]) / 1e9
+    if ttft is not None:
+        registrar_tempo("llm.time_to_first_token", ttft)
+    if geracao > 0:
+        registrar_tempo("llm.generation", geracao)
+        registry.histogram(
+            "llm_tokens_per_second", "Velocidade de geração do LLM, em tokens por segundo"
+        ).record(gerados / geracao)
+
+    registry.counter("llm_prompt_tokens_total", "Tokens de prompt processados pelo LLM").inc(prompt_tokens)
+    registry.counter("llm_generated_tokens_total", "Tokens gerados pelo LLM").inc(gerados)
+
+
+def _consultar_cache(chave: str) -> str | None:
+    """Resposta em cache (ou None), contabilizando acertos e falhas."""
+    cached = response_cache.get(chave)
+    (_cache_hits if cached is not None else _cache_misses).inc()
+    return cached
+
+
+def _chave_cache(modelo: str, prompt: str, options: dict, usar_cache: bool | None) -> str | None:
+    """Retorna a chave do cache quando ele se aplica à chamada, ou None."""
+    if usar_cache is None:
+        usar_cache = LLM_CACHE_FORCE or opcoes_deterministicas(options)
+    return gerar_chave(modelo, prompt, options) if usar_cache else None
+
+
+# ——————————————————————————————
+class RespostaVaziaError(RuntimeError):
+    """O Ollama respondeu sem texto."""
+
+
+def _gerar(prompt: str, modelo: str, options: dict, timeout: int, usar_cache: bool | None) -> str:
+    """
+    Envia um prompt pronto ao Ollama (consultando e alimentando o cache de respostas).
+
+    Raises:
+        requests.exceptions.RequestException: Falha de conexão, timeout ou status HTTP de erro.
+        RespostaVaziaError: Se o modelo não devolver texto.
+    """
+    # Consulta o cache antes de acionar o modelo
+    chave = _chave_cache(modelo, prompt, options, usar_cache)
+    if chave is not None:
+        cached = _consultar_cache(chave)
+        if cached is not None:
+            return cached
+
+    payload = {
+        "model": modelo,
+        "prompt": prompt,
+        "stream": False,
+        "options": options
+    }
+
+    with span("llm.request"):
+        response = requests.post(OLLAMA_URL, json=payload, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+    _registrar_metricas_ollama(data)
+
+    # A API do Ollama pode retornar 'response' ou listar em 'choices'
+    resposta = data.get("response") \
+        or (data.get("choices", [{}])[0]
+               .get("message", {}).get("content"))
+    if not resposta:
+        raise RespostaVaziaError("Resposta vazia do modelo")
+
+    # Apenas respostas válidas são armazenadas no cache
+    if chave is not None:
+        response_cache.put(chave, modelo, resposta)
+    return resposta
+
+
+# ——————————————————————————————
+def gerar_texto(
+    prompt: str,
+    modelo: str = OLLAMA_MODEL,
+    options: dict | None = None,
+    timeout: int = 60,
+    usar_cache: bool | None = None
+) -> str:
+    """
+    Gera texto a partir de um prompt livre, sem o template de perguntas com contexto
+    (ex.: resumo da conversa, que não deve ser respondido "apenas com base no contexto").
+
+    Args:
+        prompt (str): Prompt completo enviado ao modelo.
+        modelo, options, timeout, usar_cache: Os mesmos de 'obter_resposta_llama'.
+
+    Returns:
+        str: Texto gerado pelo modelo.
+
+    Raises:
+        requests.exceptions.RequestException: Falha de conexão, timeout ou status HTTP de erro.
+        RespostaVaziaError: Se o modelo não devolver texto.
+    """
+    return _gerar(prompt, modelo, options if options is not None else DEFAULT_OPTIONS, timeout, usar_cache)
+
+
 def obter_resposta_llama(
     pergunta: str,
     contexto: str,
     modelo: str = OLLAMA_MODEL,
     options: dict | None = None,
-    timeout: int = 60
+    timeout: int = 60,
+    usar_cache: bool | None = None
 ) -> str:
     """
     Obtém resposta do modelo LLaMA/Gemma3 via Ollama HTTP API.
@@ -48,6 +211,8 @@ def obter_resposta_llama(
         modelo (str): Nome do modelo a ser utilizado (ex.: "gemma3:1b").
         options (dict | None): Parâmetros de geração (temperature, top_p, num_ctx).
         timeout (int): Tempo máximo de espera pela resposta, em segundos.
+        usar_cache (bool | None): Força (True) ou desativa (False) o cache de
+            respostas; None decide pelas opções e por LLM_CACHE_FORCE.
 
     Returns:
         str: Texto retornado pelo modelo ou mensagem de erro.
@@ -56,46 +221,92 @@ def obter_resposta_llama(
     if options is None:
         options = DEFAULT_OPTIONS
 
-    # Monta prompt com contexto e instruções específicas
-    prompt = f"""Você é um assistente especializado que responde perguntas com base no contexto fornecido.
+    try:
+        return _gerar(_montar_prompt(pergunta, contexto), modelo, options, timeout, usar_cache)
 
+    except requests.exceptions.Timeout:
+        return "Erro: Tempo esgotado ao consultar o modelo"
 
-Contexto:
-{contexto}
+    except RespostaVaziaError:
+        return "Erro: Resposta vazia do modelo"
 
-Pergunta: {pergunta}
+    except Exception as error:
+        return f"Erro ao conectar com o modelo: {error}"
 
-Instruções:
-1. Responda de forma clara e detalhada, procure elaborar bem as respsotas.
-2. Baseie sua resposta estritamente no contexto fornecido.
-3. Se a resposta estiver no contexto, diga informe de qual arquivo foi tirado.
-4. Use português claro e formal.
 
-Resposta:"""
+# ——————————————————————————————
+def obter_resposta_llama_stream(
+    pergunta: str,
+    contexto: str,
+    modelo: str = OLLAMA_MODEL,
+    options: dict | None = None,
+    timeout: int = 60,
+    usar_cache: bool | None = None
+) -> Iterator[str]:
+    """
+    Versão em streaming de 'obter_resposta_llama': produz a resposta em fragmentos.
+
+    Usa 'stream: true' na API do Ollama, que devolve uma linha JSON por fragmento
+    gerado. Respostas em cache são devolvidas em um único fragmento.
+
+    Args:
+        Os mesmos de 'obter_resposta_llama'.
+
+    Yields:
+        str: Fragmentos de texto na ordem em que são gerados (ou mensagem de erro).
+    """
+    if options is None:
+        options = DEFAULT_OPTIONS
+
+    prompt = _montar_prompt(pergunta, contexto)
+
+    chave = _chave_cache(modelo, prompt, options, usar_cache)
+    if chave is not None:
+        cached = _consultar_cache(chave)
+        if cached is not None:
+            yield cached
+            return
 
     payload = {
         "model": modelo,
         "prompt": prompt,
-        "stream": False,
+        "stream": True,
         "options": options
     }
 
+    partes = []
+    inicio = time.perf_counter()
+    ttft = None
     try:
-        response = requests.post(OLLAMA_URL, json=payload, timeout=timeout)
-        response.raise_for_status()
-        data = response.json()
-
-        # A API do Ollama pode retornar 'response' ou listar em 'choices'
-        return data.get("response") \
-            or (data.get("choices", [{}])[0]
-                   .get("message", {}).get("content")) \
-            or "Erro: Resposta vazia do modelo"
+        with requests.post(OLLAMA_URL, json=payload, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            for linha in response.iter_lines():
+                if not linha:
+                    continue
+                data = json.loads(linha)
+                fragmento = data.get("response", "")
+                if fragmento:
+                    if ttft is None:
+                        ttft = time.perf_counter() - inicio
+                    partes.append(fragmento)
+                    yield fragmento
+                if data.get("done"):
+                    _registrar_metricas_ollama(data, ttft)
+                    break
+        registrar_tempo("llm.request", time.perf_counter() - inicio)
 
     except requests.exceptions.Timeout:
-        return "Erro: Tempo esgotado ao consultar o modelo"
+        yield "Erro: Tempo esgotado ao consultar o modelo"
+        return
 
     except Exception as error:
-        return f"Erro ao conectar com o modelo: {error}"
+        yield f"Erro ao conectar com o modelo: {error}"
+        return
+
+    if not partes:
+        yield "Erro: Resposta vazia do modelo"
+    elif chave is not None:
+        response_cache.put(chave, modelo, "".join(partes))
 
 
 # ——————————————————————————————
@@ -106,3 +317,4 @@ if __name__ == "__main__":
     print("⏳ Testando obter_resposta_llama()...")
     resposta = obter_resposta_llama(test_pergunta, test_contexto)
     print("Resposta do modelo:\n", resposta)
+    print("Cache de respostas:", response_cache.stats())
@@ -0,0 +1,285 @@
+"""
+llm/precomputed.py
+
+Respostas pré-computadas para perguntas frequentes (geradas offline por warm.py), incluindo:
+- Chave por tenant e pergunta normalizada (caixa, espaços e pontuação final ignorados)
+- Impressão digital (hash do arquivo) de cada fonte usada no contexto da resposta
+- Tabela de impressões digitais atuais das fontes, mantida pelo pipeline de ingestão:
+  ao reindexar uma fonte alterada, apenas as respostas que dependem dela são invalidadas
+- Na consulta, a resposta só é usada se o modelo e todas as impressões digitais ainda forem atuais
+- Registro opcional das perguntas recebidas (QUERY_LOG, JSON por linha), minerado pelo warm.py
+- Armazenamento em SQLite (biblioteca padrão), compartilhado entre pipeline, serviço e interfaces
+"""
+
+# ——————————————————————————————
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from pathlib import Path
+from dotenv import load_dotenv
+
+from metrics.instrumentation import registry
+from store.tenants import validar_tenant
+
+# ——————————————————————————————
+# Configuração das respostas pré-computadas
+load_dotenv()
+PRECOMPUTED_ENABLED = os.getenv("PRECOMPUTED_ENABLED", "1") == "1"
+PRECOMPUTED_DIR = os.getenv("PRECOMPUTED_DIR", ".cache/precomputed")
+# Arquivo de registro das perguntas recebidas (vazio desativa)
+QUERY_LOG = os.getenv("QUERY_LOG")
+# Respostas geradas por outro modelo não são reaproveitadas
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL") or ""
+
+
+# ——————————————————————————————
+def normalizar_pergunta(pergunta: str) -> str:
+    """Forma canônica da pergunta usada como chave: sem diferenças de caixa, espaços e pontuação final."""
+    texto = " ".join(unicodedata.normalize("NFKC", pergunta).casefold().split())
+    return texto.strip(" ?!.;:¿¡")
+
+
+def hash_arquivo(caminho: str, bloco: int = 1024 * 1024) -> str:
+    """Impressão digital (SHA-256) do conteúdo de um arquivo de origem."""
+    digest = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        while parte := f.read(bloco):
+            digest.update(parte)
+    return digest.hexdigest()
+
+
+# ——————————————————————————————
+class PrecomputedAnswers:
+    """
+    Respostas pré-computadas persistidas em um arquivo SQLite.
+
+    Cada resposta registra, em 'dependencias', a impressão digital das fontes do seu
+    contexto no momento da geração; a tabela 'fontes' guarda a impressão digital atual
+    de cada fonte indexada. Uma resposta é válida enquanto as duas coincidirem.
+    """
+
+    def __init__(self, pasta: str):
+        """
+        Args:
+            pasta (str): Pasta onde o arquivo 'precomputadas.sqlite3' será criado.
+        """
+        self._lock = threading.Lock()
+        Path(pasta).mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            os.path.join(pasta, "precomputadas.sqlite3"),
+            check_same_thread=False,
+            timeout=30
+        )
+        # WAL permite leituras concorrentes enquanto o pipeline ou o warm.py gravam
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS respostas (
+                tenant TEXT NOT NULL,
+                pergunta TEXT NOT NULL,
+                resposta TEXT NOT NULL,
+                contexto TEXT NOT NULL,
+                fontes TEXT NOT NULL,
+                distancia_media REAL NOT NULL,
+                modelo TEXT NOT NULL,
+                criado_em REAL NOT NULL,
+                PRIMARY KEY (tenant, pergunta)
+            );
+            CREATE TABLE IF NOT EXISTS dependencias (
+                tenant TEXT NOT NULL,
+                pergunta TEXT NOT NULL,
+                source TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                PRIMARY KEY (tenant, pergunta, source)
+            );
+            CREATE INDEX IF NOT EXISTS idx_dependencias_fonte ON dependencias (tenant, source);
+            CREATE TABLE IF NOT EXISTS fontes (
+                tenant TEXT NOT NULL,
+                source TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                atualizado_em REAL NOT NULL,
+                PRIMARY KEY (tenant, source)
+            );
+            """
+        )
+        self._conn.commit()
+
+    # ——————————————————————————————
+    def get(self, tenant: str, pergunta: str, modelo: str) -> dict | None:
+        """
+        Busca a resposta pré-computada da pergunta, se ainda for válida.
+
+        Returns:
+            dict | None: {'resposta', 'contexto', 'fontes', 'distancia_media'} ou None
+            se não houver resposta, se ela foi gerada por outro modelo ou se alguma
+            fonte do contexto mudou (ou deixou de estar indexada).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT r.resposta, r.contexto, r.fontes, r.distancia_media
+                FROM respostas r
+                WHERE r.tenant = ? AND r.pergunta = ? AND r.modelo = ?
+                  AND NOT EXISTS (
+                      SELECT 1 FROM dependencias d
+                      LEFT JOIN fontes f ON f.tenant = d.tenant AND f.source = d.source
+                      WHERE d.tenant = r.tenant AND d.pergunta = r.pergunta
+                        AND (f.fingerprint IS NULL OR f.fingerprint != d.fingerprint)
+                  )
+                """,
+                (tenant, normalizar_pergunta(pergunta), modelo)
+            ).fetchone()
+        if row is None:
+            return None
+        resposta, contexto, fontes, distancia_media = row
+        return {
+            "resposta": resposta,
+            "contexto": contexto,
+            "fontes": json.loads(fontes),
+            "distancia_media": distancia_media
+        }
+
+    def fingerprints(self, tenant: str) -> dict[str, str]:
+        """Impressões digitais atuais das fontes do tenant (fonte -> hash)."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT source, fingerprint FROM fontes WHERE tenant = ?", (tenant,)))
+
+    def put(self, tenant: str, pergunta: str, modelo: str, resposta: str, contexto: str,
+            fontes: list[str], distancia_media: float, fingerprints: dict[str, str]) -> bool:
+        """
+        Armazena (ou substitui) a resposta de uma pergunta com as impressões digitais
+        das fontes do contexto.
+
+        Args:
+            fingerprints (dict[str, str]): Impressões digitais lidas (via 'fingerprints')
+                antes de buscar o contexto; se uma fonte mudar durante a geração, a
+                resposta já nasce inválida em vez de ser associada à versão nova.
+
+        Returns:
+            bool: False (nada armazenado) se alguma fonte não tiver impressão digital
+            registrada pelo pipeline, pois a resposta não poderia ser invalidada.
+        """
+        if not fontes or any(fonte not in fingerprints for fonte in fontes):
+            return False
+        chave = normalizar_pergunta(pergunta)
+        with self._lock:
+            self._conn.execute("DELETE FROM dependencias WHERE tenant = ? AND pergunta = ?", (tenant, chave))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (tenant, chave, resposta, contexto, json.dumps(fontes, ensure_ascii=False),
+                 distancia_media, modelo, time.time())
+            )
+            self._conn.executemany(
+                "INSERT INTO dependencias VALUES (?, ?, ?, ?)",
+                [(tenant, chave, fonte, fingerprints[fonte]) for fonte in fontes]
+            )
+            self._conn.commit()
+        return True
+
+    # ——————————————————————————————
+    def registrar_fonte(self, tenant: str, source: str, fingerprint: str, somente_se_ausente: bool = False) -> int:
+        """
+        Registra a impressão digital atual de uma fonte indexada (chamado pelo pipeline).
+
+        Se ela mudou, remove as respostas que dependiam da versão anterior.
+
+        Args:
+            somente_se_ausente (bool): Apenas preenche fontes ainda sem registro
+                (ex.: arquivos indexados antes das respostas pré-computadas).
+
+        Returns:
+            int: Número de respostas invalidadas.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint FROM fontes WHERE tenant = ? AND source = ?", (tenant, source)
+            ).fetchone()
+            if row is not None and (somente_se_ausente or row[0] == fingerprint):
+                return 0
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fontes VALUES (?, ?, ?, ?)", (tenant, source, fingerprint, time.time())
+            )
+            invalidadas = self._invalidar(tenant, [source])
+            self._conn.commit()
+        return invalidadas
+
+    def remover_fontes_ausentes(self, tenant: str, presentes: list[str]) -> int:
+        """
+        Esquece as fontes do tenant que não estão mais indexadas (ingestão completa)
+        e remove as respostas que dependiam delas.
+
+        Returns:
+            int: Número de respostas invalidadas.
+        """
+        with self._lock:
+            registradas = [r[0] for r in self._conn.execute("SELECT source FROM fontes WHERE tenant = ?", (tenant,))]
+            ausentes = sorted(set(registradas) - set(presentes))
+            self._conn.executemany(
+                "DELETE FROM fontes WHERE tenant = ? AND source = ?", [(tenant, fonte) for fonte in ausentes]
+            )
+            invalidadas = self._invalidar(tenant, ausentes)
+            self._conn.commit()
+        return invalidadas
+
+    def _invalidar(self, tenant: str, fontes: list[str]) -> int:
+        """Remove as respostas (e suas dependências) que usam alguma das fontes."""
+        if not fontes:
+            return 0
+        perguntas = [
+            (tenant, r[0]) for r in self._conn.execute(
+                f"SELECT DISTINCT pergunta FROM dependencias WHERE tenant = ? "
+                f"AND source IN ({','.join('?' * len(fontes))})",
+                (tenant, *fontes)
+            )
+        ]
+        self._conn.executemany("DELETE FROM respostas WHERE tenant = ? AND pergunta = ?", perguntas)
+        self._conn.executemany("DELETE FROM dependencias WHERE tenant = ? AND pergunta = ?", perguntas)
+        return len(perguntas)
+
+    def stats(self) -> dict:
+        """Quantidade de respostas e de fontes registradas."""
+        with self._lock:
+            respostas = self._conn.execute("SELECT COUNT(*) FROM respostas").fetchone()[0]
+            fontes = self._conn.execute("SELECT COUNT(*) FROM fontes").fetchone()[0]
+        return {"respostas": respostas, "fontes": fontes}
+
+
+# ——————————————————————————————
+precomputed_answers = PrecomputedAnswers(PRECOMPUTED_DIR)
+_hits = registry.counter("precomputed_hits_total", "Perguntas respondidas com respostas pré-computadas")
+_misses = registry.counter("precomputed_misses_total", "Perguntas sem resposta pré-computada válida")
+_log_lock = threading.Lock()
+
+
+def registrar_consulta(pergunta: str, tenant: str) -> None:
+    """Acrescenta a pergunta ao QUERY_LOG (se configurado), para ser minerada pelo warm.py."""
+    if not QUERY_LOG:
+        return
+    linha = json.dumps({"ts": time.time(), "tenant": tenant, "pergunta": pergunta}, ensure_ascii=False)
+    with _log_lock, open(QUERY_LOG, "a", encoding="utf-8") as f:
+        f.write(linha + "\n")
+
+
+def buscar_resposta(pergunta: str, tenant: str | None = None, modelo: str = OLLAMA_MODEL) -> dict | None:
+    """
+    Registra a pergunta no QUERY_LOG e retorna sua resposta pré-computada válida, se houver.
+
+    Args:
+        pergunta (str): Pergunta do usuário, como recebida.
+        tenant (str | None): Tenant da pergunta (None: tenant padrão).
+        modelo (str): Modelo que geraria a resposta agora.
+
+    Returns:
+        dict | None: Ver PrecomputedAnswers.get; None também com PRECOMPUTED_ENABLED=0.
+    """
+    tenant = validar_tenant(tenant)
+    registrar_consulta(pergunta, tenant)
+    if not PRECOMPUTED_ENABLED:
+        return None
+    resposta = precomputed_answers.get(tenant, pergunta, modelo)
+    (_hits if resposta is not None else _misses).inc()
+    return resposta
@@ -1,38 +1,154 @@
 """
 loaders/csv_loader.py
 
-Módulo responsável por carregar arquivos CSV e converter cada linha em um objeto Document genérico.
-Cada documento contém o texto da linha (serializado como string) e metadados com o índice da linha.
+Módulo responsável por carregar arquivos CSV e converter linhas em objetos Document genéricos.
+
+A serialização é vetorizada (coluna a coluna, sem iterar linha a linha) e gera um
+texto compacto no formato "coluna: valor; coluna: valor", ignorando células vazias.
+O arquivo é lido em blocos (CSV_CHUNKSIZE linhas) e, opcionalmente, linhas
+consecutivas são agrupadas em um único documento:
+  - a cada N linhas (CSV_GROUP_ROWS), ou
+  - enquanto compartilharem o mesmo valor em uma coluna-chave (CSV_GROUP_BY).
 """
 
 # ——————————————————————————————
+import os
+
+import numpy as np
 import pandas as pd
+from dotenv import load_dotenv
+
+from metrics.instrumentation import span
+
+# ——————————————————————————————
+# Configuração da leitura
+load_dotenv()
+CSV_CHUNKSIZE = int(os.getenv("CSV_CHUNKSIZE", 50000))
+CSV_GROUP_ROWS = int(os.getenv("CSV_GROUP_ROWS", 1))
+CSV_GROUP_BY = os.getenv("CSV_GROUP_BY") or None
+
+SEPARADOR_CAMPOS = "; "
+SEPARADOR_LINHAS = "\n"
 
 
 # ——————————————————————————————
-def load_csv(file_path: str) -> list[dict]:
+def serializar_linhas(df: pd.DataFrame) -> pd.Series:
     """
-    Carrega um arquivo CSV e retorna uma lista de dicionários representando cada linha.
+    Serializa todas as linhas de um DataFrame em "coluna: valor; ..." de forma vetorizada.
+
+    Células vazias (NaN ou só espaços) são omitidas, assim como o separador correspondente.
+
+    Args:
+        df (pd.DataFrame): Bloco do CSV lido com dtype=str.
+
+    Returns:
+        pd.Series: Texto de cada linha, com o mesmo índice do DataFrame.
+    """
+    texto = pd.Series("", index=df.index, dtype=object)
+    for coluna in df.columns:
+        valores = df[coluna].str.strip()
+        preenchido = valores.notna() & (valores != "")
+        campo = np.where(preenchido, f"{coluna}: " + valores.fillna(""), "")
+        separador = np.where((texto != "") & preenchido, SEPARADOR_CAMPOS, "")
+        texto = texto + separador + campo
+    return texto
+
+
+def _agrupar(df: pd.DataFrame, textos: pd.Series, agrupar_linhas: int, agrupar_por: str | None) -> pd.DataFrame:
+    """
+    Agrupa linhas consecutivas de um bloco em documentos.
+
+    Returns:
+        pd.DataFrame: Colunas 'text', 'row_start', 'row_end' e 'chave' (valor da coluna-chave ou None).
+    """
+    linhas = pd.Series(df.index, index=df.index)
+    if agrupar_por:
+        chave = df[agrupar_por].fillna("")
+        # Um novo grupo começa sempre que a chave muda em relação à linha anterior
+        grupos = (chave != chave.shift()).cumsum()
+    else:
+        chave = None
+        grupos = linhas // agrupar_linhas
+
+    partes = pd.DataFrame({"text": textos, "linha": linhas, "grupo": grupos})
+    partes = partes[partes["text"] != ""]
+    if chave is None and agrupar_linhas == 1:
+        # Sem agrupamento: cada linha já é um documento (evita o groupby, bem mais lento)
+        return pd.DataFrame({
+            "text": partes["text"],
+            "row_start": partes["linha"],
+            "row_end": partes["linha"],
+            "chave": None
+        })
+
+    agregado = partes.groupby("grupo", sort=False).agg(
+        text=("text", SEPARADOR_LINHAS.join),
+        row_start=("linha", "min"),
+        row_end=("linha", "max")
+    )
+    agregado["chave"] = chave.loc[agregado["row_start"]].to_numpy() if chave is not None else None
+    return agregado
+
+
+# ——————————————————————————————
+@span("loader.csv")
+def load_csv(
+    file_path: str,
+    agrupar_linhas: int | None = None,
+    agrupar_por: str | None = None,
+    chunksize: int | None = None
+) -> list[dict]:
+    """
+    Carrega um arquivo CSV e retorna uma lista de dicionários representando suas linhas.
 
     Args:
         file_path (str): Caminho para o arquivo CSV de entrada.
+        agrupar_linhas (int | None): Linhas consecutivas por documento (padrão: CSV_GROUP_ROWS).
+        agrupar_por (str | None): Coluna-chave; linhas consecutivas com o mesmo valor formam
+                                  um único documento (padrão: CSV_GROUP_BY). Tem prioridade
+                                  sobre 'agrupar_linhas'.
+        chunksize (int | None): Linhas lidas por bloco (padrão: CSV_CHUNKSIZE).
 
     Returns:
         list[dict]: Lista de documentos, onde cada documento tem:
-            - 'text': string contendo o dicionário da linha
-            - 'metadata': dict com {'row': índice_da_linha}
+            - 'text': linhas no formato "coluna: valor; coluna: valor" (uma por linha de texto)
+            - 'metadata': dict com {'row': primeira linha, 'row_start', 'row_end'}
+                          e, se agrupado por chave, {'group_key': valor}
     """
-    # Lê o CSV em um DataFrame do Pandas
-    df = pd.read_csv(file_path)
+    agrupar_linhas = max(1, agrupar_linhas or CSV_GROUP_ROWS)
+    agrupar_por = agrupar_por or CSV_GROUP_BY
+    chunksize = chunksize or CSV_CHUNKSIZE
+    # Blocos múltiplos de N garantem que nenhum grupo de N linhas fique dividido entre blocos
+    chunksize = max(agrupar_linhas, chunksize // agrupar_linhas * agrupar_linhas)
+
     documents = []
+    ultima_chave = None
+    # dtype=str preserva os valores como estão no arquivo (sem '1.0' ou 'nan')
+    for bloco in pd.read_csv(file_path, dtype=str, chunksize=chunksize):
+        if agrupar_por and agrupar_por not in bloco.columns:
+            raise ValueError(f"Coluna de agrupamento '{agrupar_por}' não existe em {file_path}")
 
-    # Itera sobre cada linha, converte para dicionário e empacota em texto
-    for i, row in df.iterrows():
-        row_dict = row.to_dict()
-        documents.append({
-            "text": str(row_dict),
-            "metadata": {"row": i}
-        })
+        agregado = _agrupar(bloco, serializar_linhas(bloco), agrupar_linhas, agrupar_por)
+        for i, (text, row_start, row_end, chave) in enumerate(agregado.itertuples(index=False, name=None)):
+            # Grupo por chave que continua do bloco anterior: junta ao último documento
+            if (
+                i == 0
+                and agrupar_por
+                and documents
+                and documents[-1]["metadata"]["group_key"] == chave == ultima_chave
+                and bloco[agrupar_por].fillna("").iloc[0] == chave
+            ):
+                documents[-1]["text"] += SEPARADOR_LINHAS + text
+                documents[-1]["metadata"]["row_end"] = int(row_end)
+                continue
+
+            metadata = {"row": int(row_start), "row_start": int(row_start), "row_end": int(row_end)}
+            if agrupar_por:
+                metadata["group_key"] = chave
+            documents.append({"text": text, "metadata": metadata})
+
+        if agrupar_por:
+            ultima_chave = bloco[agrupar_por].fillna("").iloc[-1]
 
     return documents
 
@@ -42,5 +158,5 @@ if __name__ == "__main__":
     # Teste rápido para verificar carga do CSV
     sample_path = "data/documentos_base.csv"
     docs = load_csv(sample_path)
-    print(f"✅ Carregadas {len(docs)} linhas do CSV")
-    print("Exemplo de documento de linha 0:", docs[0])
+    print(f"✅ Carregados {len(docs)} documentos do CSV")
+    print("Exemplo de documento 0:", docs[0])
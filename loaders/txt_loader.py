@@ -6,8 +6,12 @@ quebrando-os em parágrafos e preparando uma lista de documentos
 para indexação. Cada parágrafo vira um documento com metadata.
 """
 
+# ——————————————————————————————
+from metrics.instrumentation import span
+
 
 # ——————————————————————————————
+@span("loader.txt")
 def load_txt(file_path: str) -> list[dict]:
     """
     Carrega um arquivo TXT e retorna uma lista de dicionários,
@@ -0,0 +1,455 @@
+"""
+maintain.py
+
+Manutenção do índice (ChromaDB, text store e índice comprimido), a executar com o serviço,
+o Streamlit e o bot parados:
+  1. Varre cada coleção em lotes e classifica os chunks: órfãos (fonte que não existe mais
+     na pasta de dados do tenant, id que não corresponde à fonte ou metadados sem 'source')
+     e sem texto (nem no text store nem nos 'documents' do Chroma).
+  2. Reconstrói em pastas novas ('<pasta>.rebuild') apenas os chunks válidos, copiando os
+     embeddings já calculados (sem chamar o modelo): coleções sem os resíduos de remoções
+     e upserts, text store sem textos sobrescritos, índice comprimido com a PCA reajustada
+     e índice de facetas apenas com os chunks mantidos.
+  3. Verifica a reconstrução: contagens iguais entre coleção, text store, índices comprimido e de facetas,
+     uma única dimensão de embedding em todas as coleções e uma amostra de vetores idênticos.
+  4. Mede a latência de busca antes e depois, usando como consultas uma amostra dos próprios vetores.
+  5. Troca as pastas por renomeação (a anterior fica em '<pasta>.old' até o fim da troca)
+     e relata o espaço em disco recuperado.
+  6. Esquece as impressões digitais das fontes removidas (respostas pré-computadas).
+
+Com --dry-run, apenas relata órfãos, inconsistências e uso de disco, sem alterar nada.
+
+Uso:
+    python maintain.py --dry-run
+    python maintain.py --queries 100 --keep-backup
+"""
+
+# ——————————————————————————————
+# Bibliotecas
+import os
+import time
+import shutil
+import argparse
+from pathlib import Path
+from collections import Counter
+
+import numpy as np
+import chromadb
+from dotenv import load_dotenv
+
+# ——————————————————————————————
+# Carrega variáveis de ambiente do arquivo .env
+load_dotenv()
+K_RESULTS = int(os.getenv("K_RESULTS", 3))
+# Chunks lidos e regravados por vez
+MAINTAIN_BATCH = int(os.getenv("MAINTAIN_BATCH", 1000))
+
+# ——————————————————————————————
+# Importação de módulos internos
+from store.chroma_store import (
+    client, embedding_fn, persist_dir, pasta_tenant, nome_colecao,
+    text_store_enabled, text_store_dir, text_store_compression,
+    vector_compression, vector_index_dir, vector_pca_dim, vector_rerank_factor, facet_index_dir
+)
+from store.text_store import TextStore
+from store.compressed_index import CompressedIndex
+from store.facet_index import FacetIndex
+from store.tenants import TENANTS, TENANT_DEFAULT, data_dir_do_tenant
+from llm.precomputed import precomputed_answers
+from metrics.medicao import tamanho_pasta, percentis
+
+# Extensões indexadas pelo pipeline e sufixos das pastas reconstruídas e anteriores
+EXTENSOES = {".pdf", ".csv", ".txt"}
+SUFIXO_NOVO = ".rebuild"
+SUFIXO_ANTIGO = ".old"
+
+
+# ——————————————————————————————
+def tenant_da_colecao(nome: str) -> str | None:
+    """Tenant dono de uma coleção ('documents' ou 'documents_<tenant>'); None para outras coleções."""
+    if nome == nome_colecao(TENANT_DEFAULT):
+        return TENANT_DEFAULT
+    return nome[len("documents_"):] if nome.startswith("documents_") else None
+
+
+def fontes_existentes(tenant: str) -> set[str] | None:
+    """
+    Arquivos indexáveis na pasta de dados do tenant.
+
+    Returns:
+        set[str] | None: Nomes dos arquivos, ou None se o tenant não estiver configurado ou a
+        pasta não existir (ex.: volume não montado): nesse caso nenhum chunk é tratado como órfão.
+    """
+    if tenant not in TENANTS:
+        return None
+    pasta = data_dir_do_tenant(tenant)
+    if not pasta or not Path(pasta).is_dir():
+        return None
+    return {p.name for p in Path(pasta).iterdir() if p.suffix.lower() in EXTENSOES}
+
+
+def motivo_descarte(chunk_id: str, meta: dict | None, fontes: set[str] | None) -> str | None:
+    """
+    Motivo para descartar um chunk ou None se ele for válido.
+
+    Returns:
+        str | None: "sem_fonte" (metadados sem 'source'), "fonte_ausente" (arquivo removido
+        da pasta de dados) ou "id_inconsistente" (id que não deriva do nome da fonte,
+        como os gerados pelo pipeline a partir de 'file_path.stem').
+    """
+    source = (meta or {}).get("source")
+    if not source:
+        return "sem_fonte"
+    if fontes is not None and source not in fontes:
+        return "fonte_ausente"
+    if meta.get("chunk_id", chunk_id) != chunk_id or not chunk_id.startswith(f"{Path(source).stem}_"):
+        return "id_inconsistente"
+    return None
+
+
+def lotes(colecao, tamanho: int, include: list[str]):
+    """Percorre a coleção em lotes de até 'tamanho' chunks."""
+    inicio = 0
+    while True:
+        dados = colecao.get(include=include, limit=tamanho, offset=inicio)
+        if not dados["ids"]:
+            return
+        yield dados
+        inicio += len(dados["ids"])
+
+
+def medir_latencia(colecao, indice: CompressedIndex | None, consultas: list, k: int) -> dict:
+    """
+    Latência das buscas (p50/p95/p99 em ms) pelo mesmo caminho de store.chroma_store.buscar:
+    índice comprimido, se houver, ou o índice HNSW do próprio Chroma.
+    """
+    def busca(q):
+        if indice is not None:
+            indice.search(q, k, candidatos=vector_rerank_factor * k)
+        else:
+            colecao.query(query_embeddings=[q], n_results=k, include=["distances"])
+
+    if not consultas:
+        return {}
+    # Primeira busca fora da medição: carrega o índice em memória
+    busca(consultas[0])
+    duracoes = []
+    for q in consultas:
+        inicio = time.perf_counter()
+        busca(q)
+        duracoes.append(time.perf_counter() - inicio)
+    return percentis(duracoes)
+
+
+# ——————————————————————————————
+def pasta_destino(pasta: str, novo_persist: str) -> str:
+    """Pasta reconstruída: dentro da nova pasta do Chroma, se 'pasta' estiver na atual, senão '<pasta>.rebuild'."""
+    relativo = os.path.relpath(os.path.abspath(pasta), os.path.abspath(persist_dir))
+    if relativo.split(os.sep)[0] == "..":
+        return os.path.normpath(pasta) + SUFIXO_NOVO
+    return os.path.normpath(os.path.join(novo_persist, relativo))
+
+
+def trocar_pastas(trocas: list[tuple[str, str]]) -> list[str]:
+    """
+    Coloca cada pasta reconstruída no lugar da atual, que é renomeada para '<pasta>.old'.
+
+    As renomeações acontecem no mesmo sistema de arquivos (operações atômicas); se alguma
+    falhar, as trocas já feitas são desfeitas e a exceção é repassada.
+
+    Returns:
+        list[str]: Pastas anteriores ('<pasta>.old').
+    """
+    feitas = []
+    try:
+        for atual, nova in trocas:
+            antiga = os.path.normpath(atual) + SUFIXO_ANTIGO
+            if os.path.exists(antiga):
+                shutil.rmtree(antiga)
+            movida = os.path.exists(atual)
+            if movida:
+                os.rename(atual, antiga)
+            try:
+                os.rename(nova, atual)
+            except OSError:
+                if movida:
+                    os.rename(antiga, atual)
+                raise
+            feitas.append((atual, nova, antiga if movida else None))
+    except OSError:
+        for atual, nova, antiga in reversed(feitas):
+            os.rename(atual, nova)
+            if antiga:
+                os.rename(antiga, atual)
+        raise
+    return [antiga for _, _, antiga in feitas if antiga]
+
+
+# ——————————————————————————————
+def manter_colecao(nome: str, novo_client, raiz_textos: str, raiz_vetores: str, raiz_facetas: str,
+                   lote: int, n_consultas: int, k: int, seed: int = 0) -> dict:
+    """
+    Varre uma coleção e, com 'novo_client', reconstrói nele apenas os chunks válidos.
+
+    Args:
+        nome (str): Nome da coleção no Chroma atual.
+        novo_client: Cliente do Chroma na pasta reconstruída (None: apenas relatório).
+        raiz_textos (str): Pasta nova do text store (TEXT_STORE_DIR reconstruído).
+        raiz_vetores (str): Pasta nova do índice comprimido (VECTOR_INDEX_DIR reconstruído).
+        raiz_facetas (str): Pasta nova do índice de facetas (FACET_INDEX_DIR reconstruído).
+        lote (int): Chunks lidos e regravados por vez.
+        n_consultas (int): Vetores amostrados como consultas na medição de latência.
+        k (int): Resultados por consulta na medição de latência.
+
+    Returns:
+        dict: Contagens (total, mantidos, descartes por motivo, resíduos do text store e do
+        índice comprimido), fontes mantidas e removidas, dimensões, latências e problemas
+        encontrados na verificação.
+    """
+    tenant = tenant_da_colecao(nome)
+    fontes = fontes_existentes(tenant) if tenant is not None else None
+    origem = client.get_collection(nome, embedding_function=embedding_fn)
+
+    # Stores atuais do tenant, apenas se já existirem (o relatório não cria pastas). O text store
+    # é lido mesmo desativado: com TEXT_STORE_ENABLED=0, os textos migram para o próprio Chroma
+    pasta_textos = pasta_tenant(text_store_dir, tenant) if tenant is not None else None
+    pasta_vetores = pasta_tenant(vector_index_dir, tenant) if tenant is not None else None
+    textos_atual = (
+        TextStore(pasta_textos, compressao=text_store_compression)
+        if pasta_textos and os.path.isdir(pasta_textos) else None
+    )
+    indice_atual = (
+        CompressedIndex(pasta_vetores, dimensao=vector_pca_dim)
+        if pasta_vetores and vector_compression == "pca_int8" and os.path.isdir(pasta_vetores) else None
+    )
+
+    nova = textos_novo = indice_novo = facetas_novo = None
+    if novo_client is not None:
+        nova = novo_client.get_or_create_collection(
+            name=nome,
+            embedding_function=embedding_fn,
+            metadata=origem.metadata or {"hnsw:space": "cosine"}
+        )
+        if tenant is not None and text_store_enabled:
+            textos_novo = TextStore(pasta_tenant(raiz_textos, tenant), compressao=text_store_compression)
+        if tenant is not None and vector_compression == "pca_int8":
+            indice_novo = CompressedIndex(pasta_tenant(raiz_vetores, tenant), dimensao=vector_pca_dim)
+        if tenant is not None:
+            facetas_novo = FacetIndex(pasta_tenant(raiz_facetas, tenant))
+
+    relatorio = {
+        "colecao": nome, "tenant": tenant, "total": 0, "mantidos": 0, "descartes": Counter(),
+        "fontes_mantidas": set(), "fontes_removidas": set(), "dimensoes": set(), "problemas": []
+    }
+    vistos = set()
+    rng = np.random.default_rng(seed)
+    amostra = []
+
+    for dados in lotes(origem, lote, ["embeddings", "metadatas", "documents"]):
+        ids = dados["ids"]
+        metadatas = dados["metadatas"] or [None] * len(ids)
+        documentos = dados["documents"] or [None] * len(ids)
+        textos = textos_atual.get_many(ids) if textos_atual is not None else [None] * len(ids)
+
+        validos = []
+        for chunk_id, meta, embedding, documento, texto in zip(ids, metadatas, dados["embeddings"], documentos, textos):
+            relatorio["total"] += 1
+            vistos.add(chunk_id)
+            texto = texto if texto is not None else documento
+            motivo = motivo_descarte(chunk_id, meta, fontes) if tenant is not None else None
+            if motivo is None and tenant is not None and not texto:
+                motivo = "sem_texto"
+            if motivo is not None:
+                relatorio["descartes"][motivo] += 1
+                if meta and meta.get("source"):
+                    relatorio["fontes_removidas"].add(meta["source"])
+                continue
+
+            vetor = np.asarray(embedding, dtype=np.float32)
+            relatorio["dimensoes"].add(len(vetor))
+            if meta and meta.get("source"):
+                relatorio["fontes_mantidas"].add(meta["source"])
+            validos.append((chunk_id, meta, vetor, texto))
+
+            # Amostra uniforme (reservatório) dos vetores, usada nas consultas e na verificação
+            relatorio["mantidos"] += 1
+            if len(amostra) < n_consultas:
+                amostra.append((chunk_id, vetor))
+            else:
+                posicao = rng.integers(relatorio["mantidos"])
+                if posicao < n_consultas:
+                    amostra[posicao] = (chunk_id, vetor)
+
+        if nova is None or not validos:
+            continue
+        ids_validos = [v[0] for v in validos]
+        metas_validos = [v[1] for v in validos]
+        vetores = np.stack([v[2] for v in validos])
+        textos_validos = [v[3] for v in validos]
+        if textos_novo is not None:
+            textos_novo.put_many(list(zip(ids_validos, textos_validos)))
+            nova.upsert(ids=ids_validos, embeddings=vetores.tolist(), metadatas=metas_validos)
+        elif any(t is not None for t in textos_validos):
+            nova.upsert(ids=ids_validos, embeddings=vetores.tolist(), metadatas=metas_validos, documents=textos_validos)
+        else:
+            nova.upsert(ids=ids_validos, embeddings=vetores.tolist(), metadatas=metas_validos)
+        if indice_novo is not None:
+            indice_novo.add(ids_validos, vetores)
+        if facetas_novo is not None:
+            facetas_novo.add(ids_validos, metas_validos)
+
+    # Resíduos dos stores auxiliares: entradas sem chunk correspondente na coleção
+    relatorio["textos_residuais"] = len(set(textos_atual.ids()) - vistos) if textos_atual is not None else 0
+    relatorio["vetores_residuais"] = (
+        len(set(indice_atual.ids()) - vistos) if indice_atual is not None else 0
+    )
+    relatorio["fontes_removidas"] -= relatorio["fontes_mantidas"]
+    if len(relatorio["dimensoes"]) > 1:
+        relatorio["problemas"].append(f"{nome}: embeddings com dimensões diferentes {sorted(relatorio['dimensoes'])}")
+
+    consultas = [vetor.tolist() for _, vetor in amostra]
+    relatorio["latencia_antes"] = medir_latencia(origem, indice_atual, consultas, k)
+    if nova is None:
+        return relatorio
+
+    # — Verificação da reconstrução —
+    if indice_novo is not None:
+        indice_novo.ajustar()
+    problemas = relatorio["problemas"]
+    mantidos = relatorio["mantidos"]
+    if nova.count() != mantidos:
+        problemas.append(f"{nome}: coleção reconstruída com {nova.count()} chunks, esperados {mantidos}")
+    if textos_novo is not None and len(textos_novo.ids()) != mantidos:
+        problemas.append(f"{nome}: text store com {len(textos_novo.ids())} textos, esperados {mantidos}")
+    if indice_novo is not None and indice_novo.stats()["vetores"] != mantidos:
+        problemas.append(f"{nome}: índice comprimido com {indice_novo.stats()['vetores']} vetores, esperados {mantidos}")
+    if facetas_novo is not None and facetas_novo.stats()["chunks"] != mantidos:
+        problemas.append(f"{nome}: índice de facetas com {facetas_novo.stats()['chunks']} chunks, esperados {mantidos}")
+    if amostra:
+        copiados = nova.get(ids=[chunk_id for chunk_id, _ in amostra], include=["embeddings"])
+        por_id = dict(zip(copiados["ids"], copiados["embeddings"]))
+        divergentes = sum(
+            chunk_id not in por_id or not np.allclose(np.asarray(por_id[chunk_id], dtype=np.float32), vetor)
+            for chunk_id, vetor in amostra
+        )
+        if divergentes:
+            problemas.append(f"{nome}: {divergentes} vetor(es) da amostra divergem da coleção atual")
+
+    relatorio["latencia_depois"] = medir_latencia(nova, indice_novo, consultas, k)
+    return relatorio
+
+
+def exibir_relatorio(relatorio: dict) -> None:
+    """Resumo de uma coleção: chunks mantidos e descartados, resíduos e latência."""
+    descartes = ", ".join(f"{motivo}: {n}" for motivo, n in sorted(relatorio["descartes"].items())) or "nenhum"
+    print(
+        f"📚 '{relatorio['colecao']}' (tenant {relatorio['tenant'] or '-'}): {relatorio['total']} chunks, "
+        f"{relatorio['mantidos']} mantidos | descartes: {descartes}"
+    )
+    if relatorio["fontes_removidas"]:
+        print(f"   🗑️  Fontes removidas: {', '.join(sorted(relatorio['fontes_removidas']))}")
+    if relatorio["textos_residuais"] or relatorio["vetores_residuais"]:
+        print(
+            f"   🧹 Resíduos: {relatorio['textos_residuais']} texto(s) e "
+            f"{relatorio['vetores_residuais']} vetor(es) sem chunk na coleção"
+        )
+    antes, depois = relatorio["latencia_antes"], relatorio.get("latencia_depois")
+    if antes:
+        linha = f"   ⏱️  Busca p50 {antes['p50_ms']:.2f}ms | p95 {antes['p95_ms']:.2f}ms"
+        if depois:
+            linha += f"  ->  p50 {depois['p50_ms']:.2f}ms | p95 {depois['p95_ms']:.2f}ms"
+        print(linha)
+
+
+# ——————————————————————————————
+def main():
+    parser = argparse.ArgumentParser(description="Compactação, limpeza de órfãos e verificação do índice")
+    parser.add_argument("--dry-run", action="store_true", help="Apenas relata órfãos, inconsistências e uso de disco")
+    parser.add_argument("--batch", type=int, default=MAINTAIN_BATCH, help="Chunks lidos e regravados por vez")
+    parser.add_argument("--queries", type=int, default=50, help="Consultas na medição de latência antes/depois")
+    parser.add_argument("--k", type=int, default=K_RESULTS, help="Resultados por consulta na medição de latência")
+    parser.add_argument("--keep-backup", action="store_true", help="Mantém as pastas anteriores em '<pasta>.old'")
+    args = parser.parse_args()
+
+    print("⚠️  Execute com o serviço, o Streamlit e o bot parados: a troca de pastas não é vista por processos abertos.\n")
+
+    # Pastas atuais e reconstruídas: text store e índice comprimido fora da pasta do Chroma
+    # são reconstruídos e trocados separadamente
+    novo_persist = os.path.normpath(persist_dir) + SUFIXO_NOVO
+    raiz_textos = pasta_destino(text_store_dir, novo_persist)
+    raiz_vetores = pasta_destino(vector_index_dir, novo_persist)
+    raiz_facetas = pasta_destino(facet_index_dir, novo_persist)
+    trocas = [(persist_dir, novo_persist)]
+    for pasta, nova, ativa in (
+        (text_store_dir, raiz_textos, text_store_enabled),
+        (vector_index_dir, raiz_vetores, vector_compression == "pca_int8"),
+        (facet_index_dir, raiz_facetas, True)
+    ):
+        if ativa and not nova.startswith(novo_persist):
+            trocas.append((pasta, nova))
+    disco_antes = sum(tamanho_pasta(atual) for atual, _ in trocas if os.path.isdir(atual))
+
+    novo_client = None
+    if not args.dry_run:
+        for _, nova in trocas:
+            if os.path.exists(nova):
+                print(f"🗑️  Removendo reconstrução anterior incompleta: {nova}")
+                shutil.rmtree(nova)
+        novo_client = chromadb.PersistentClient(path=novo_persist)
+
+    # Varre (e reconstrói) cada coleção
+    relatorios = []
+    for colecao in client.list_collections():
+        nome = colecao if isinstance(colecao, str) else colecao.name
+        relatorio = manter_colecao(
+            nome, novo_client, raiz_textos, raiz_vetores, raiz_facetas, args.batch, args.queries, args.k
+        )
+        exibir_relatorio(relatorio)
+        relatorios.append(relatorio)
+    if novo_client is not None:
+        novo_client.persist()
+
+    # Todas as coleções usam o mesmo modelo de embeddings: uma única dimensão
+    problemas = [p for r in relatorios for p in r["problemas"]]
+    dimensoes = set().union(*(r["dimensoes"] for r in relatorios)) if relatorios else set()
+    if len(dimensoes) > 1:
+        problemas.append(f"Coleções com dimensões de embedding diferentes: {sorted(dimensoes)}")
+
+    print(f"\n💾 Uso de disco atual: {disco_antes / 1024 ** 2:.1f}MB")
+    if args.dry_run:
+        for problema in problemas:
+            print(f"❌ {problema}")
+        print("🔍 Simulação concluída: nada foi alterado.")
+        return
+
+    if problemas:
+        for problema in problemas:
+            print(f"❌ {problema}")
+        pastas = ", ".join(nova for _, nova in trocas)
+        print(f"⛔ Verificação falhou: o índice atual foi mantido; reconstrução em {pastas} para inspeção.")
+        raise SystemExit(1)
+
+    disco_depois = sum(tamanho_pasta(nova) for _, nova in trocas if os.path.isdir(nova))
+    antigas = trocar_pastas(trocas)
+    print(
+        f"✅ Índice reconstruído e verificado: {disco_depois / 1024 ** 2:.1f}MB "
+        f"({(disco_antes - disco_depois) / 1024 ** 2:.1f}MB recuperados)"
+    )
+
+    # Fontes removidas deixam de ter impressão digital: invalida as respostas pré-computadas que as usavam
+    for relatorio in relatorios:
+        tenant = relatorio["tenant"]
+        if tenant in TENANTS and relatorio["fontes_removidas"]:
+            invalidadas = precomputed_answers.remover_fontes_ausentes(tenant, sorted(relatorio["fontes_mantidas"]))
+            if invalidadas:
+                print(f"♻️  [{tenant}] {invalidadas} resposta(s) pré-computada(s) invalidada(s)")
+
+    if args.keep_backup:
+        print(f"📦 Pastas anteriores mantidas em: {', '.join(antigas)}")
+    else:
+        for antiga in antigas:
+            shutil.rmtree(antiga)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+metrics/instrumentation.py
+
+Camada leve de instrumentação do Chatbot Documental, incluindo:
+- Histogramas no estilo HDR (buckets log-lineares com erro relativo limitado)
+- Contadores monotônicos e gauges calculados sob demanda
+- 'span': cronômetro por etapa, usável como context manager ou decorator
+- 'coletar_tempos': captura os tempos por etapa de uma requisição (thread atual)
+- Exportação de todas as métricas no formato texto do Prometheus
+- Servidor HTTP mínimo (biblioteca padrão) para expor /metrics
+"""
+
+# ——————————————————————————————
+import math
+import time
+import threading
+from contextlib import ContextDecorator, contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator
+
+
+# ——————————————————————————————
+class Histogram:
+    """
+    Histograma log-linear no estilo HDR.
+
+    Cada potência de 2 é dividida em 'sub_buckets' intervalos iguais em escala
+    logarítmica, o que limita o erro relativo dos percentis a ~2^(1/sub_buckets) - 1
+    (≈2,2% com 32 sub-buckets) usando memória proporcional apenas ao número de
+    buckets ocupados.
+    """
+
+    def __init__(self, sub_buckets: int = 32):
+        self.sub_buckets = sub_buckets
+        self.buckets: dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._lock = threading.Lock()
+
+    def _indice(self, valor: float) -> int | None:
+        """Índice do bucket de um valor positivo (None para zero/negativos)."""
+        if valor <= 0:
+            return None
+        return math.floor(math.log2(valor) * self.sub_buckets)
+
+    def _limite_superior(self, indice: int | None) -> float:
+        """Maior valor representado por um bucket."""
+        if indice is None:
+            return 0.0
+        return 2 ** ((indice + 1) / self.sub_buckets)
+
+    def record(self, valor: float) -> None:
+        """Registra uma observação."""
+        with self._lock:
+            indice = self._indice(valor)
+            self.buckets[indice] = self.buckets.get(indice, 0) + 1
+            self.count += 1
+            self.sum += valor
+            self.min = min(self.min, valor)
+            self.max = max(self.max, valor)
+
+    def percentile(self, p: float) -> float:
+        """
+        Retorna o percentil 'p' (0–100), limitado aos valores mínimo e máximo observados.
+        """
+        with self._lock:
+            if not self.count:
+                return 0.0
+            alvo = max(1, math.ceil(self.count * p / 100))
+            acumulado = 0
+            ordem = sorted(self.buckets, key=lambda i: -math.inf if i is None else i)
+            for indice in ordem:
+                acumulado += self.buckets[indice]
+                if acumulado >= alvo:
+                    return min(max(self._limite_superior(indice), self.min), self.max)
+            return self.max
+
+    def snapshot(self) -> dict:
+        """Resumo do histograma: contagem, soma, mínimo, máximo e percentis usuais."""
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99)
+        }
+
+
+# ——————————————————————————————
+class Counter:
+    """Contador monotônico seguro para threads."""
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, valor: float = 1.0) -> None:
+        with self._lock:
+            self.value += valor
+
+
+# ——————————————————————————————
+class Registry:
+    """
+    Registro central de métricas, indexadas por nome e rótulos.
+
+    Histogramas são exportados como 'summary' do Prometheus (quantis + _sum + _count),
+    contadores como 'counter' e callbacks como 'gauge'.
+    """
+
+    QUANTIS = (0.5, 0.9, 0.95, 0.99)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple, Histogram] = {}
+        self._counters: dict[tuple, Counter] = {}
+        self._gauges: dict[tuple, Callable[[], float]] = {}
+        self._help: dict[str, str] = {}
+
+    @staticmethod
+    def _chave(nome: str, labels: dict | None) -> tuple:
+        return nome, tuple(sorted((labels or {}).items()))
+
+    def histogram(self, nome: str, help: str = "", labels: dict | None = None) -> Histogram:
+        """Obtém (ou cria) o histograma 'nome' com os rótulos informados."""
+        chave = self._chave(nome, labels)
+        with self._lock:
+            self._help.setdefault(nome, help)
+            if chave not in self._histograms:
+                self._histograms[chave] = Histogram()
+            return self._histograms[chave]
+
+    def counter(self, nome: str, help: str = "", labels: dict | None = None) -> Counter:
+        """Obtém (ou cria) o contador 'nome' com os rótulos informados."""
+        chave = self._chave(nome, labels)
+        with self._lock:
+            self._help.setdefault(nome, help)
+            if chave not in self._counters:
+                self._counters[chave] = Counter()
+            return self._counters[chave]
+
+    def gauge(self, nome: str, fn: Callable[[], float], help: str = "", labels: dict | None = None) -> None:
+        """Registra um gauge cujo valor é calculado por 'fn' no momento da exportação."""
+        with self._lock:
+            self._help.setdefault(nome, help)
+            self._gauges[self._chave(nome, labels)] = fn
+
+    def snapshot(self) -> dict:
+        """Retorna todas as métricas como dicionário (útil para JSON e para a UI)."""
+        with self._lock:
+            histograms = dict(self._histograms)
+            counters = dict(self._counters)
+        return {
+            "histograms": {_nome_serie(n, l): h.snapshot() for (n, l), h in histograms.items()},
+            "counters": {_nome_serie(n, l): c.value for (n, l), c in counters.items()}
+        }
+
+    def export_prometheus(self) -> str:
+        """Exporta as métricas no formato texto do Prometheus (versão 0.0.4)."""
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items(), key=lambda item: item[0])
+            help_ = dict(self._help)
+
+        linhas = []
+        declarados = set()
+
+        def cabecalho(nome: str, tipo: str) -> None:
+            if nome not in declarados:
+                declarados.add(nome)
+                if help_.get(nome):
+                    linhas.append(f"# HELP {nome} {help_[nome]}")
+                linhas.append(f"# TYPE {nome} {tipo}")
+
+        for (nome, labels), hist in histograms:
+            cabecalho(nome, "summary")
+            snap = hist.snapshot()
+            for q in self.QUANTIS:
+                serie = _nome_serie(nome, labels + (("quantile", str(q)),))
+                linhas.append(f"{serie} {hist.percentile(q * 100):.6g}")
+            linhas.append(f"{_nome_serie(nome + '_sum', labels)} {snap['sum']:.6g}")
+            linhas.append(f"{_nome_serie(nome + '_count', labels)} {snap['count']}")
+
+        for (nome, labels), contador in counters:
+            cabecalho(nome, "counter")
+            linhas.append(f"{_nome_serie(nome, labels)} {contador.value:.6g}")
+
+        for (nome, labels), fn in gauges:
+            try:
+                valor = float(fn())
+            except Exception:
+                continue
+            cabecalho(nome, "gauge")
+            linhas.append(f"{_nome_serie(nome, labels)} {valor:.6g}")
+
+        return "\n".join(linhas) + "\n"
+
+
+def _nome_serie(nome: str, labels: tuple) -> str:
+    """Formata 'nome{rotulo="valor",...}' no padrão do Prometheus."""
+    if not labels:
+        return nome
+    rotulos = ",".join(
+        f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for k, v in labels
+    )
+    return f"{nome}{{{rotulos}}}"
+
+
+# ——————————————————————————————
+# Registro global e tempos por requisição (por thread)
+registry = Registry()
+_local = threading.local()
+
+STAGE_METRIC = "chatbot_stage_seconds"
+
+
+class span(ContextDecorator):
+    """
+    Cronometra uma etapa e registra sua duração em 'chatbot_stage_seconds{stage=...}'.
+
+    Uso:
+        with span("retrieval.search"):
+            ...
+
+        @span("loader.pdf")
+        def load_pdf(...):
+            ...
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def _recreate_cm(self):
+        # Como decorator, cada chamada usa uma instância nova (seguro entre threads)
+        return span(self.stage)
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        registrar_tempo(self.stage, time.perf_counter() - self._inicio)
+        return False
+
+
+def registrar_tempo(stage: str, segundos: float) -> None:
+    """Registra a duração de uma etapa no histograma e no trace da thread atual."""
+    registry.histogram(
+        STAGE_METRIC, "Duração de cada etapa do chatbot, em segundos", {"stage": stage}
+    ).record(segundos)
+    tempos = getattr(_local, "tempos", None)
+    if tempos is not None:
+        tempos[stage] = tempos.get(stage, 0.0) + segundos
+
+
+@contextmanager
+def coletar_tempos() -> Iterator[dict]:
+    """
+    Coleta, em um dicionário {etapa: segundos}, os spans executados na thread atual.
+
+    Uso:
+        with coletar_tempos() as tempos:
+            get_context(pergunta)
+        print(tempos)  # {'retrieval.embed_query': 0.01, ...}
+    """
+    anterior = getattr(_local, "tempos", None)
+    tempos: dict = {}
+    _local.tempos = tempos
+    try:
+        yield tempos
+    finally:
+        _local.tempos = anterior
+        if anterior is not None:
+            for stage, segundos in tempos.items():
+                anterior[stage] = anterior.get(stage, 0.0) + segundos
+
+
+def incorporar_tempos(tempos: dict) -> None:
+    """Acrescenta ao trace da thread atual tempos medidos em outro processo (ex.: serviço)."""
+    atual = getattr(_local, "tempos", None)
+    if atual is not None:
+        for stage, segundos in tempos.items():
+            atual[stage] = atual.get(stage, 0.0) + segundos
+
+
+# ——————————————————————————————
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Handler que responde GET /metrics com o texto do Prometheus."""
+
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        corpo = registry.export_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def iniciar_servidor_metricas(porta: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Inicia, em uma thread daemon, um servidor HTTP que expõe GET /metrics.
+
+    Args:
+        porta (int): Porta TCP do servidor.
+        host (str): Endereço de escuta (padrão: apenas localhost).
+
+    Returns:
+        ThreadingHTTPServer: Instância em execução (para eventual shutdown()).
+    """
+    server = ThreadingHTTPServer((host, porta), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
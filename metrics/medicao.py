@@ -0,0 +1,36 @@
+"""
+metrics/medicao.py
+
+Funções de medição compartilhadas pelos benchmarks (benchmarks/run.py) e pela
+manutenção do índice (maintain.py):
+- Tamanho em disco de uma pasta
+- Resumo de durações em percentis (p50/p95/p99), média e máximo
+"""
+
+# ——————————————————————————————
+from pathlib import Path
+
+
+# ——————————————————————————————
+def tamanho_pasta(caminho: str) -> int:
+    """Soma o tamanho de todos os arquivos de uma pasta, em bytes."""
+    return sum(p.stat().st_size for p in Path(caminho).rglob("*") if p.is_file())
+
+
+def percentis(amostras: list[float]) -> dict:
+    """Retorna p50/p95/p99, média e máximo (em ms) de uma lista de durações em segundos."""
+    if not amostras:
+        return {}
+    ordenadas = sorted(amostras)
+
+    def p(q: float) -> float:
+        return ordenadas[min(len(ordenadas) - 1, int(round(q * (len(ordenadas) - 1))))] * 1000
+
+    return {
+        "n": len(ordenadas),
+        "p50_ms": p(0.50),
+        "p95_ms": p(0.95),
+        "p99_ms": p(0.99),
+        "media_ms": sum(ordenadas) / len(ordenadas) * 1000,
+        "max_ms": ordenadas[-1] * 1000
+    }
@@ -0,0 +1,255 @@
+"""
+metrics/profiling.py
+
+Ganchos de profiling (CPU e memória) para o pipeline, o bot do Telegram e o app Streamlit:
+- CPU: profiler por amostragem (thread que lê sys._current_frames), sem dependências externas
+- Memória: snapshots do 'tracemalloc' com os principais pontos de alocação
+- RSS: pico de memória residente por arquivo e por etapa durante a ingestão
+- Saída em "collapsed stacks" (uma pilha por linha + contagem), lida por flamegraph.pl,
+  speedscope e inferno
+
+Controle via variável de ambiente (ou flag --profile do pipeline):
+    PROFILE=cpu,mem,rss   PROFILE_DIR=profiles   PROFILE_INTERVAL_MS=5
+
+Com PROFILE vazio, todas as chamadas são no-ops e o custo é praticamente zero.
+"""
+
+# ——————————————————————————————
+import os
+import sys
+import time
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# ——————————————————————————————
+load_dotenv()
+PROFILE = os.getenv("PROFILE", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+PROFILE_TRACEMALLOC_FRAMES = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", 10))
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", 25))
+
+
+# ——————————————————————————————
+def _rss_atual() -> int:
+    """Memória residente atual do processo, em bytes (0 se indisponível)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+_MODULOS: dict[str, str] = {}
+
+
+def _nome_frame(frame) -> str:
+    codigo = frame.f_code
+    modulo = _MODULOS.get(codigo.co_filename)
+    if modulo is None:
+        modulo = _MODULOS[codigo.co_filename] = Path(codigo.co_filename).stem
+    return f"{modulo}:{codigo.co_name}:{frame.f_lineno}"
+
+
+# ——————————————————————————————
+class SamplingProfiler:
+    """
+    Profiler de CPU por amostragem de pilhas de todas as threads.
+
+    A cada 'intervalo' segundos registra a pilha atual de cada thread (exceto a
+    própria) e acumula as contagens no formato collapsed stacks.
+    """
+
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+        self.pilhas = Counter()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, name="cpu-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._parar.set()
+        if self._thread:
+            self._thread.join()
+
+    def _loop(self) -> None:
+        proprio = threading.get_ident()
+        nomes = {}
+        while not self._parar.wait(self.intervalo):
+            if len(nomes) != threading.active_count():
+                nomes = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                # Ignora as threads do próprio profiling
+                if ident == proprio or nomes.get(ident) == "rss-sampler":
+                    continue
+                pilha = []
+                while frame is not None:
+                    pilha.append(_nome_frame(frame))
+                    frame = frame.f_back
+                pilha.append(nomes.get(ident, str(ident)))
+                self.pilhas[";".join(reversed(pilha))] += 1
+
+    def write(self, caminho: Path) -> None:
+        """Grava as pilhas amostradas no formato collapsed stacks."""
+        with open(caminho, "w", encoding="utf-8") as f:
+            for pilha, contagem in self.pilhas.most_common():
+                f.write(f"{pilha} {contagem}\n")
+
+
+# ——————————————————————————————
+class Profiler:
+    """
+    Agrega os modos de profiling habilitados e grava seus resultados em PROFILE_DIR.
+
+    Uso:
+        perfil = Profiler.from_env("pipeline")
+        perfil.start()
+        with perfil.etapa("rotina_6.pdf", "loader"):
+            ...
+        perfil.stop()
+    """
+
+    def __init__(self, nome: str, modos: set[str], pasta: str = PROFILE_DIR):
+        self.nome = nome
+        self.modos = modos
+        self.ativo = bool(modos)
+        self.pasta = Path(pasta)
+        self.rss_etapas: list[tuple[str, str, float, int, int]] = []
+        self._cpu = SamplingProfiler(PROFILE_INTERVAL_MS / 1000) if "cpu" in modos else None
+        self._prefixo = ""
+
+    @classmethod
+    def from_env(cls, nome: str, modos: str | None = None) -> "Profiler":
+        """Cria o profiler a partir de 'modos' ou da variável PROFILE (ex.: "cpu,mem,rss")."""
+        valor = PROFILE if modos is None else modos
+        return cls(nome, {m.strip().lower() for m in valor.split(",") if m.strip()})
+
+    def start(self) -> None:
+        """Inicia os modos habilitados."""
+        if not self.ativo:
+            return
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self._prefixo = f"{self.nome}_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        if "mem" in self.modos and not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+        if self._cpu:
+            self._cpu.start()
+
+    def stop(self) -> list[Path]:
+        """Encerra os modos habilitados e grava os arquivos de saída."""
+        if not self.ativo:
+            return []
+        arquivos = []
+        if self._cpu:
+            self._cpu.stop()
+            caminho = self.pasta / f"{self._prefixo}.cpu.collapsed"
+            self._cpu.write(caminho)
+            arquivos.append(caminho)
+        if "mem" in self.modos and tracemalloc.is_tracing():
+            arquivos.extend(self.snapshot_memoria("final"))
+            tracemalloc.stop()
+        if "rss" in self.modos and self.rss_etapas:
+            arquivos.append(self._gravar_rss())
+        for caminho in arquivos:
+            print(f"🔬 Perfil gravado em {caminho}")
+        return arquivos
+
+    def snapshot_memoria(self, rotulo: str) -> list[Path]:
+        """
+        Grava um snapshot do tracemalloc: ranking dos principais pontos de alocação
+        (texto) e pilhas de alocação ponderadas por bytes (collapsed stacks).
+        """
+        if not self.ativo or not tracemalloc.is_tracing():
+            return []
+        # Um único agrupamento por pilha: o ranking por linha é derivado dele
+        # (agrupar/filtrar o snapshot várias vezes é caro com milhões de blocos)
+        estatisticas = tracemalloc.take_snapshot().statistics("traceback")
+        por_linha = Counter()
+        blocos = Counter()
+        for stat in estatisticas:
+            frame = stat.traceback[-1]
+            por_linha[(frame.filename, frame.lineno)] += stat.size
+            blocos[(frame.filename, frame.lineno)] += stat.count
+
+        topo = self.pasta / f"{self._prefixo}.{rotulo}.mem.txt"
+        atual, pico = tracemalloc.get_traced_memory()
+        with open(topo, "w", encoding="utf-8") as f:
+            f.write(f"# memória rastreada: atual={atual / 1024 ** 2:.1f} MB pico={pico / 1024 ** 2:.1f} MB\n")
+            for i, ((arquivo, linha), tamanho) in enumerate(por_linha.most_common(PROFILE_TOP), 1):
+                f.write(f"{i:>3}. {arquivo}:{linha} {tamanho / 1024:.1f} KiB ({blocos[(arquivo, linha)]} blocos)\n")
+
+        # Pilhas da mais antiga para a mais recente chamada, ponderadas por bytes
+        collapsed = self.pasta / f"{self._prefixo}.{rotulo}.mem.collapsed"
+        with open(collapsed, "w", encoding="utf-8") as f:
+            for stat in estatisticas:
+                pilha = ";".join(f"{Path(fr.filename).stem}:{fr.lineno}" for fr in stat.traceback)
+                f.write(f"{pilha} {stat.size}\n")
+        return [topo, collapsed]
+
+    def etapa(self, arquivo: str, etapa: str):
+        """
+        Context manager que mede o pico de RSS de uma etapa de um arquivo.
+
+        Sem o modo 'rss', devolve um nullcontext (custo desprezível).
+        """
+        if "rss" not in self.modos:
+            return nullcontext()
+        return self._medir_rss(arquivo, etapa)
+
+    @contextmanager
+    def _medir_rss(self, arquivo: str, etapa: str):
+        inicial = _rss_atual()
+        pico = [inicial]
+        parar = threading.Event()
+
+        def amostrar():
+            while not parar.wait(PROFILE_INTERVAL_MS / 1000):
+                pico[0] = max(pico[0], _rss_atual())
+
+        amostrador = threading.Thread(target=amostrar, name="rss-sampler", daemon=True)
+        amostrador.start()
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            parar.set()
+            amostrador.join()
+            pico[0] = max(pico[0], _rss_atual())
+            self.rss_etapas.append((arquivo, etapa, time.perf_counter() - inicio, inicial, pico[0]))
+
+    def _gravar_rss(self) -> Path:
+        caminho = self.pasta / f"{self._prefixo}.rss.tsv"
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write("arquivo\tetapa\tsegundos\trss_inicial_mb\trss_pico_mb\tdelta_mb\n")
+            for arquivo, etapa, segundos, inicial, pico in self.rss_etapas:
+                f.write(
+                    f"{arquivo}\t{etapa}\t{segundos:.3f}\t{inicial / 1024 ** 2:.1f}\t"
+                    f"{pico / 1024 ** 2:.1f}\t{(pico - inicial) / 1024 ** 2:.1f}\n"
+                )
+        return caminho
+
+
+@contextmanager
+def perfilar(nome: str):
+    """
+    Atalho para perfilar um bloco com os modos de PROFILE (no-op se vazio).
+
+    Uso:
+        with perfilar("app_pergunta"):
+            ...
+    """
+    perfil = Profiler.from_env(nome)
+    perfil.start()
+    try:
+        yield perfil
+    finally:
+        perfil.stop()
@@ -2,17 +2,29 @@
 pipeline.py
 
 Módulo responsável por orquestrar o fluxo completo de ingestão de documentos:
-  1. Limpa a coleção Chroma existente de forma segura.
+  1. Limpa a coleção Chroma existente de forma segura (exceto com --incremental).
   2. Varre a pasta de dados em busca de arquivos PDF, CSV e TXT.
   3. Carrega cada arquivo com o loader apropriado.
   4. Realiza chunking dos textos e gera IDs/metadados consistentes.
-  5. Indexa os chunks no ChromaDB, evitando duplicatas.
+  5. Indexa os chunks no ChromaDB, evitando duplicatas; em PDFs, compara o hash
+     de cada página com o já indexado e reprocessa apenas as páginas alteradas.
   6. Apresenta um relatório final com o total de chunks na coleção.
+
+A impressão digital (hash) de cada arquivo indexado é registrada para as respostas
+pré-computadas (llm/precomputed.py): reindexar um arquivo alterado invalida apenas
+as respostas que dependem dele.
+
+Com --tenant, ingere a pasta de dados do tenant (store/tenants.py) na coleção dele.
+
+Os metadados de cada chunk incluem o tipo do arquivo e o momento da ingestão, usados
+(com fonte e página) pelos filtros por faceta das buscas (store/facet_index.py).
 """
 
 # ——————————————————————————————
 # Bibliotecas
 import os
+import time
+import argparse
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -20,6 +32,7 @@ from dotenv import load_dotenv
 # Carrega variáveis de ambiente do arquivo .env
 load_dotenv()
 data_dir = os.getenv("DATA_DIR")
+metrics_file = os.getenv("METRICS_FILE")
 
 # ——————————————————————————————
 # Importação de loaders para diferentes tipos de arquivo
@@ -31,19 +44,124 @@ from loaders.txt_loader import load_txt
 from retriever.retriever import chunk_documents
 
 # Importação de funções de ChromaDB
-from store.chroma_store import collection, add_documents, limpar_colecao
+from store.chroma_store import (
+    obter_tenant, add_documents, limpar_colecao, remover_documentos, ajustar_indice_comprimido
+)
+from store.tenants import TENANT_DEFAULT, data_dir_do_tenant, validar_tenant
+
+# Impressões digitais das fontes usadas pelas respostas pré-computadas
+from llm.precomputed import precomputed_answers, hash_arquivo
+
+# Instrumentação (tempos por etapa e exportação Prometheus)
+from metrics.instrumentation import registry, span, STAGE_METRIC
+from metrics.profiling import Profiler, PROFILE
+
+# Metadados dos loaders preservados nos chunks, além de source/page/chunk_id
+METADADOS_PRESERVADOS = ("page_hash", "row_start", "row_end", "group_key")
+
+# Loader de cada extensão suportada
+LOADERS = {
+    ".pdf": load_pdf,
+    ".csv": load_csv,
+    ".txt": load_txt
+}
+
 
 # ——————————————————————————————
-# Limpeza inicial da coleção Chroma
-print("🗑️  Limpando coleção Chroma anterior...")
-if limpar_colecao():
-    print("✅ Coleção limpa.\n")
-else:
-    print("⚠️ Atenção: Não foi possível limpar a coleção completamente!")
-    print("           Verifique os logs e reinicie o Chroma se necessário.\n")
+def limpar_colecao_inicial(tenant: str | None = None) -> None:
+    """Limpeza inicial da coleção Chroma do tenant (ingestão completa)."""
+    print("🗑️  Limpando coleção Chroma anterior...")
+    if limpar_colecao(tenant):
+        print("✅ Coleção limpa.\n")
+    else:
+        print("⚠️ Atenção: Não foi possível limpar a coleção completamente!")
+        print("           Verifique os logs e reinicie o Chroma se necessário.\n")
+
+
+def paginas_alteradas(raw_docs: list[dict], existentes: dict) -> tuple[list[dict], list[str]]:
+    """
+    Compara o hash de cada página carregada com o das páginas já indexadas.
+
+    Args:
+        raw_docs (list[dict]): Páginas carregadas (metadata com 'page' e 'page_hash').
+        existentes (dict): Resultado de collection.get(where={'source': ...}) com 'ids' e 'metadatas'.
+
+    Returns:
+        tuple[list[dict], list[str]]:
+            - Páginas novas ou alteradas, que precisam de chunking e embedding.
+            - Ids já indexados a remover (páginas alteradas ou que deixaram de existir).
+    """
+    hashes_indexados = {}
+    ids_por_pagina = {}
+    for chunk_id, meta in zip(existentes.get("ids") or [], existentes.get("metadatas") or []):
+        pagina = meta.get("page", 0)
+        hashes_indexados[pagina] = meta.get("page_hash")
+        ids_por_pagina.setdefault(pagina, []).append(chunk_id)
+
+    # Páginas sem texto não geram chunks (nem hash indexado); só contam se antes tinham conteúdo
+    alteradas = [
+        doc for doc in raw_docs
+        if hashes_indexados.get(doc["metadata"]["page"]) != doc["metadata"]["page_hash"]
+        and (doc["text"].strip() or doc["metadata"]["page"] in ids_por_pagina)
+    ]
+    atuais = {doc["metadata"]["page"] for doc in raw_docs}
+    paginas_remover = {doc["metadata"]["page"] for doc in alteradas} | (set(ids_por_pagina) - atuais)
+    remover = [chunk_id for pagina in sorted(paginas_remover) for chunk_id in ids_por_pagina.get(pagina, [])]
+    return alteradas, remover
+
+
+def carregar_arquivo(file_path: Path) -> list[dict]:
+    """Carrega os documentos brutos de um arquivo com o loader da sua extensão."""
+    return LOADERS[file_path.suffix.lower()](str(file_path))
+
+
+def preparar_chunks(file_path: Path, raw_docs: list[dict]) -> list[dict]:
+    """
+    Divide os documentos brutos de um arquivo em chunks e padroniza ids e metadados.
+
+    Args:
+        file_path (Path): Arquivo de origem (nome e extensão compõem ids e metadados).
+        raw_docs (list[dict]): Documentos carregados pelo loader.
+
+    Returns:
+        list[dict]: Chunks prontos para 'add_documents'.
+    """
+    chunks = chunk_documents(raw_docs)
+    indexado_em = int(time.time())
+    for idx, chunk in enumerate(chunks):
+        original = chunk.get("metadata", {})
+        # IDs por página nos PDFs, estáveis entre ingestões (permitem trocar só a página alterada)
+        if "page_hash" in original:
+            chunk_id = f"{file_path.stem}_p{original['page']:04d}_{original['chunk']:03d}"
+        else:
+            chunk_id = f"{file_path.stem}_{idx:04d}"
+
+        # Substitui metadata por um dict consistente
+        chunk["metadata"] = {
+            "source": file_path.name,
+            "page": original.get("page", 0),
+            "chunk_id": chunk_id,
+            # Facetas dos filtros de busca: tipo do arquivo e momento da ingestão (epoch)
+            "tipo": file_path.suffix.lower().lstrip("."),
+            "indexado_em": indexado_em,
+            **{chave: original[chave] for chave in METADADOS_PRESERVADOS if chave in original}
+        }
+        chunk["id"] = chunk_id
+    return chunks
 
 
-def ingest_new_files(data_dir: str = data_dir) -> None:
+def indexar_chunks(chunks: list[dict], remover: list[str], tenant: str | None = None) -> None:
+    """Remove os chunks substituídos e indexa (embedding + upsert) os novos na coleção do tenant."""
+    remover_documentos(remover, tenant)
+    if chunks:
+        add_documents(chunks, tenant)
+
+
+def ingest_new_files(
+    data_dir: str = data_dir,
+    perfil: Profiler | None = None,
+    tenant: str | None = None
+) -> list[str]:
     """
     Realiza a ingestão incremental de documentos na coleção Chroma.
 
@@ -55,24 +173,35 @@ def ingest_new_files(data_dir: str = data_dir) -> None:
       4. Carrega o conteúdo bruto usando o loader correspondente.
       5. Executa chunking do texto e gera IDs únicos e metadados padronizados.
       6. Adiciona os chunks ao ChromaDB usando 'add_documents'.
+      7. Registra a impressão digital do arquivo, invalidando as respostas
+         pré-computadas que dependiam da versão anterior.
 
     Args:
         data_dir (str): Caminho para a pasta contendo os arquivos de entrada.
+        perfil (Profiler | None): Profiler ativo; com o modo 'rss', mede o pico de
+            memória de cada etapa de cada arquivo.
+        tenant (str | None): Tenant cuja coleção recebe os chunks (None: tenant padrão).
+
+    Returns:
+        list[str]: Nomes dos arquivos da pasta que estão indexados ao final.
     """
+    tenant = validar_tenant(tenant)
+    collection = obter_tenant(tenant).collection
     base = Path(data_dir)
+    perfil = perfil or Profiler.from_env("pipeline", modos="")
 
     # Verifica se o diretório existe e é válido
     if not base.exists() or not base.is_dir():
         print(f"⚠️ Diretório {data_dir!r} não encontrado ou não é uma pasta.")
-        return
+        return []
 
     total_indexed = 0
-    valid_suffixes = {".pdf", ".csv", ".txt"}
+    indexados = []
 
     # Processa cada arquivo na pasta
     for file_path in sorted(base.iterdir()):
         suffix = file_path.suffix.lower()
-        if suffix not in valid_suffixes:
+        if suffix not in LOADERS:
             # Ignora arquivos sem extensão suportada
             continue
 
@@ -82,8 +211,15 @@ def ingest_new_files(data_dir: str = data_dir) -> None:
                 where={"source": file_path.name},
                 include=["metadatas"]
             )
-            if existing and existing.get("metadatas"):
+            ja_indexado = bool(existing and existing.get("metadatas"))
+            # Arquivos sem hash por página só são indexados uma vez
+            if ja_indexado and suffix != ".pdf":
                 print(f"⏭️  Pulando '{file_path.name}' (já indexado)")
+                # Arquivos indexados antes das respostas pré-computadas ainda não têm impressão digital
+                precomputed_answers.registrar_fonte(
+                    tenant, file_path.name, hash_arquivo(file_path), somente_se_ausente=True
+                )
+                indexados.append(file_path.name)
                 continue
         except Exception as error:
             print(f"⚠️  Erro na verificação de duplicatas: {str(error)}")
@@ -91,52 +227,128 @@ def ingest_new_files(data_dir: str = data_dir) -> None:
 
         # — Carregamento de documentos brutos —
         try:
-            loader = {
-                ".pdf": load_pdf,
-                ".csv": load_csv,
-                ".txt": load_txt
-            }[suffix]
-            raw_docs = loader(str(file_path))
+            with perfil.etapa(file_path.name, "loader"):
+                raw_docs = carregar_arquivo(file_path)
             print(f"📂  Carregado {len(raw_docs)} documentos de '{file_path.name}'")
         except Exception as error:
             print(f"❌  Erro crítico ao ler '{file_path.name}': {str(error)}")
             continue
 
+        # — PDFs já indexados: apenas páginas novas ou alteradas —
+        remover = []
+        if ja_indexado:
+            raw_docs, remover = paginas_alteradas(raw_docs, existing)
+            if not raw_docs and not remover:
+                print(f"⏭️  Pulando '{file_path.name}' (nenhuma página alterada)")
+                precomputed_answers.registrar_fonte(
+                    tenant, file_path.name, hash_arquivo(file_path), somente_se_ausente=True
+                )
+                indexados.append(file_path.name)
+                continue
+            print(f"🔁  '{file_path.name}': {len(raw_docs)} página(s) alterada(s), {len(remover)} chunk(s) antigo(s)")
+
         # — Chunking e padronização de metadados —
         try:
-            chunks = chunk_documents(raw_docs)
-            for idx, chunk in enumerate(chunks):
-                # Substitui metadata por um dict consistente
-                chunk["metadata"] = {
-                    "source": file_path.name,
-                    "page": chunk.get("metadata", {}).get("page", 0),
-                    "chunk_id": f"{file_path.stem}_{idx:04d}"
-                }
-                chunk["id"] = f"{file_path.stem}_{idx:04d}"
+            with span("ingest.chunk"), perfil.etapa(file_path.name, "chunking"):
+                chunks = preparar_chunks(file_path, raw_docs)
         except Exception as error:
             print(f"❌  Erro no chunking de '{file_path.name}': {str(error)}")
             continue
 
         # — Indexação no ChromaDB —
         try:
-            add_documents(chunks)
+            with perfil.etapa(file_path.name, "indexacao"):
+                indexar_chunks(chunks, remover, tenant)
             print(f"☑️  '{file_path.name}': {len(chunks)} chunks indexados")
             total_indexed += len(chunks)
+            if chunks or ja_indexado:
+                indexados.append(file_path.name)
+            invalidadas = precomputed_answers.registrar_fonte(tenant, file_path.name, hash_arquivo(file_path))
+            if invalidadas:
+                print(f"♻️  '{file_path.name}': {invalidadas} resposta(s) pré-computada(s) invalidada(s)")
         except Exception as error:
             print(f"❌  Falha na indexação de '{file_path.name}': {str(error)}")
             continue
 
     # Relatório final de ingestão
     print(f"\n✅  Ingestão concluída: {total_indexed} novos chunks de {data_dir}")
+    return indexados
+
+
+def exportar_metricas(caminho: str | None = metrics_file) -> None:
+    """
+    Exibe o resumo de tempos por etapa e, se configurado, grava as métricas
+    no formato texto do Prometheus (compatível com o textfile collector).
+
+    Args:
+        caminho (str | None): Arquivo de saída (METRICS_FILE); None apenas exibe o resumo.
+    """
+    print("\n⏱️  Tempos por etapa (soma | p50 | p95 | p99):")
+    for serie, snap in sorted(registry.snapshot()["histograms"].items()):
+        if serie.startswith(STAGE_METRIC):
+            print(
+                f"   {serie[len(STAGE_METRIC):]:<40} {snap['sum']:8.2f}s | "
+                f"{snap['p50'] * 1000:8.1f}ms | {snap['p95'] * 1000:8.1f}ms | {snap['p99'] * 1000:8.1f}ms"
+            )
+
+    if caminho:
+        Path(caminho).write_text(registry.export_prometheus(), encoding="utf-8")
+        print(f"📈 Métricas exportadas para {caminho}")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingestão de documentos no ChromaDB")
+    parser.add_argument(
+        "--profile", default=PROFILE,
+        help="Modos de profiling separados por vírgula: cpu, mem, rss (padrão: variável PROFILE)"
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Mantém a coleção atual e reprocessa apenas arquivos novos e páginas de PDF alteradas"
+    )
+    parser.add_argument(
+        "--tenant", default=TENANT_DEFAULT,
+        help="Tenant (departamento) a ingerir, configurado em TENANTS_FILE (padrão: TENANT_DEFAULT)"
+    )
+    args = parser.parse_args()
+    data_dir = data_dir_do_tenant(args.tenant)
+    print(f"🏢 Tenant '{args.tenant}': documentos de {data_dir}\n")
+
+    if not args.incremental:
+        limpar_colecao_inicial(args.tenant)
+
+    # Profiling opcional (no-op quando nenhum modo é informado)
+    perfil = Profiler.from_env("pipeline", modos=args.profile)
+    perfil.start()
+
     # Executa todo o pipeline de ingestão
-    ingest_new_files()
+    indexados = ingest_new_files(data_dir, perfil=perfil, tenant=args.tenant)
+
+    # Ingestão completa: arquivos que deixaram de ser indexados invalidam suas respostas pré-computadas
+    if not args.incremental:
+        invalidadas = precomputed_answers.remover_fontes_ausentes(args.tenant, indexados)
+        if invalidadas:
+            print(f"♻️  {invalidadas} resposta(s) pré-computada(s) de arquivos removidos invalidada(s)")
+
+    # Índice comprimido (VECTOR_COMPRESSION=pca_int8): ajusta a PCA aos vetores indexados
+    estatisticas = ajustar_indice_comprimido(args.tenant)
+    if estatisticas is not None:
+        print(
+            f"🗜️  Índice comprimido: {estatisticas['vetores']} vetores, "
+            f"{estatisticas['dimensao_original']} -> {estatisticas['dimensao']} dimensões int8, "
+            f"{estatisticas['bytes_memoria'] / 1024 ** 2:.1f}MB em memória "
+            f"(float32: {estatisticas['bytes_float32'] / 1024 ** 2:.1f}MB, economia de {estatisticas['economia']:.0%})"
+        )
 
     # Exibe o total de chunks na coleção após ingestão
     try:
-        total_chunks = collection.count()
+        total_chunks = obter_tenant(args.tenant).collection.count()
         print(f"📊 Total de chunks na coleção: {total_chunks}")
     except Exception as e:
         print(f"\n⚠️  Não foi possível obter o total de chunks: {str(e)}")
+
+    # Resumo de tempos por etapa e exportação das métricas
+    exportar_metricas()
+
+    # Grava os perfis coletados (collapsed stacks, tracemalloc e RSS por etapa)
+    perfil.stop()
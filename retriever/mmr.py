@@ -0,0 +1,61 @@
+"""
+retriever/mmr.py
+
+Diversificação dos trechos recuperados por Maximal Marginal Relevance (MMR), vetorizada com NumPy:
+- Pontua cada candidato por relevância à pergunta menos a redundância com os já escolhidos
+- Calcula a matriz de similaridade entre candidatos uma única vez; cada passo guloso
+  apenas atualiza o vetor de similaridade máxima aos selecionados
+- Descarta candidatos quase duplicados (similaridade acima de um limite)
+"""
+
+# ——————————————————————————————
+import numpy as np
+
+
+# ——————————————————————————————
+def mmr(
+    consulta,
+    candidatos,
+    lambda_: float = 0.7,
+    limite_similaridade: float = 0.95,
+    maximo: int | None = None
+) -> list[int]:
+    """
+    Ordena candidatos por MMR e remove os quase redundantes.
+
+    Args:
+        consulta: Embedding da pergunta (d).
+        candidatos: Embeddings dos candidatos (n x d), na ordem da busca.
+        lambda_ (float): Peso da relevância (1.0 = só relevância; 0.0 = só diversidade).
+        limite_similaridade (float): Candidatos com similaridade cosseno acima deste valor
+                                     com algum já selecionado são descartados.
+        maximo (int | None): Número máximo de candidatos retornados (padrão: todos).
+
+    Returns:
+        list[int]: Índices dos candidatos mantidos, na ordem de seleção.
+    """
+    vetores = np.asarray(candidatos, dtype=np.float32)
+    if vetores.ndim != 2 or len(vetores) == 0:
+        return []
+    vetores = vetores / np.maximum(np.linalg.norm(vetores, axis=1, keepdims=True), 1e-12)
+    q = np.asarray(consulta, dtype=np.float32).ravel()
+    q = q / max(float(np.linalg.norm(q)), 1e-12)
+
+    relevancia = vetores @ q
+    similaridade = vetores @ vetores.T
+    maximo = len(vetores) if maximo is None else min(maximo, len(vetores))
+
+    disponiveis = np.ones(len(vetores), dtype=bool)
+    redundancia = np.full(len(vetores), -np.inf, dtype=np.float32)
+    selecionados = []
+    while len(selecionados) < maximo and disponiveis.any():
+        # No primeiro passo não há redundância: escolhe o mais relevante
+        pontuacao = lambda_ * relevancia - (1 - lambda_) * np.maximum(redundancia, 0)
+        pontuacao[~disponiveis] = -np.inf
+        escolhido = int(np.argmax(pontuacao))
+        selecionados.append(escolhido)
+        disponiveis[escolhido] = False
+
+        redundancia = np.maximum(redundancia, similaridade[escolhido])
+        disponiveis &= redundancia < limite_similaridade
+    return selecionados
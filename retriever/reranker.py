@@ -0,0 +1,171 @@
+"""
+retriever/reranker.py
+
+Reordenação (rerank) dos trechos candidatos com um cross-encoder local, incluindo:
+- Pontuação de todos os pares (pergunta, trecho) em um único forward pass em lote
+- Cache LRU em memória das pontuações por par (hash da pergunta e do texto do trecho)
+- Orçamento de latência: se o modelo não responder a tempo, mantém a ordem do
+  bi-encoder (distância cosseno) e aproveita o resultado, quando sair, no cache
+- No máximo uma pontuação em andamento: enquanto ela não termina, as demais
+  chamadas mantêm a ordem do bi-encoder em vez de enfileirar trabalho
+- Métricas de uso do cache e de quedas para a ordem original
+
+Com menos trechos, porém mais relevantes, o prompt enviado ao LLM fica menor
+e o tempo de prefill do modelo cai.
+"""
+
+# ——————————————————————————————
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from dotenv import load_dotenv
+
+from metrics.instrumentation import registry
+
+# ——————————————————————————————
+# Configuração do rerank
+load_dotenv()
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "0") == "1"
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+# Candidatos buscados e pontuados pelo cross-encoder / trechos mantidos para o prompt
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", 20))
+RERANK_TOP_K = int(os.getenv("RERANK_TOP_K", 3))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", 150))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", 10000))
+
+
+# ——————————————————————————————
+class CrossEncoderReranker:
+    """
+    Reordena trechos por relevância à pergunta usando um cross-encoder.
+
+    O modelo é carregado em segundo plano na criação; as pontuações ficam em um cache LRU
+    limitado a 'max_cache' pares.
+    """
+
+    def __init__(self, modelo: str = RERANK_MODEL, orcamento_ms: float = RERANK_BUDGET_MS,
+                 max_cache: int = RERANK_CACHE_SIZE):
+        """
+        Args:
+            modelo (str): Nome ou caminho do cross-encoder (sentence-transformers).
+            orcamento_ms (float): Tempo máximo de espera pela pontuação, em ms.
+            max_cache (int): Número máximo de pares (pergunta, trecho) em cache.
+        """
+        self.modelo = modelo
+        self.orcamento = orcamento_ms / 1000.0
+        self.max_cache = max_cache
+        self._cache: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self._carregar_lock = threading.Lock()
+        self._encoder = None
+        # Um único worker: as pontuações são serializadas, e uma chamada que estourou
+        # o orçamento continua em segundo plano apenas para alimentar o cache. Só há uma
+        # tarefa por vez ('_em_andamento'): a fila nunca acumula trabalho já vencido
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        # Carrega o modelo em segundo plano, para a primeira pergunta não gastar o orçamento nisso
+        self._em_andamento = self._executor.submit(self._carregar)
+
+        self._hits = registry.counter("rerank_cache_hits_total", "Pares (pergunta, trecho) pontuados a partir do cache")
+        self._misses = registry.counter("rerank_cache_misses_total", "Pares (pergunta, trecho) pontuados pelo modelo")
+        self._fallbacks = registry.counter(
+            "rerank_fallbacks_total", "Reranks que estouraram o orçamento e mantiveram a ordem do bi-encoder"
+        )
+        self._ocupados = registry.counter(
+            "rerank_busy_total", "Reranks ignorados por já haver uma pontuação em andamento"
+        )
+
+    # ——————————————————————————————
+    def _carregar(self):
+        with self._carregar_lock:
+            if self._encoder is None:
+                from sentence_transformers import CrossEncoder
+                self._encoder = CrossEncoder(self.modelo, device="cpu")
+        return self._encoder
+
+    @staticmethod
+    def _chave(pergunta: str, texto: str) -> str:
+        return hashlib.sha1(f"{pergunta}\0{texto}".encode("utf-8")).hexdigest()
+
+    def _pontuar(self, pergunta: str, textos: list[str], chaves: list[str]) -> None:
+        """Pontua os pares em um único lote e grava os resultados no cache."""
+        pontuacoes = self._carregar().predict(
+            [(pergunta, texto) for texto in textos],
+            batch_size=len(textos),
+            show_progress_bar=False
+        )
+        with self._lock:
+            for chave, pontuacao in zip(chaves, pontuacoes):
+                self._cache[chave] = float(pontuacao)
+                self._cache.move_to_end(chave)
+            while len(self._cache) > self.max_cache:
+                self._cache.popitem(last=False)
+
+    # ——————————————————————————————
+    def rerank(self, pergunta: str, textos: list[str]) -> list[int] | None:
+        """
+        Ordena os trechos da maior para a menor relevância segundo o cross-encoder.
+
+        Args:
+            pergunta (str): Pergunta do usuário.
+            textos (list[str]): Textos dos candidatos, na ordem do bi-encoder.
+
+        Returns:
+            list[int] | None: Índices dos textos em ordem de relevância, ou None se o
+            orçamento de latência foi excedido ou o modelo ainda está ocupado com outra
+            pontuação (mantém-se a ordem do bi-encoder).
+        """
+        if not textos:
+            return []
+        inicio = time.perf_counter()
+        chaves = [self._chave(pergunta, texto) for texto in textos]
+        with self._lock:
+            faltantes = [i for i, chave in enumerate(chaves) if chave not in self._cache]
+        self._hits.inc(len(textos) - len(faltantes))
+        self._misses.inc(len(faltantes))
+
+        if faltantes:
+            with self._lock:
+                ocupado = not self._em_andamento.done()
+                if not ocupado:
+                    futuro = self._em_andamento = self._executor.submit(
+                        self._pontuar, pergunta, [textos[i] for i in faltantes], [chaves[i] for i in faltantes]
+                    )
+            if ocupado:
+                # Chegadas mais rápidas que a pontuação: não enfileira trabalho que venceria
+                self._ocupados.inc()
+                self._fallbacks.inc()
+                return None
+            restante = self.orcamento - (time.perf_counter() - inicio)
+            try:
+                futuro.result(timeout=max(restante, 0))
+            except TimeoutError:
+                self._fallbacks.inc()
+                return None
+            except Exception as error:
+                # Falha do modelo (ex.: não encontrado offline) não deve derrubar a busca
+                print(f"⚠️ Rerank indisponível, mantendo a ordem do bi-encoder: {error}")
+                self._fallbacks.inc()
+                return None
+
+        with self._lock:
+            pontuacoes = []
+            for chave in chaves:
+                if chave not in self._cache:
+                    # Despejado por outra chamada entre a pontuação e a leitura
+                    return None
+                pontuacoes.append(self._cache[chave])
+                self._cache.move_to_end(chave)
+        return sorted(range(len(textos)), key=lambda i: -pontuacoes[i])
+
+    def stats(self) -> dict:
+        """Retorna o tamanho atual do cache de pontuações."""
+        with self._lock:
+            return {"cache_pares": len(self._cache), "max_cache": self.max_cache}
+
+
+# ——————————————————————————————
+# Instância compartilhada (None quando o rerank está desativado)
+reranker = CrossEncoderReranker() if RERANK_ENABLED else None
@@ -3,19 +3,235 @@ retriever/retriever.py
 
 Módulo responsável por dividir blocos brutos de texto em “chunks”
 menores, facilitando a indexação e recuperação eficiente dos documentos.
-Utiliza RecursiveCharacterTextSplitter do LangChain para realizar
-o chunking com tamanho e sobreposição configuráveis.
+
+Chunker nativo (sem LangChain) que:
+  - Quebra o texto em parágrafos e frases, e agrupa frases inteiras em chunks
+  - Mede o tamanho em caracteres (modo "chars") ou em tokens do próprio
+    tokenizer do modelo de embeddings (modo "tokens"), tokenizando todas as
+    frases de todos os documentos em uma única chamada em lote
+  - No modo "tokens", nunca ultrapassa o limite de entrada do modelo
+    (ex.: 256 tokens do all-MiniLM-L6-v2), evitando truncamento silencioso
+  - Mantém sobreposição entre chunks consecutivos, medida na mesma unidade
+  - Se o tokenizer não puder ser carregado, usa o modo "chars" (com aviso)
 """
 
 # ——————————————————————————————
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import os
+import re
+from pathlib import Path
+from functools import lru_cache
+from dotenv import load_dotenv
+
+# ——————————————————————————————
+# Configuração do chunking
+load_dotenv()
+CHUNK_MODE = os.getenv("CHUNK_MODE", "tokens")
+CHUNK_TOKENIZER = os.getenv("CHUNK_TOKENIZER") or os.getenv("MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+# Arquivos que identificam uma pasta local de tokenizer
+ARQUIVOS_TOKENIZER = ("tokenizer.json", "tokenizer_config.json", "vocab.txt")
+# Limite de entrada do modelo de embeddings, incluindo os tokens especiais ([CLS] e [SEP])
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", 256))
+
+# Tamanho e sobreposição padrão de cada modo (CHUNK_SIZE/CHUNK_OVERLAP sobrescrevem)
+PADROES = {
+    "chars": (500, 50),
+    "tokens": (CHUNK_MAX_TOKENS - 2, 32)
+}
+
+# Fim de frase seguido de espaço; parágrafos são separados por linhas em branco
+_RE_FRASE = re.compile(r"(?<=[.!?;:])\s+")
+_RE_PARAGRAFO = re.compile(r"\n\s*\n")
+
+
+# ——————————————————————————————
+@lru_cache(maxsize=1)
+def _tokenizer():
+    """
+    Carrega (uma única vez) o tokenizer do modelo de embeddings.
+
+    Uma pasta local com o mesmo nome do id do Hugging Face, mas sem os arquivos do
+    tokenizer (ex.: 'sentence-transformers/all-MiniLM-L6-v2' com um índice do Chroma),
+    teria prioridade sobre o hub no 'from_pretrained'; nesse caso, o tokenizer é
+    baixado do hub (ou lido do cache local) explicitamente.
+    """
+    from transformers import AutoTokenizer
+    origem = CHUNK_TOKENIZER
+    pasta = Path(origem)
+    if pasta.is_dir() and not any((pasta / arquivo).exists() for arquivo in ARQUIVOS_TOKENIZER):
+        from huggingface_hub import snapshot_download
+        origem = snapshot_download(CHUNK_TOKENIZER, allow_patterns=["*.json", "*.txt"])
+    return AutoTokenizer.from_pretrained(origem)
+
+
+@lru_cache(maxsize=1)
+def _tokenizer_disponivel() -> bool:
+    """Indica se o tokenizer pode ser carregado; avisa (uma única vez) quando não pode."""
+    try:
+        _tokenizer()
+        return True
+    except Exception as error:
+        print(f"⚠️ Tokenizer '{CHUNK_TOKENIZER}' indisponível ({error}): chunking no modo chars.")
+        return False
+
+
+def _segmentar(texto: str) -> list[tuple[str, bool]]:
+    """
+    Divide um texto em frases.
+
+    Returns:
+        list[tuple[str, bool]]: Pares (frase, inicia_paragrafo).
+    """
+    segmentos = []
+    for paragrafo in _RE_PARAGRAFO.split(texto):
+        frases = [f for f in _RE_FRASE.split(paragrafo.strip()) if f.strip()]
+        for i, frase in enumerate(frases):
+            segmentos.append((" ".join(frase.split()), i == 0))
+    return segmentos
+
+
+def _medir(frases: list[str], modo: str) -> list[int]:
+    """Tamanho de cada frase na unidade do modo (tokenização em um único lote)."""
+    if modo == "tokens":
+        if not frases:
+            return []
+        ids = _tokenizer()(frases, add_special_tokens=False, return_attention_mask=False)["input_ids"]
+        return [len(i) for i in ids]
+    return [len(f) for f in frases]
+
+
+def _quebrar_longa(frase: str, limite: int, modo: str) -> list[tuple[str, int]]:
+    """
+    Quebra uma frase maior que o limite em pedaços que cabem nele.
+
+    No modo "tokens", usa os offsets do tokenizer para montar janelas de até 'limite'
+    tokens que terminam em um espaço (um pedaço iniciado no meio de uma palavra, com
+    subtokens '##', seria retokenizado com mais tokens); cada pedaço é medido de novo
+    e encolhido até caber. No modo "chars", corta em espaços (ou no limite, se não houver).
+    """
+    pedacos = []
+    if modo == "tokens":
+        offsets = _tokenizer()(frase, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        inicio = 0
+        while inicio < len(offsets):
+            fim = min(inicio + limite, len(offsets))
+            if fim < len(offsets):
+                # Recua até um token precedido de espaço (fronteira de palavra), se houver
+                corte = fim
+                while corte > inicio + 1 and offsets[corte][0] == offsets[corte - 1][1]:
+                    corte -= 1
+                if corte > inicio + 1:
+                    fim = corte
+            while True:
+                pedaco = frase[offsets[inicio][0]:offsets[fim - 1][1]]
+                n = _medir([pedaco], modo)[0]
+                if n <= limite or fim == inicio + 1:
+                    break
+                fim -= max(1, n - limite)
+                fim = max(fim, inicio + 1)
+            pedacos.append((pedaco, n))
+            inicio = fim
+        return pedacos
+
+    restante = frase
+    while len(restante) > limite:
+        corte = restante.rfind(" ", 0, limite + 1)
+        corte = corte if corte > 0 else limite
+        pedacos.append((restante[:corte].strip(), len(restante[:corte].strip())))
+        restante = restante[corte:].strip()
+    if restante:
+        pedacos.append((restante, len(restante)))
+    return pedacos
+
+
+def _agrupar(segmentos: list[tuple[str, bool, int]], tamanho: int, overlap: int, modo: str) -> list[str]:
+    """
+    Agrupa frases consecutivas em chunks de até 'tamanho', com sobreposição de até 'overlap'.
+
+    No modo "tokens" o separador não adiciona tokens (o tokenizer WordPiece ignora espaços),
+    de modo que a soma dos tamanhos das frases é exatamente o tamanho do chunk.
+    """
+    def custo_separador(inicia_paragrafo: bool) -> int:
+        if modo == "tokens":
+            return 0
+        return 2 if inicia_paragrafo else 1
+
+    chunks = []
+    atual: list[tuple[str, bool, int]] = []
+    total = 0
+
+    def emitir():
+        partes = []
+        for j, (frase, inicia_paragrafo, _) in enumerate(atual):
+            if j:
+                partes.append("\n\n" if inicia_paragrafo else " ")
+            partes.append(frase)
+        chunks.append("".join(partes))
+
+    for segmento in segmentos:
+        _, inicia_paragrafo, n = segmento
+        extra = n + (custo_separador(inicia_paragrafo) if atual else 0)
+        if atual and total + extra > tamanho:
+            emitir()
+            # Sobreposição: reaproveita as últimas frases do chunk anterior que couberem
+            mantidas, soma = [], 0
+            for anterior in reversed(atual[1:]):
+                custo = anterior[2] + custo_separador(anterior[1])
+                if soma + custo > overlap or soma + custo + extra > tamanho:
+                    break
+                mantidas.insert(0, anterior)
+                soma += custo
+            atual, total = mantidas, soma
+            extra = n + (custo_separador(inicia_paragrafo) if atual else 0)
+        atual.append(segmento)
+        total += extra
+
+    if atual:
+        emitir()
+    return chunks
+
+
+def split_text(
+    textos: list[str],
+    chunk_size: int,
+    chunk_overlap: int,
+    modo: str = CHUNK_MODE
+) -> list[list[str]]:
+    """
+    Divide vários textos em chunks, medindo todas as frases em um único lote.
+
+    Args:
+        textos (list[str]): Textos a dividir.
+        chunk_size (int): Tamanho máximo de cada chunk (caracteres ou tokens).
+        chunk_overlap (int): Sobreposição máxima entre chunks consecutivos.
+        modo (str): "tokens" ou "chars".
+
+    Returns:
+        list[list[str]]: Para cada texto, a lista de chunks.
+    """
+    segmentados = [_segmentar(t) for t in textos]
+    todas = [frase for segmentos in segmentados for frase, _ in segmentos]
+    tamanhos = iter(_medir(todas, modo))
+
+    resultado = []
+    for segmentos in segmentados:
+        medidos = []
+        for frase, inicia_paragrafo in segmentos:
+            n = next(tamanhos)
+            if n <= chunk_size:
+                medidos.append((frase, inicia_paragrafo, n))
+                continue
+            for j, (pedaco, m) in enumerate(_quebrar_longa(frase, chunk_size, modo)):
+                medidos.append((pedaco, inicia_paragrafo and j == 0, m))
+        resultado.append(_agrupar(medidos, chunk_size, chunk_overlap, modo))
+    return resultado
 
 
 # ——————————————————————————————
 def chunk_documents(
     raw_docs: list[dict],
-    chunk_size: int = 500,
-    chunk_overlap: int = 50
+    chunk_size: int | None = None,
+    chunk_overlap: int | None = None,
+    modo: str = CHUNK_MODE
 ) -> list[dict]:
     """
     Divide cada documento bruto em pedaços menores (chunks) para indexação.
@@ -31,9 +247,13 @@ def chunk_documents(
                 {"text": "<texto completo>", "metadata": {...}},
                 …
             ]
-        chunk_size (int): Tamanho máximo (em caracteres) de cada chunk.
-        chunk_overlap (int): Quantidade de caracteres duplicados entre chunks
-                             consecutivos para manter contexto.
+        chunk_size (int | None): Tamanho máximo de cada chunk, em caracteres ou
+                                 tokens conforme o modo (padrão: CHUNK_SIZE ou o
+                                 padrão do modo; no modo "tokens", limitado a
+                                 CHUNK_MAX_TOKENS - 2).
+        chunk_overlap (int | None): Sobreposição entre chunks consecutivos, na
+                                    mesma unidade, para manter contexto.
+        modo (str): "tokens" (tokenizer do modelo de embeddings) ou "chars".
 
     Returns:
         List[dict]: Lista de chunks prontos para indexação, cada um contendo:
@@ -43,17 +263,27 @@ def chunk_documents(
                 "metadata": { ... metadados originais ..., "chunk": <índice do chunk> }
             }
     """
-    # Configura o splitter com tamanho e overlap desejados
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap
-    )
+    padrao_size, padrao_overlap = PADROES[modo]
+    if modo == "tokens" and not _tokenizer_disponivel():
+        # CHUNK_SIZE/CHUNK_OVERLAP estão em tokens: no modo chars valem os padrões dele
+        modo = "chars"
+        padrao_size, padrao_overlap = PADROES[modo]
+        chunk_size = chunk_size if chunk_size is not None else padrao_size
+        chunk_overlap = chunk_overlap if chunk_overlap is not None else padrao_overlap
+    # Vazios no .env (CHUNK_SIZE=) usam o padrão do modo
+    if chunk_size is None:
+        chunk_size = int(os.getenv("CHUNK_SIZE") or padrao_size)
+    if chunk_overlap is None:
+        chunk_overlap = int(os.getenv("CHUNK_OVERLAP") or padrao_overlap)
+    if modo == "tokens":
+        chunk_size = min(chunk_size, CHUNK_MAX_TOKENS - 2)
+
+    # Divide todos os textos de uma vez (tokenização em lote)
+    textos_por_doc = split_text([doc["text"] for doc in raw_docs], chunk_size, chunk_overlap, modo)
 
     chunked = []
     # Itera sobre cada documento original
-    for doc in raw_docs:
-        # Divide o texto em múltiplos pedaços
-        texts = splitter.split_text(doc["text"])
+    for doc, texts in zip(raw_docs, textos_por_doc):
         for i, t in enumerate(texts):
             # Copia metadados originais e adiciona índice do chunk
             meta = doc["metadata"].copy()
@@ -0,0 +1,124 @@
+"""
+service/client.py
+
+Cliente leve do serviço de inferência (service/server.py) usado pelas interfaces.
+
+Expõe as mesmas funções que as interfaces já utilizavam:
+- obter_resposta_precomputada(pergunta, tenant) -> resposta pré-computada válida (dict) ou None
+- get_context(query, k, tenant, filtros)     -> (contexto, fontes, distancia_media); vazio se indisponível
+- obter_facetas(tenant)                      -> valores disponíveis das facetas (filtros das interfaces)
+- obter_resposta_llama(pergunta, contexto)   -> resposta
+- obter_resposta_llama_stream(pergunta, contexto) -> fragmentos da resposta
+- gerar_texto(prompt)                        -> texto gerado a partir de um prompt livre (exceção em falhas)
+
+Se SERVICE_URL estiver definido, as chamadas vão ao serviço via HTTP (apenas
+biblioteca padrão). Caso contrário, as funções são importadas e executadas no
+próprio processo, como antes.
+"""
+
+# ——————————————————————————————
+# Bibliotecas
+import os
+import json
+import urllib.error
+import urllib.request
+from typing import Iterator, List, Tuple
+from dotenv import load_dotenv
+
+from metrics.instrumentation import incorporar_tempos, span
+
+# ——————————————————————————————
+# Carrega variáveis de ambiente
+load_dotenv()
+SERVICE_URL = os.getenv("SERVICE_URL", "").rstrip("/")
+SERVICE_TIMEOUT = int(os.getenv("SERVICE_TIMEOUT", 120))
+
+# Falhas de conexão: URLError cobre recusa/DNS/timeout na conexão; TimeoutError, o timeout na leitura
+FALHAS_CONEXAO = (urllib.error.URLError, TimeoutError)
+
+
+# ——————————————————————————————
+def _post(rota: str, dados: dict):
+    """Envia um POST JSON ao serviço e retorna o objeto de resposta aberto."""
+    requisicao = urllib.request.Request(
+        f"{SERVICE_URL}{rota}",
+        data=json.dumps(dados).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    return urllib.request.urlopen(requisicao, timeout=SERVICE_TIMEOUT)
+
+
+if SERVICE_URL:
+
+    def obter_resposta_precomputada(pergunta: str, tenant: str | None = None) -> dict | None:
+        """Busca a resposta pré-computada pelo endpoint /precomputed do serviço (None se indisponível)."""
+        try:
+            with span("service.precomputed"), \
+                    _post("/precomputed", {"pergunta": pergunta, "tenant": tenant}) as resposta:
+                return json.load(resposta)["precomputada"]
+        except FALHAS_CONEXAO:
+            # Sem o atalho, a pergunta segue o fluxo normal (busca + geração)
+            return None
+
+    def get_context(
+        query: str,
+        k: int | None = None,
+        tenant: str | None = None,
+        filtros: dict | None = None
+    ) -> Tuple[str, List[str], float]:
+        """Recupera o contexto do tenant pelo endpoint /context do serviço (contexto vazio se indisponível)."""
+        corpo = {"query": query, "k": k, "tenant": tenant, "filtros": filtros}
+        try:
+            with span("service.context"), _post("/context", corpo) as resposta:
+                dados = json.load(resposta)
+        except FALHAS_CONEXAO as error:
+            # Sem contexto, as interfaces respondem sem acionar o LLM em vez de falhar
+            print(f"⚠️ Serviço de inferência indisponível para /context: {error}")
+            return "", [], 0.0
+        incorporar_tempos(dados.get("tempos", {}))
+        return dados["contexto"], dados["fontes"], dados["distancia_media"]
+
+    def obter_facetas(tenant: str | None = None) -> dict:
+        """Valores das facetas do tenant pelo endpoint /facets do serviço."""
+        with _post("/facets", {"tenant": tenant}) as resposta:
+            return json.load(resposta)["facetas"]
+
+    def obter_resposta_llama(pergunta: str, contexto: str, options: dict | None = None) -> str:
+        """Gera a resposta pelo endpoint /answer do serviço."""
+        try:
+            with span("service.answer"), \
+                    _post("/answer", {"pergunta": pergunta, "contexto": contexto, "options": options}) as resposta:
+                dados = json.load(resposta)
+            incorporar_tempos(dados.get("tempos", {}))
+            return dados["resposta"]
+        except FALHAS_CONEXAO as error:
+            return f"Erro ao conectar com o serviço de inferência: {error}"
+
+    def obter_resposta_llama_stream(
+        pergunta: str,
+        contexto: str,
+        options: dict | None = None
+    ) -> Iterator[str]:
+        """Gera a resposta em fragmentos pelo endpoint /answer_stream do serviço."""
+        try:
+            with _post("/answer_stream", {"pergunta": pergunta, "contexto": contexto, "options": options}) as resposta:
+                for linha in resposta:
+                    dados = json.loads(linha)
+                    if dados.get("done"):
+                        break
+                    yield dados["token"]
+        except FALHAS_CONEXAO as error:
+            yield f"Erro ao conectar com o serviço de inferência: {error}"
+
+    def gerar_texto(prompt: str, options: dict | None = None) -> str:
+        """Gera texto a partir de um prompt livre pelo endpoint /generate (FALHAS_CONEXAO em falhas)."""
+        with _post("/generate", {"prompt": prompt, "options": options}) as resposta:
+            return json.load(resposta)["texto"]
+
+else:
+    # Modo local: recursos carregados no próprio processo da interface
+    from app_config.app_context import get_context
+    from store.chroma_store import listar_facetas as obter_facetas
+    from llm.llm import obter_resposta_llama, obter_resposta_llama_stream, gerar_texto
+    from llm.precomputed import buscar_resposta as obter_resposta_precomputada
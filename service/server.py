@@ -0,0 +1,185 @@
+"""
+service/server.py
+
+Serviço local de inferência compartilhado pelo Streamlit (app.py) e pelo Telegram (telegram_bot.py):
+- Mantém em um único processo a coleção do ChromaDB, o modelo de embeddings e o cliente Ollama
+- Evita carregar os modelos duas vezes e disputas de escrita na pasta de persistência do Chroma
+- Compartilha caches (ex.: respostas do LLM) entre todas as interfaces
+- Expõe uma API HTTP em localhost usando apenas a biblioteca padrão:
+    GET  /metrics         -> métricas no formato texto do Prometheus
+    GET  /health          -> {"status": "ok", "cache": {...}, "embedding_batches": {...}, "tenants": {...}}
+    POST /context         -> {"query", "k"?, "tenant"?, "filtros"?} => {"contexto", "fontes", "distancia_media", "tempos"}
+    POST /facets          -> {"tenant"?}                          => {"facetas": {"source", "tipo", "pagina", "dia"}}
+    POST /precomputed     -> {"pergunta", "tenant"?}               => {"precomputada": {...} | null}
+    POST /answer          -> {"pergunta", "contexto", "options"?} => {"resposta", "tempos"}
+    POST /answer_stream   -> mesmo corpo de /answer                => NDJSON: {"token": ...} ... {"done": true}
+    POST /generate        -> {"prompt", "options"?}               => {"texto"} (prompt livre, ex.: resumos)
+
+Uso:
+    python -m service.server
+"""
+
+# ——————————————————————————————
+# Bibliotecas
+import os
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+
+# ——————————————————————————————
+# Carrega variáveis de ambiente
+load_dotenv()
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", 8765))
+
+# ——————————————————————————————
+# Importação de módulos internos (carregados uma única vez, no processo do serviço)
+from app_config.app_context import get_context
+from llm.llm import obter_resposta_llama, obter_resposta_llama_stream, gerar_texto, response_cache
+from llm.precomputed import buscar_resposta, precomputed_answers
+from store.chroma_store import query_batcher, tenant_cache, listar_facetas
+from metrics.instrumentation import coletar_tempos, registry
+
+# Configuração básica de logging
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO
+)
+
+
+# ——————————————————————————————
+class InferenceHandler(BaseHTTPRequestHandler):
+    """Handler HTTP das rotas do serviço de inferência."""
+
+    server_version = "ChatbotInference/1.0"
+
+    def _ler_json(self) -> dict:
+        """Lê e decodifica o corpo JSON da requisição."""
+        tamanho = int(self.headers.get("Content-Length", 0))
+        corpo = self.rfile.read(tamanho) if tamanho else b"{}"
+        return json.loads(corpo or b"{}")
+
+    def _responder_json(self, status: int, dados: dict) -> None:
+        """Envia uma resposta JSON completa."""
+        corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._responder_json(200, {
+                "status": "ok",
+                "cache": response_cache.stats(),
+                "embedding_batches": query_batcher.metrics(),
+                "tenants": tenant_cache.stats(),
+                "precomputadas": precomputed_answers.stats()
+            })
+        elif self.path == "/metrics":
+            corpo = registry.export_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+        else:
+            self._responder_json(404, {"erro": f"Rota não encontrada: {self.path}"})
+
+    def do_POST(self):
+        try:
+            dados = self._ler_json()
+        except json.JSONDecodeError as error:
+            self._responder_json(400, {"erro": f"JSON inválido: {error}"})
+            return
+
+        try:
+            if self.path == "/context":
+                kwargs = {"k": int(dados["k"])} if dados.get("k") else {}
+                with coletar_tempos() as tempos:
+                    contexto, fontes, distancia_media = get_context(
+                        dados["query"], tenant=dados.get("tenant"), filtros=dados.get("filtros"), **kwargs
+                    )
+                self._responder_json(200, {
+                    "contexto": contexto,
+                    "fontes": fontes,
+                    "distancia_media": distancia_media,
+                    "tempos": tempos
+                })
+
+            elif self.path == "/facets":
+                self._responder_json(200, {"facetas": listar_facetas(dados.get("tenant"))})
+
+            elif self.path == "/precomputed":
+                self._responder_json(200, {
+                    "precomputada": buscar_resposta(dados["pergunta"], dados.get("tenant"))
+                })
+
+            elif self.path == "/answer":
+                with coletar_tempos() as tempos:
+                    resposta = obter_resposta_llama(
+                        pergunta=dados["pergunta"],
+                        contexto=dados.get("contexto", ""),
+                        options=dados.get("options")
+                    )
+                self._responder_json(200, {"resposta": resposta, "tempos": tempos})
+
+            elif self.path == "/answer_stream":
+                self._responder_stream(dados)
+
+            elif self.path == "/generate":
+                self._responder_json(200, {"texto": gerar_texto(dados["prompt"], options=dados.get("options"))})
+
+            else:
+                self._responder_json(404, {"erro": f"Rota não encontrada: {self.path}"})
+
+        except KeyError as error:
+            self._responder_json(400, {"erro": f"Campo obrigatório ausente: {error}"})
+        except ValueError as error:
+            # Ex.: tenant não configurado ou filtro inválido
+            self._responder_json(400, {"erro": str(error)})
+        except Exception as error:
+            logging.error(f"Erro em {self.path}: {error}")
+            self._responder_json(500, {"erro": str(error)})
+
+    def _responder_stream(self, dados: dict) -> None:
+        """Envia a resposta do LLM fragmento a fragmento, uma linha JSON por fragmento."""
+        fragmentos = obter_resposta_llama_stream(
+            pergunta=dados["pergunta"],
+            contexto=dados.get("contexto", ""),
+            options=dados.get("options")
+        )
+
+        # Sem Content-Length: o fim do corpo é sinalizado pelo fechamento da conexão
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for fragmento in fragmentos:
+            self.wfile.write(json.dumps({"token": fragmento}, ensure_ascii=False).encode("utf-8") + b"\n")
+            self.wfile.flush()
+        self.wfile.write(b'{"done": true}\n')
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} - {format % args}")
+
+
+# ——————————————————————————————
+def main():
+    """Inicia o serviço de inferência em SERVICE_HOST:SERVICE_PORT."""
+    server = ThreadingHTTPServer((SERVICE_HOST, SERVICE_PORT), InferenceHandler)
+    server.daemon_threads = True
+    logging.info(f"Serviço de inferência ouvindo em http://{SERVICE_HOST}:{SERVICE_PORT}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
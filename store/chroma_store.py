@@ -4,48 +4,303 @@ store/chroma_store.py
 Módulo de abstração para interação com o ChromaDB, incluindo:
 - Configuração e inicialização do cliente persistente
 - Definição da função de embedding usando SentenceTransformers
-- Criação/recuperação da collection para documentos
-- Funções utilitárias para adicionar documentos e limpar a coleção
+- Uma collection de documentos por tenant (store/tenants.py): 'documents' no tenant
+  padrão e 'documents_<tenant>' nos demais
+- Micro-batcher de embeddings de consulta compartilhado pelas buscas concorrentes
+- Armazenamento do texto dos chunks fora do índice (store/text_store.py), opcional
+- Índice comprimido (PCA + int8) com re-rank exato (store/compressed_index.py), opcional
+- LRU dos recursos abertos por tenant com orçamento de memória: tenants ociosos são
+  fechados e reabertos sob demanda
+- Pré-filtro das buscas por facetas (fonte, tipo, página, dia de ingestão) via posting
+  lists (store/facet_index.py): conjuntos pequenos são pontuados de forma exata, sem
+  percorrer o índice; os grandes viram um 'where' do Chroma ou máscara do índice comprimido
+- Funções utilitárias para adicionar, buscar textos, remover documentos e limpar a coleção
 """
 
 # ——————————————————————————————
 import os
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
 import chromadb
+from chromadb.config import Settings
 from dotenv import load_dotenv
 from chromadb.utils.embedding_functions import HuggingFaceEmbeddingFunction
 
+from embeddings.batcher import QueryEmbeddingBatcher
+from metrics.instrumentation import registry, span
+from store.text_store import TextStore
+from store.compressed_index import CompressedIndex
+from store.facet_index import FacetIndex, filtro_chroma
+from store.tenants import TENANT_DEFAULT, validar_tenant
+
 # ——————————————————————————————
 # 1) Carrega variáveis de ambiente do arquivo .env (opções de persistência, URL, etc.)
 load_dotenv()
 persist_dir = os.getenv("CHROMA_PERSIST_DIR", "chroma_db")
 model_name = os.getenv("MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
 hf_api_key = os.getenv("HF_API_KEY")
+# "hf_api" (API de inferência do Hugging Face) ou "local" (modelo na CPU, com EMBED_QUANTIZE opcional)
+embed_backend = os.getenv("EMBED_BACKEND", "hf_api")
+embed_batch_max = int(os.getenv("EMBED_BATCH_MAX", 32))
+embed_batch_wait_ms = float(os.getenv("EMBED_BATCH_WAIT_MS", 5))
+# Tempo máximo (s) de espera pelo embedding de uma consulta
+embed_query_timeout = float(os.getenv("EMBED_QUERY_TIMEOUT") or 30)
+text_store_enabled = os.getenv("TEXT_STORE_ENABLED", "1") == "1"
+text_store_dir = os.getenv("TEXT_STORE_DIR") or os.path.join(persist_dir, "textos")
+text_store_compression = os.getenv("TEXT_STORE_COMPRESSION", "none")
+vector_compression = os.getenv("VECTOR_COMPRESSION", "none")
+vector_index_dir = os.getenv("VECTOR_INDEX_DIR") or os.path.join(persist_dir, "vetores")
+vector_pca_dim = int(os.getenv("VECTOR_PCA_DIM", 128))
+vector_rerank_factor = int(os.getenv("VECTOR_RERANK_FACTOR", 4))
+facet_index_dir = os.getenv("FACET_INDEX_DIR") or os.path.join(persist_dir, "facetas")
+# Conjuntos pré-filtrados com até este número de chunks são pontuados de forma exata
+facet_exact_max = int(os.getenv("FACET_EXACT_MAX", 2000))
+# Tenants abertos ao mesmo tempo, memória estimada máxima (MB; 0 desativa) e tempo ocioso até o fechamento (s)
+tenant_max_open = int(os.getenv("TENANT_MAX_OPEN", 8))
+tenant_memory_mb = float(os.getenv("TENANT_MEMORY_MB", 1024))
+tenant_idle_s = float(os.getenv("TENANT_IDLE_S", 1800))
 
 # ——————————————————————————————
-# 2) Cria o cliente persistente do ChromaDB, armazenando índices em disco
-client = chromadb.PersistentClient(path=persist_dir)
+# 2) Cria o cliente persistente do ChromaDB, armazenando índices em disco.
+#    Com orçamento de memória, o próprio Chroma mantém em LRU os índices HNSW carregados,
+#    liberando os das coleções (tenants) menos usadas
+if tenant_memory_mb > 0:
+    client = chromadb.PersistentClient(
+        path=persist_dir,
+        settings=Settings(
+            chroma_segment_cache_policy="LRU",
+            chroma_memory_limit_bytes=int(tenant_memory_mb * 1024 ** 2)
+        )
+    )
+else:
+    client = chromadb.PersistentClient(path=persist_dir)
 
 # ——————————————————————————————
 # 3) Define a função de embedding baseada em SentenceTransformers
-#    Utiliza o modelo 'all-MiniLM-L6-v2' para criar vetores de alta qualidade
-embedding_fn = HuggingFaceEmbeddingFunction(
-    model_name=model_name,
-    api_key=hf_api_key
+#    Utiliza o modelo 'all-MiniLM-L6-v2' para criar vetores de alta qualidade,
+#    via API do Hugging Face ou localmente (embeddings/embedder.py)
+if embed_backend == "local":
+    from embeddings.embedder import LocalEmbeddingFunction
+    embedding_fn = LocalEmbeddingFunction()
+else:
+    embedding_fn = HuggingFaceEmbeddingFunction(
+        model_name=model_name,
+        api_key=hf_api_key
+    )
+
+# ——————————————————————————————
+# 4) Micro-batcher das consultas: agrupa perguntas concorrentes em um único lote de embedding,
+#    usando a mesma função de embedding das coleções para manter os vetores compatíveis
+#    (o modelo é o mesmo para todos os tenants)
+query_batcher = QueryEmbeddingBatcher(
+    embed_fn=embedding_fn,
+    max_batch=embed_batch_max,
+    max_wait_ms=embed_batch_wait_ms
+)
+registry.gauge(
+    "embedding_batch_mean_size", lambda: query_batcher.metrics()["lote_medio"],
+    "Tamanho médio dos lotes de embedding de consulta"
 )
+registry.gauge(
+    "embedding_batch_wait_p95_ms", lambda: query_batcher.metrics()["espera_p95_ms"],
+    "Percentil 95 da espera na fila do micro-batcher, em ms"
+)
+
+
+# ——————————————————————————————
+def pasta_tenant(base: str, tenant: str) -> str:
+    """Pasta de um tenant: a própria 'base' no tenant padrão, 'base/tenants/<tenant>' nos demais."""
+    return base if tenant == TENANT_DEFAULT else os.path.join(base, "tenants", tenant)
+
+
+def nome_colecao(tenant: str) -> str:
+    """Coleção do Chroma de um tenant: 'documents' no tenant padrão, 'documents_<tenant>' nos demais."""
+    return "documents" if tenant == TENANT_DEFAULT else f"documents_{tenant}"
+
+
+class TenantStore:
+    """
+    Recursos de um tenant: coleção do Chroma, text store, índice comprimido e
+    índice de facetas.
+
+    O tenant padrão usa a coleção 'documents' e as pastas já existentes
+    (TEXT_STORE_DIR, VECTOR_INDEX_DIR, FACET_INDEX_DIR); os demais, 'documents_<tenant>'
+    e subpastas 'tenants/<tenant>' dessas mesmas pastas.
+    """
+
+    def __init__(self, tenant: str):
+        self.tenant = tenant
+
+        # Garante a existência da coleção com configuração para espaço de similaridade 'cosine'
+        self.collection = client.get_or_create_collection(
+            name=nome_colecao(tenant),
+            embedding_function=embedding_fn,
+            metadata={"hnsw:space": "cosine"}  # Configuração recomendada para versões recentes do Chroma
+        )
+
+        # Texto dos chunks fora do índice: o Chroma guarda só vetores e metadados
+        self.text_store = (
+            TextStore(pasta_tenant(text_store_dir, tenant), compressao=text_store_compression)
+            if text_store_enabled else None
+        )
+
+        # Índice comprimido para as buscas: com ele, as consultas não carregam o índice HNSW
+        # do Chroma (vetores float32) em memória, apenas os códigos int8
+        self.compressed_index = (
+            CompressedIndex(pasta_tenant(vector_index_dir, tenant), dimensao=vector_pca_dim)
+            if vector_compression == "pca_int8" else None
+        )
+
+        # Posting lists das facetas, para os pré-filtros das buscas
+        self.facet_index = FacetIndex(pasta_tenant(facet_index_dir, tenant))
+        self._facetas_verificadas = False
+        self._lock = threading.Lock()
+
+        # Dimensão dos vetores, conhecida na primeira busca pelo índice HNSW (que o Chroma
+        # só carrega nesse momento); usada na estimativa de memória
+        self.dimensao = None
+        self.ultimo_uso = time.monotonic()
+
+    def facetas(self) -> FacetIndex:
+        """
+        Índice de facetas do tenant. Na primeira vez, se ele estiver vazio e a coleção
+        não (coleção indexada antes do índice de facetas), é preenchido a partir dos
+        metadados do Chroma.
+        """
+        with self._lock:
+            if not self._facetas_verificadas:
+                total = self.collection.count()
+                if total and self.facet_index.vazio():
+                    print(f"🏷️  Indexando as facetas de {total} chunks do tenant '{self.tenant}'...")
+                    for inicio in range(0, total, 5000):
+                        dados = self.collection.get(include=["metadatas"], limit=5000, offset=inicio)
+                        self.facet_index.add(dados["ids"], dados["metadatas"])
+                self._facetas_verificadas = True
+        return self.facet_index
+
+    def bytes_estimados(self) -> int:
+        """Memória estimada do tenant: códigos do índice comprimido ou vetores float32 do HNSW."""
+        if self.compressed_index is not None:
+            return self.compressed_index.stats()["bytes_memoria"]
+        if self.dimensao:
+            return self.collection.count() * self.dimensao * 4
+        return 0
+
 
 # ——————————————————————————————
-# 4) Garante a existência da coleção 'documents' com configuração para espaço de similaridade 'cosine'
-collection = client.get_or_create_collection(
-    name="documents",
-    embedding_function=embedding_fn,
-    metadata={"hnsw:space": "cosine"}  # Configuração recomendada para versões recentes do Chroma
+class TenantCache:
+    """
+    LRU dos recursos abertos por tenant, com orçamento de memória.
+
+    Ao abrir um tenant, fecha os usados há mais tempo enquanto houver mais de
+    'max_abertos' tenants ou a memória estimada passar de 'memoria_max'; a cada
+    acesso, fecha também os ociosos há mais de 'ocioso_s' segundos. Um tenant
+    fechado é reaberto sob demanda no próximo acesso. Buscas em andamento mantêm
+    a referência aos recursos que já obtiveram, então o fechamento apenas os
+    retira do cache.
+    """
+
+    def __init__(self, max_abertos: int, memoria_max: int, ocioso_s: float):
+        """
+        Args:
+            max_abertos (int): Número máximo de tenants abertos.
+            memoria_max (int): Memória estimada máxima, em bytes (0 desativa o limite).
+            ocioso_s (float): Tempo sem acesso após o qual um tenant é fechado.
+        """
+        self.max_abertos = max(1, max_abertos)
+        self.memoria_max = memoria_max
+        self.ocioso_s = ocioso_s
+        self._abertos: OrderedDict[str, TenantStore] = OrderedDict()
+        self._lock = threading.Lock()
+        self._aberturas = registry.counter("tenant_opens_total", "Tenants abertos (inclui reaberturas após o fechamento)")
+        self._fechamentos = registry.counter("tenant_evictions_total", "Tenants fechados por LRU, memória ou ociosidade")
+
+    def obter(self, tenant: str | None = None) -> TenantStore:
+        """
+        Retorna os recursos do tenant (None: tenant padrão), abrindo-os se necessário.
+
+        Raises:
+            ValueError: Se o tenant não estiver configurado.
+        """
+        tenant = validar_tenant(tenant)
+        with self._lock:
+            loja = self._abertos.get(tenant)
+            aberto_agora = loja is None
+            if aberto_agora:
+                loja = TenantStore(tenant)
+                self._abertos[tenant] = loja
+                self._aberturas.inc()
+            self._abertos.move_to_end(tenant)
+            loja.ultimo_uso = time.monotonic()
+            self._fechar_excedentes(verificar_memoria=aberto_agora)
+        return loja
+
+    def _fechar_excedentes(self, verificar_memoria: bool) -> None:
+        """Fecha, do menos para o mais recente, os tenants excedentes ou ociosos (nunca o atual)."""
+        agora = time.monotonic()
+        while len(self._abertos) > 1:
+            tenant, loja = next(iter(self._abertos.items()))
+            if not (
+                len(self._abertos) > self.max_abertos
+                or agora - loja.ultimo_uso > self.ocioso_s
+                or (verificar_memoria and self.memoria_max and self._bytes_estimados() > self.memoria_max)
+            ):
+                break
+            self._abertos.pop(tenant)
+            self._fechamentos.inc()
+
+    def _bytes_estimados(self) -> int:
+        return sum(loja.bytes_estimados() for loja in self._abertos.values())
+
+    def stats(self) -> dict:
+        """Tenants abertos (do menos para o mais recente) e memória estimada total."""
+        with self._lock:
+            return {
+                "abertos": list(self._abertos),
+                "bytes_estimados": self._bytes_estimados(),
+                "max_abertos": self.max_abertos,
+                "memoria_max": self.memoria_max
+            }
+
+
+tenant_cache = TenantCache(tenant_max_open, int(tenant_memory_mb * 1024 ** 2), tenant_idle_s)
+registry.gauge("tenants_open", lambda: len(tenant_cache.stats()["abertos"]), "Tenants com recursos abertos")
+registry.gauge(
+    "tenants_memory_bytes", lambda: tenant_cache.stats()["bytes_estimados"],
+    "Memória estimada dos tenants abertos (índices comprimidos ou vetores HNSW), em bytes"
+)
+if vector_compression == "pca_int8":
+    registry.gauge(
+        "vector_index_memory_bytes", lambda: tenant_cache.stats()["bytes_estimados"],
+        "Memória dos vetores comprimidos (códigos int8 + escalas) dos tenants abertos, em bytes"
+    )
+
+
+def obter_tenant(tenant: str | None = None) -> TenantStore:
+    """Recursos do tenant informado (None: tenant padrão), via LRU de tenants abertos."""
+    return tenant_cache.obter(tenant)
+
+
+def listar_facetas(tenant: str | None = None) -> dict:
+    """Valores disponíveis das facetas do tenant (ver FacetIndex.valores), para os filtros das interfaces."""
+    return obter_tenant(tenant).facetas().valores()
+
+
+_prefiltros_exatos = registry.counter(
+    "retrieval_prefilter_exact_total", "Buscas pré-filtradas pontuadas de forma exata, sem percorrer o índice"
+)
+_candidatos_prefiltro = registry.histogram(
+    "retrieval_prefilter_candidates", "Chunks permitidos pelos filtros de facetas, por busca"
 )
 
 
 # ——————————————————————————————
-def add_documents(docs: list[dict]) -> None:
+def add_documents(docs: list[dict], tenant: str | None = None) -> None:
     """
-    Insere ou atualiza documentos na coleção do ChromaDB.
+    Insere ou atualiza documentos na coleção do ChromaDB do tenant.
 
     Cada item em docs deve ser um dicionário com as chaves:
         - "id": str, identificador único do chunk/documento
@@ -54,26 +309,54 @@ def add_documents(docs: list[dict]) -> None:
 
     Processo:
     1. Extrai ids, textos e metadatas da lista de dicionários.
-    2. Chama collection.upsert() para adicionar ou atualizar registros.
-    3. Persiste o estado no disco para garantir durabilidade.
+    2. Com o text store ativo, grava os textos nele e envia ao Chroma apenas os
+       embeddings e metadados; caso contrário, envia os textos como 'documents'.
+       Com o índice comprimido ativo, os mesmos embeddings também são gravados nele.
+    3. Chama collection.upsert() para adicionar ou atualizar registros.
+    4. Persiste o estado no disco para garantir durabilidade.
+    5. Indexa as facetas dos metadados (pré-filtros das buscas).
 
     Levanta exceção em caso de erro para que o pipeline possa capturá-lo.
     """
     try:
+        loja = obter_tenant(tenant)
+
         # Prepara listas para o método upsert
         ids = [d["id"] for d in docs]
         texts = [d["text"] for d in docs]
         metadatas = [d["metadata"] for d in docs]
 
-        # Upsert de documentos (insere ou atualiza)
-        collection.upsert(
-            ids=ids,
-            documents=texts,
-            metadatas=metadatas
-        )
+        # Upsert de documentos (insere ou atualiza); inclui o embedding dos textos
+        with span("store.add_documents"):
+            if loja.text_store is not None or loja.compressed_index is not None:
+                embeddings = embedding_fn(texts)
+                if loja.compressed_index is not None:
+                    loja.compressed_index.add(ids, embeddings)
+            if loja.text_store is not None:
+                loja.text_store.put_many(list(zip(ids, texts)))
+                loja.collection.upsert(
+                    ids=ids,
+                    embeddings=embeddings,
+                    metadatas=metadatas
+                )
+            elif loja.compressed_index is not None:
+                loja.collection.upsert(
+                    ids=ids,
+                    embeddings=embeddings,
+                    documents=texts,
+                    metadatas=metadatas
+                )
+            else:
+                loja.collection.upsert(
+                    ids=ids,
+                    documents=texts,
+                    metadatas=metadatas
+                )
 
-        # Garantia de persistência em disco
-        client.persist()
+            # Garantia de persistência em disco
+            client.persist()
+            loja.facet_index.add(ids, metadatas)
+        registry.counter("store_chunks_indexed_total", "Chunks inseridos ou atualizados no ChromaDB").inc(len(ids))
 
     except Exception as e:
         print(f"❌ Erro ao adicionar documentos: {str(e)}")
@@ -82,21 +365,180 @@ def add_documents(docs: list[dict]) -> None:
 
 
 # ——————————————————————————————
-def limpar_colecao() -> bool:
+def _busca_exata(
+    loja: TenantStore,
+    query_embedding: list[float],
+    k: int,
+    ids: list[str]
+) -> tuple[list[str], list[dict], list[float]]:
+    """Pontua de forma exata (cosseno) apenas os chunks informados, sem percorrer o índice."""
+    result = loja.collection.get(ids=ids, include=["embeddings", "metadatas"])
+    if not result["ids"]:
+        return [], [], []
+    vetores = np.asarray(result["embeddings"], dtype=np.float32)
+    vetores /= np.maximum(np.linalg.norm(vetores, axis=1, keepdims=True), 1e-12)
+    q = np.asarray(query_embedding, dtype=np.float32)
+    distancias = 1.0 - vetores @ (q / max(float(np.linalg.norm(q)), 1e-12))
+    ordem = np.argsort(distancias)[:k]
+    return (
+        [result["ids"][i] for i in ordem],
+        [result["metadatas"][i] or {} for i in ordem],
+        [float(distancias[i]) for i in ordem]
+    )
+
+
+def buscar(
+    query_embedding: list[float],
+    k: int,
+    tenant: str | None = None,
+    filtros: dict | None = None
+) -> tuple[list[str], list[dict], list[float]]:
+    """
+    Busca os k chunks do tenant mais próximos de um embedding de consulta.
+
+    Com o índice comprimido, pré-seleciona VECTOR_RERANK_FACTOR·k candidatos no
+    espaço PCA + int8, reordena-os com os vetores completos e busca no Chroma apenas
+    os metadados; caso contrário, consulta o índice do próprio Chroma.
+
+    Com filtros (normalizados por store.facet_index.normalizar_filtros), os chunks
+    permitidos vêm das posting lists antes da busca: até FACET_EXACT_MAX chunks são
+    pontuados diretamente; acima disso, a busca no índice é restrita a eles.
+
+    Returns:
+        tuple[list[str], list[dict], list[float]]: Ids, metadados e distâncias cosseno,
+        em ordem crescente de distância.
+    """
+    loja = obter_tenant(tenant)
+    permitidos = None
+    if filtros:
+        permitidos = loja.facetas().filtrar(filtros)
+        _candidatos_prefiltro.record(len(permitidos))
+        if not permitidos:
+            return [], [], []
+        if len(permitidos) <= facet_exact_max:
+            _prefiltros_exatos.inc()
+            return _busca_exata(loja, query_embedding, k, sorted(permitidos))
+
+    if loja.compressed_index is None:
+        loja.dimensao = len(query_embedding)
+        extra = {"where": filtro_chroma(filtros, loja.facet_index.fontes(permitidos))} if permitidos else {}
+        result = loja.collection.query(
+            query_embeddings=[query_embedding],
+            n_results=k,
+            include=["metadatas", "distances"],
+            **extra
+        )
+        return result["ids"][0], result["metadatas"][0], result["distances"][0]
+
+    ids, distances = loja.compressed_index.search(
+        query_embedding, k, candidatos=vector_rerank_factor * k, permitidos=permitidos
+    )
+    if not ids:
+        return [], [], []
+    result = loja.collection.get(ids=ids, include=["metadatas"])
+    por_id = dict(zip(result["ids"], result["metadatas"]))
+    return ids, [por_id.get(i) or {} for i in ids], distances
+
+
+def obter_embeddings(ids: list[str], tenant: str | None = None) -> list[list[float]]:
+    """
+    Busca os embeddings dos chunks informados, na mesma ordem dos ids
+    (usados, por exemplo, na diversificação MMR dos resultados).
+    """
+    loja = obter_tenant(tenant)
+    if loja.compressed_index is not None:
+        return loja.compressed_index.get_vetores(ids).tolist()
+    result = loja.collection.get(ids=ids, include=["embeddings"])
+    por_id = dict(zip(result["ids"], result["embeddings"]))
+    return [list(por_id[i]) for i in ids]
+
+
+def ajustar_indice_comprimido(tenant: str | None = None) -> dict | None:
+    """
+    Ajusta a PCA do índice comprimido do tenant aos vetores indexados e recodifica-os
+    (chamado ao final da ingestão). Retorna as estatísticas de memória, ou None
+    se o índice comprimido estiver desativado.
+    """
+    loja = obter_tenant(tenant)
+    if loja.compressed_index is None:
+        return None
+    with span("store.fit_compressed_index"):
+        loja.compressed_index.ajustar()
+    return loja.compressed_index.stats()
+
+
+# ——————————————————————————————
+def obter_textos(ids: list[str], tenant: str | None = None) -> list[str]:
+    """
+    Busca o texto dos chunks informados, na mesma ordem dos ids.
+
+    Usa o text store e, para ids ausentes dele (ex.: índices criados antes do
+    text store), recorre aos 'documents' guardados no próprio Chroma.
+
+    Args:
+        ids (list[str]): Ids dos chunks.
+        tenant (str | None): Tenant dos chunks (None: tenant padrão).
+
+    Returns:
+        list[str]: Textos correspondentes ("" para ids inexistentes).
+    """
+    loja = obter_tenant(tenant)
+    textos = loja.text_store.get_many(ids) if loja.text_store is not None else [None] * len(ids)
+    faltantes = [chunk_id for chunk_id, texto in zip(ids, textos) if texto is None]
+    if faltantes:
+        result = loja.collection.get(ids=faltantes, include=["documents"])
+        do_chroma = dict(zip(result["ids"], result["documents"] or []))
+        textos = [
+            texto if texto is not None else (do_chroma.get(chunk_id) or "")
+            for chunk_id, texto in zip(ids, textos)
+        ]
+    return textos
+
+
+# ——————————————————————————————
+def remover_documentos(ids: list[str], tenant: str | None = None) -> None:
+    """
+    Remove chunks específicos da coleção e do text store do tenant (ex.: páginas
+    alteradas de um PDF na ingestão incremental).
+
+    Levanta exceção em caso de erro para que o pipeline possa capturá-lo.
+    """
+    if not ids:
+        return
+    loja = obter_tenant(tenant)
+    with span("store.remove_documents"):
+        loja.collection.delete(ids=ids)
+        client.persist()
+        if loja.text_store is not None:
+            loja.text_store.delete(ids)
+        if loja.compressed_index is not None:
+            loja.compressed_index.delete(ids)
+        loja.facet_index.delete(ids)
+
+
+# ——————————————————————————————
+def limpar_colecao(tenant: str | None = None) -> bool:
     """
-    Remove de forma segura todos os documentos da coleção 'documents'.
+    Remove de forma segura todos os documentos da coleção do tenant.
 
     Utiliza uma condição 'where' ampla para deletar todos os itens
-    que possuam qualquer metadado 'source' (ou seja, todos os documentos).
+    que possuam qualquer metadado 'source' (ou seja, todos os documentos),
+    e esvazia o text store.
 
     Retorna:
         True  - se a limpeza foi bem-sucedida
         False - em caso de falha, com mensagem de erro impressa
     """
     try:
+        loja = obter_tenant(tenant)
         # Deleta todos os documentos que tenham 'source' definido (toda a coleção)
-        collection.delete(where={"source": {"$ne": ""}})
+        loja.collection.delete(where={"source": {"$ne": ""}})
         client.persist()
+        if loja.text_store is not None:
+            loja.text_store.clear()
+        if loja.compressed_index is not None:
+            loja.compressed_index.clear()
+        loja.facet_index.clear()
         return True
 
     except Exception as e:
@@ -113,6 +555,7 @@ if __name__ == "__main__":
         "metadata": {"source": "unit-test"}
     }]
     add_documents(sample)
+    collection = obter_tenant().collection
     total = collection.count()
     metadatas = collection.get(include=["metadatas"])["metadatas"]
     print(f"✅ Indexados {total} documento(s). Fontes: {metadatas}")
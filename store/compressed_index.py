@@ -0,0 +1,368 @@
+"""
+store/compressed_index.py
+
+Índice vetorial comprimido, mantido ao lado do ChromaDB, incluindo:
+- Projeção PCA aprendida na ingestão (384 -> VECTOR_PCA_DIM dimensões)
+- Vetores projetados quantizados em int8, com escala por vetor, mantidos em memória
+- Vetores completos (float32, normalizados) em disco, lidos via memória mapeada
+  apenas para reordenar (re-rank exato) um pequeno conjunto de candidatos
+- Arquivos append-only e releitura incremental, para enxergar a ingestão feita por
+  outro processo (pipeline), no mesmo espírito do store/text_store.py (inclusive a
+  marca de geração, que faz os leitores descartarem o índice após uma limpeza)
+
+A busca percorre os códigos int8 (n x d bytes) em vez da matriz float32 (n x 384 x 4
+bytes), seleciona 'candidatos' vizinhos e recalcula a similaridade cosseno exata
+deles a partir dos vetores completos em disco.
+"""
+
+# ——————————————————————————————
+import os
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from store.text_store import nova_geracao, recriar_arquivo, assinatura_arquivo
+
+
+# ——————————————————————————————
+class CompressedIndex:
+    """
+    Índice de vetores normalizados com busca em espaço PCA + int8 e re-rank exato.
+
+    Cada vetor adicionado ocupa uma linha em 'vetores.f32'; o arquivo 'ids.idx'
+    (JSON por linha) associa ids a linhas e registra remoções (a última entrada vence).
+    Linhas acrescentadas antes do ajuste da PCA ('ajustar') são buscadas de forma exata.
+    """
+
+    def __init__(self, pasta: str, dimensao: int = 128, bloco_busca: int = 65536):
+        """
+        Args:
+            pasta (str): Pasta dos arquivos do índice.
+            dimensao (int): Dimensão após a projeção PCA.
+            bloco_busca (int): Linhas pontuadas por vez (limita a memória temporária da busca).
+        """
+        self.pasta = Path(pasta)
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self.caminho_vetores = self.pasta / "vetores.f32"
+        self.caminho_indice = self.pasta / "ids.idx"
+        self.caminho_pca = self.pasta / "pca.npz"
+        self.caminho_codigos = self.pasta / "codigos.i8"
+        self.caminho_escalas = self.pasta / "escalas.f32"
+        for caminho in (self.caminho_vetores, self.caminho_indice, self.caminho_codigos, self.caminho_escalas):
+            caminho.touch(exist_ok=True)
+
+        self.dimensao = dimensao
+        self.bloco_busca = bloco_busca
+        self._lock = threading.RLock()
+        self._resetar_estado()
+
+    # ——————————————————————————————
+    def _resetar_estado(self) -> None:
+        self._dim_original = None
+        self._ids_linhas: list[str | None] = []
+        self._linha_por_id: dict[str, int] = {}
+        self._posicao_indice = 0
+        self._geracao = None
+        self._assinatura_indice = None
+        self._assinatura_pca = None
+        self._media = None
+        self._componentes = None
+        self._codigos = np.empty((0, self.dimensao), dtype=np.int8)
+        self._escalas = np.empty((0, 2), dtype=np.float32)
+        self._vetores = None
+
+    def _carregar_indice(self) -> None:
+        """
+        Lê as entradas de 'ids.idx' acrescentadas desde a última leitura; se a primeira
+        linha (geração) mudou, o índice foi recriado e tudo é relido do início.
+        """
+        with open(self.caminho_indice, "rb") as f:
+            geracao = f.readline()
+            if geracao != self._geracao:
+                self._resetar_estado()
+                self._geracao = geracao
+            f.seek(self._posicao_indice)
+            for linha in f:
+                if not linha.endswith(b"\n"):
+                    break
+                self._posicao_indice += len(linha)
+                entrada = json.loads(linha)
+                if "geracao" in entrada:
+                    continue
+                if "dim" in entrada:
+                    self._dim_original = entrada["dim"]
+                    continue
+                anterior = self._linha_por_id.pop(entrada["id"], None)
+                if anterior is not None:
+                    self._ids_linhas[anterior] = None
+                if not entrada.get("deleted"):
+                    linha_vetor = entrada["row"]
+                    self._ids_linhas.extend([None] * (linha_vetor + 1 - len(self._ids_linhas)))
+                    self._ids_linhas[linha_vetor] = entrada["id"]
+                    self._linha_por_id[entrada["id"]] = linha_vetor
+            estado = os.fstat(f.fileno())
+            self._assinatura_indice = (
+                (estado.st_ino, estado.st_size, estado.st_mtime_ns)
+                if estado.st_size == self._posicao_indice else None
+            )
+
+    def _carregar_pca(self) -> None:
+        """(Re)carrega a projeção PCA e os códigos int8, se o ajuste mudou desde a última leitura."""
+        if not self.caminho_pca.exists():
+            self._assinatura_pca = None
+            self._media = self._componentes = None
+            self._codigos = np.empty((0, self.dimensao), dtype=np.int8)
+            self._escalas = np.empty((0, 2), dtype=np.float32)
+            return
+
+        estado = self.caminho_pca.stat()
+        assinatura = (estado.st_mtime_ns, estado.st_size, self.caminho_codigos.stat().st_size)
+        if assinatura == self._assinatura_pca:
+            return
+        with np.load(self.caminho_pca) as pca:
+            self._media = pca["media"]
+            self._componentes = pca["componentes"]
+        dimensao = self._componentes.shape[0]
+        codigos = np.fromfile(self.caminho_codigos, dtype=np.int8)
+        escalas = np.fromfile(self.caminho_escalas, dtype=np.float32)
+        linhas = min(len(codigos) // dimensao, len(escalas) // 2)
+        self._codigos = codigos[:linhas * dimensao].reshape(linhas, dimensao)
+        self._escalas = escalas[:linhas * 2].reshape(linhas, 2)
+        self._assinatura_pca = assinatura
+
+    def _sincronizar(self) -> None:
+        """
+        Acompanha escritas de outros processos: índice de ids alterado (inode, tamanho ou
+        mtime) indica novas linhas ou, com outra geração, limpeza (relê tudo); PCA
+        alterada, novos códigos.
+        """
+        if assinatura_arquivo(self.caminho_indice) != self._assinatura_indice:
+            self._carregar_indice()
+            self._vetores = None
+        self._carregar_pca()
+
+    def _matriz_vetores(self) -> np.ndarray:
+        """Vetores completos (float32) mapeados em memória; só as linhas lidas vão para a RAM."""
+        if self._dim_original is None:
+            return np.empty((0, 0), dtype=np.float32)
+        linhas = self.caminho_vetores.stat().st_size // (4 * self._dim_original)
+        if self._vetores is None or self._vetores.shape[0] != linhas:
+            self._vetores = (
+                np.memmap(self.caminho_vetores, dtype=np.float32, mode="r", shape=(linhas, self._dim_original))
+                if linhas else np.empty((0, self._dim_original), dtype=np.float32)
+            )
+        return self._vetores
+
+    # ——————————————————————————————
+    def _codificar(self, vetores: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Projeta na PCA e quantiza em int8 com escala por vetor.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Códigos int8 (n x d) e, por vetor, [escala, viés],
+            onde o viés (média · vetor) completa a aproximação do produto interno.
+        """
+        projetados = (vetores - self._media) @ self._componentes.T
+        escala = np.maximum(np.abs(projetados).max(axis=1), 1e-12) / 127.0
+        codigos = np.clip(np.rint(projetados / escala[:, None]), -127, 127).astype(np.int8)
+        vies = vetores @ self._media
+        return codigos, np.stack([escala, vies], axis=1).astype(np.float32)
+
+    def add(self, ids: list[str], vetores) -> None:
+        """
+        Acrescenta (ou substitui) vetores; são normalizados e, se a PCA já foi
+        ajustada, codificados imediatamente.
+        """
+        vetores = np.asarray(vetores, dtype=np.float32)
+        if not len(ids):
+            return
+        vetores = vetores / np.maximum(np.linalg.norm(vetores, axis=1, keepdims=True), 1e-12)
+
+        with self._lock:
+            self._sincronizar()
+            entradas = []
+            if self._dim_original is None:
+                self._dim_original = vetores.shape[1]
+                entradas.append({"dim": self._dim_original})
+            elif vetores.shape[1] != self._dim_original:
+                raise ValueError(f"Dimensão {vetores.shape[1]} difere da do índice ({self._dim_original})")
+
+            primeira = self.caminho_vetores.stat().st_size // (4 * self._dim_original)
+            with open(self.caminho_vetores, "ab") as f:
+                vetores.tofile(f)
+
+            # Linhas novas só são codificadas se as anteriores já estiverem (mantém o alinhamento)
+            if self._componentes is not None and len(self._codigos) == primeira:
+                codigos, escalas = self._codificar(vetores)
+                with open(self.caminho_codigos, "ab") as f:
+                    codigos.tofile(f)
+                with open(self.caminho_escalas, "ab") as f:
+                    escalas.tofile(f)
+
+            entradas.extend({"id": i, "row": primeira + n} for n, i in enumerate(ids))
+            with open(self.caminho_indice, "ab") as f:
+                f.write(b"".join(json.dumps(e).encode("utf-8") + b"\n" for e in entradas))
+            self._sincronizar()
+
+    def delete(self, ids: list[str]) -> None:
+        """Marca ids como removidos (entradas de remoção no índice)."""
+        with self._lock, open(self.caminho_indice, "ab") as f:
+            f.write(b"".join(json.dumps({"id": i, "deleted": True}).encode("utf-8") + b"\n" for i in ids))
+            f.flush()
+            self._sincronizar()
+
+    def clear(self) -> None:
+        """
+        Remove todo o conteúdo do índice, inclusive a PCA.
+
+        Os arquivos são recriados (não truncados), começando pelo índice de ids com uma
+        nova geração: outros processos descartam o estado antes de ver os novos vetores.
+        """
+        with self._lock:
+            self._vetores = None
+            recriar_arquivo(self.caminho_indice, nova_geracao())
+            self.caminho_pca.unlink(missing_ok=True)
+            for caminho in (self.caminho_vetores, self.caminho_codigos, self.caminho_escalas):
+                recriar_arquivo(caminho)
+            self._resetar_estado()
+
+    # ——————————————————————————————
+    def ajustar(self, amostra_max: int = 50000, seed: int = 0) -> bool:
+        """
+        Aprende a PCA a partir dos vetores ativos (amostra de até 'amostra_max') e
+        recodifica todas as linhas. Chamado ao final da ingestão.
+
+        Returns:
+            bool: True se a PCA foi ajustada (é preciso ao menos 'dimensao' vetores).
+        """
+        with self._lock:
+            self._sincronizar()
+            vetores = self._matriz_vetores()
+            ativas = np.array(sorted(self._linha_por_id.values()), dtype=np.int64)
+            if len(ativas) < self.dimensao:
+                return False
+
+            rng = np.random.default_rng(seed)
+            amostra = ativas if len(ativas) <= amostra_max else np.sort(rng.choice(ativas, amostra_max, replace=False))
+            dados = np.asarray(vetores[amostra], dtype=np.float32)
+            media = dados.mean(axis=0)
+            _, _, vt = np.linalg.svd(dados - media, full_matrices=False)
+            self._media, self._componentes = media, vt[:self.dimensao].astype(np.float32)
+
+            # Recodifica em arquivos temporários e troca de forma atômica
+            tmp_codigos = self.caminho_codigos.with_suffix(".tmp")
+            tmp_escalas = self.caminho_escalas.with_suffix(".tmp")
+            with open(tmp_codigos, "wb") as fc, open(tmp_escalas, "wb") as fe:
+                for inicio in range(0, vetores.shape[0], self.bloco_busca):
+                    codigos, escalas = self._codificar(np.asarray(vetores[inicio:inicio + self.bloco_busca]))
+                    codigos.tofile(fc)
+                    escalas.tofile(fe)
+            os.replace(tmp_codigos, self.caminho_codigos)
+            os.replace(tmp_escalas, self.caminho_escalas)
+            tmp_pca = self.pasta / "pca.tmp.npz"
+            np.savez(tmp_pca, media=self._media, componentes=self._componentes)
+            os.replace(tmp_pca, self.caminho_pca)
+            self._assinatura_pca = None
+            self._sincronizar()
+            return True
+
+    # ——————————————————————————————
+    def search(self, consulta, k: int, candidatos: int | None = None,
+               permitidos=None) -> tuple[list[str], list[float]]:
+        """
+        Busca os k vizinhos mais próximos (similaridade cosseno).
+
+        Args:
+            consulta: Vetor da consulta (não precisa estar normalizado).
+            k (int): Número de resultados.
+            candidatos (int | None): Vizinhos pré-selecionados no espaço comprimido e
+                                     reordenados com os vetores completos (padrão: 4·k).
+            permitidos (Iterable[str] | None): Restringe a busca a estes ids (pré-filtro por facetas).
+
+        Returns:
+            tuple[list[str], list[float]]: Ids e distâncias cosseno (1 - similaridade),
+            em ordem crescente de distância, como na busca do ChromaDB.
+        """
+        with self._lock:
+            self._sincronizar()
+            vetores = self._matriz_vetores()
+            if not self._linha_por_id:
+                return [], []
+            q = np.asarray(consulta, dtype=np.float32).ravel()
+            q = q / max(float(np.linalg.norm(q)), 1e-12)
+            candidatos = max(k, candidatos or 4 * k)
+
+            total = vetores.shape[0]
+            pontuacao = np.full(total, -np.inf, dtype=np.float32)
+            codificadas = len(self._codigos) if self._componentes is not None else 0
+
+            # Pontuação aproximada no espaço PCA + int8, em blocos
+            if codificadas:
+                qp = (q - self._media) @ self._componentes.T
+                for inicio in range(0, codificadas, self.bloco_busca):
+                    fim = min(inicio + self.bloco_busca, codificadas)
+                    escalas = self._escalas[inicio:fim]
+                    pontuacao[inicio:fim] = (self._codigos[inicio:fim] @ qp) * escalas[:, 0] + escalas[:, 1]
+            # Linhas ainda não codificadas: pontuação exata
+            if codificadas < total:
+                pontuacao[codificadas:] = np.asarray(vetores[codificadas:]) @ q
+
+            ativas = np.zeros(total, dtype=bool)
+            if permitidos is None:
+                ativas[list(self._linha_por_id.values())] = True
+            else:
+                ativas[[self._linha_por_id[i] for i in permitidos if i in self._linha_por_id]] = True
+            pontuacao[~ativas] = -np.inf
+
+            n = min(candidatos, int(ativas.sum()))
+            if n == 0:
+                return [], []
+            selecionadas = np.argpartition(-pontuacao, n - 1)[:n]
+
+            # Re-rank exato dos candidatos com os vetores completos (leitura só dessas linhas)
+            selecionadas = np.sort(selecionadas)
+            similaridade = np.asarray(vetores[selecionadas]) @ q
+            ordem = np.argsort(-similaridade)[:k]
+            return (
+                [self._ids_linhas[selecionadas[i]] for i in ordem],
+                [float(1.0 - similaridade[i]) for i in ordem]
+            )
+
+    def get_vetores(self, ids: list[str]) -> np.ndarray:
+        """Vetores completos (normalizados) dos ids informados, na mesma ordem."""
+        with self._lock:
+            self._sincronizar()
+            linhas = [self._linha_por_id[i] for i in ids]
+            return np.asarray(self._matriz_vetores()[linhas])
+
+    def ids(self) -> list[str]:
+        """Ids atualmente indexados."""
+        with self._lock:
+            self._sincronizar()
+            return list(self._linha_por_id)
+
+    def stats(self) -> dict:
+        """
+        Retorna o uso de memória do índice comprimido em relação aos vetores float32.
+
+        Returns:
+            dict: {'vetores', 'dimensao_original', 'dimensao', 'codificados',
+                   'bytes_memoria', 'bytes_float32', 'economia'}
+        """
+        with self._lock:
+            self._sincronizar()
+            linhas = len(self._ids_linhas)
+            ativos = len(self._linha_por_id)
+            bytes_memoria = self._codigos.nbytes + self._escalas.nbytes
+            bytes_float32 = linhas * (self._dim_original or 0) * 4
+            return {
+                "vetores": ativos,
+                "dimensao_original": self._dim_original,
+                "dimensao": self._componentes.shape[0] if self._componentes is not None else None,
+                "codificados": len(self._codigos),
+                "bytes_memoria": bytes_memoria,
+                "bytes_float32": bytes_float32,
+                "economia": 1 - bytes_memoria / bytes_float32 if bytes_float32 else 0.0
+            }
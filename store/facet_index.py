@@ -0,0 +1,276 @@
+"""
+store/facet_index.py
+
+Índice invertido (posting lists) dos metadados dos chunks, usado como pré-filtro das buscas:
+- Facetas: fonte ('source'), tipo de arquivo ('pdf', 'csv', 'txt'), página e dia de ingestão
+- Para cada valor de faceta, o conjunto de ids dos chunks que o possuem; um filtro é a
+  interseção das facetas informadas (dentro de cada faceta, a união dos valores/intervalo)
+- Índice append-only ('facetas.idx', JSON por linha) com releitura incremental e marca
+  de geração, para enxergar a ingestão e as limpezas feitas por outro processo, como o
+  store/text_store.py
+- Conversão do filtro para o 'where' do Chroma, quando o conjunto filtrado é grande
+
+Filtros aceitos (dict; chaves ausentes ou vazias não restringem):
+    {"source": "rotina_6.pdf" | [...], "tipo": "pdf" | [...],
+     "pagina_min": 3, "pagina_max": 10, "desde": "2026-01-31", "ate": "2026-02-28"}
+
+As páginas seguem o metadado 'page' dos PDFs (0 = primeira página); as interfaces
+recebem e exibem números a partir de 1 e fazem a conversão.
+"""
+
+# ——————————————————————————————
+import os
+import json
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from store.text_store import nova_geracao, recriar_arquivo, assinatura_arquivo
+
+# Facetas indexadas, na ordem em que os filtros são intersectados
+FACETAS = ("source", "tipo", "pagina", "dia")
+TIPOS = ("pdf", "csv", "txt")
+
+
+# ——————————————————————————————
+def valores_facetas(meta: dict) -> dict:
+    """
+    Facetas de um chunk a partir dos seus metadados.
+
+    O tipo vem de 'tipo' ou, em chunks indexados antes dele, da extensão da fonte; o dia
+    vem de 'indexado_em' (epoch) e é None nos chunks indexados antes desse metadado.
+    """
+    source = meta.get("source") or ""
+    indexado_em = meta.get("indexado_em")
+    return {
+        "source": source,
+        "tipo": meta.get("tipo") or Path(source).suffix.lstrip(".").lower(),
+        "pagina": int(meta.get("page") or 0),
+        "dia": date.fromtimestamp(indexado_em).isoformat() if indexado_em else None
+    }
+
+
+def normalizar_filtros(filtros: dict | None) -> dict | None:
+    """
+    Valida os filtros e padroniza seus valores (listas de fontes/tipos, inteiros e datas ISO).
+
+    Returns:
+        dict | None: Filtros normalizados, ou None se nenhum restringir a busca.
+
+    Raises:
+        ValueError: Se algum valor for inválido (ex.: data fora do formato AAAA-MM-DD).
+    """
+    if not filtros:
+        return None
+    normalizados = {}
+    for chave in ("source", "tipo"):
+        valores = filtros.get(chave)
+        if isinstance(valores, str):
+            valores = [valores]
+        # Valores em branco (ex.: campo vazio enviado ao serviço) não restringem a busca
+        valores = {v.strip().lower() if chave == "tipo" else v.strip() for v in valores or []} - {""}
+        if valores:
+            normalizados[chave] = sorted(valores)
+    if "tipo" in normalizados and not set(normalizados["tipo"]) <= set(TIPOS):
+        raise ValueError(f"Tipo de arquivo inválido: use {', '.join(TIPOS)}")
+
+    try:
+        for chave in ("pagina_min", "pagina_max"):
+            if filtros.get(chave) not in (None, ""):
+                normalizados[chave] = int(filtros[chave])
+        for chave in ("desde", "ate"):
+            if filtros.get(chave):
+                normalizados[chave] = date.fromisoformat(str(filtros[chave])).isoformat()
+    except ValueError as error:
+        raise ValueError(f"Filtro inválido: {error}") from error
+    return normalizados or None
+
+
+def filtro_chroma(filtros: dict, fontes: list[str]) -> dict:
+    """
+    Filtro equivalente no formato 'where' do Chroma.
+
+    Fonte e tipo viram uma lista de fontes ('fontes', obtida do índice), pois os chunks
+    antigos não têm o metadado 'tipo'; página e dia usam os metadados 'page' e 'indexado_em'.
+    """
+    condicoes = [{"source": {"$in": fontes}}]
+    if "pagina_min" in filtros:
+        condicoes.append({"page": {"$gte": filtros["pagina_min"]}})
+    if "pagina_max" in filtros:
+        condicoes.append({"page": {"$lte": filtros["pagina_max"]}})
+    if "desde" in filtros:
+        inicio = datetime.combine(date.fromisoformat(filtros["desde"]), datetime.min.time())
+        condicoes.append({"indexado_em": {"$gte": int(inicio.timestamp())}})
+    if "ate" in filtros:
+        fim = datetime.combine(date.fromisoformat(filtros["ate"]) + timedelta(days=1), datetime.min.time())
+        condicoes.append({"indexado_em": {"$lt": int(fim.timestamp())}})
+    return condicoes[0] if len(condicoes) == 1 else {"$and": condicoes}
+
+
+# ——————————————————————————————
+class FacetIndex:
+    """
+    Posting lists (valor de faceta -> ids) dos chunks de uma coleção.
+
+    Cada escrita acrescenta entradas a 'facetas.idx'; regravações e remoções
+    também, e a última entrada de cada id vence.
+    """
+
+    def __init__(self, pasta: str):
+        """
+        Args:
+            pasta (str): Pasta onde 'facetas.idx' é mantido.
+        """
+        self.pasta = Path(pasta)
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self.caminho_indice = self.pasta / "facetas.idx"
+        self.caminho_indice.touch(exist_ok=True)
+        self._lock = threading.RLock()
+        self._resetar_estado()
+        self._carregar_indice()
+
+    # ——————————————————————————————
+    def _resetar_estado(self) -> None:
+        self._por_id: dict[str, dict] = {}
+        self._postings: dict[str, dict] = {faceta: {} for faceta in FACETAS}
+        self._posicao_indice = 0
+        self._geracao = None
+        self._assinatura_indice = None
+
+    def _remover(self, chunk_id: str) -> None:
+        anterior = self._por_id.pop(chunk_id, None)
+        if anterior is None:
+            return
+        for faceta in FACETAS:
+            ids = self._postings[faceta].get(anterior[faceta])
+            if ids is not None:
+                ids.discard(chunk_id)
+                if not ids:
+                    del self._postings[faceta][anterior[faceta]]
+
+    def _carregar_indice(self) -> None:
+        """
+        Lê as entradas do índice acrescentadas desde a última leitura; se a primeira
+        linha (geração) mudou, o índice foi recriado e tudo é relido do início.
+        """
+        with open(self.caminho_indice, "rb") as f:
+            geracao = f.readline()
+            if geracao != self._geracao:
+                self._resetar_estado()
+                self._geracao = geracao
+            f.seek(self._posicao_indice)
+            for linha in f:
+                if not linha.endswith(b"\n"):
+                    # Linha ainda sendo gravada por outro processo: relê na próxima vez
+                    break
+                self._posicao_indice += len(linha)
+                entrada = json.loads(linha)
+                if "geracao" in entrada:
+                    continue
+                chunk_id = entrada.pop("id")
+                self._remover(chunk_id)
+                if entrada.get("deleted"):
+                    continue
+                self._por_id[chunk_id] = entrada
+                for faceta in FACETAS:
+                    self._postings[faceta].setdefault(entrada[faceta], set()).add(chunk_id)
+            estado = os.fstat(f.fileno())
+            self._assinatura_indice = (
+                (estado.st_ino, estado.st_size, estado.st_mtime_ns)
+                if estado.st_size == self._posicao_indice else None
+            )
+
+    def _sincronizar(self) -> None:
+        """Lê as entradas novas de outros processos; se o índice foi recriado (limpeza), relê do início."""
+        if assinatura_arquivo(self.caminho_indice) != self._assinatura_indice:
+            self._carregar_indice()
+
+    def _gravar(self, entradas: list[dict]) -> None:
+        with self._lock, open(self.caminho_indice, "ab") as indice:
+            indice.write(b"".join(json.dumps(e, ensure_ascii=False).encode("utf-8") + b"\n" for e in entradas))
+            indice.flush()
+            self._carregar_indice()
+
+    # ——————————————————————————————
+    def add(self, ids: list[str], metadatas: list[dict]) -> None:
+        """Indexa (ou reindexa) as facetas dos chunks a partir dos seus metadados."""
+        self._gravar([{"id": i, **valores_facetas(meta or {})} for i, meta in zip(ids, metadatas)])
+
+    def delete(self, ids: list[str]) -> None:
+        """Marca ids como removidos (entradas de remoção no índice)."""
+        self._gravar([{"id": i, "deleted": True} for i in ids])
+
+    def clear(self) -> None:
+        """Remove todo o conteúdo do índice (recriado com uma nova geração)."""
+        with self._lock:
+            recriar_arquivo(self.caminho_indice, nova_geracao())
+            self._resetar_estado()
+            self._carregar_indice()
+
+    def vazio(self) -> bool:
+        """Indica se nenhum chunk está indexado."""
+        with self._lock:
+            self._sincronizar()
+            return not self._por_id
+
+    # ——————————————————————————————
+    def filtrar(self, filtros: dict) -> set[str]:
+        """
+        Ids dos chunks que atendem a todos os filtros (já normalizados).
+
+        Cada faceta gera a união das posting lists dos seus valores (ou do intervalo, em
+        páginas e dias); as facetas são intersectadas da menor para a maior.
+        """
+        with self._lock:
+            self._sincronizar()
+            postings = self._postings
+            conjuntos = []
+            if "source" in filtros:
+                # Nome do arquivo sem diferenciar maiúsculas (ex.: digitado no Telegram)
+                alvos = {fonte.casefold() for fonte in filtros["source"]}
+                conjuntos.append(set().union(*(
+                    ids for fonte, ids in postings["source"].items() if fonte.casefold() in alvos
+                )))
+            if "tipo" in filtros:
+                conjuntos.append(set().union(*(postings["tipo"].get(tipo, set()) for tipo in filtros["tipo"])))
+            for faceta, minimo, maximo in (("pagina", "pagina_min", "pagina_max"), ("dia", "desde", "ate")):
+                if minimo in filtros or maximo in filtros:
+                    conjuntos.append(set().union(*(
+                        ids for valor, ids in postings[faceta].items()
+                        if valor is not None
+                        and (minimo not in filtros or valor >= filtros[minimo])
+                        and (maximo not in filtros or valor <= filtros[maximo])
+                    )))
+            if not conjuntos:
+                return set(self._por_id)
+            conjuntos.sort(key=len)
+            return conjuntos[0].intersection(*conjuntos[1:])
+
+    def fontes(self, ids) -> list[str]:
+        """Fontes distintas dos ids informados."""
+        with self._lock:
+            return sorted({self._por_id[i]["source"] for i in ids if i in self._por_id})
+
+    def valores(self) -> dict:
+        """
+        Valores disponíveis de cada faceta (para montar filtros nas interfaces).
+
+        Returns:
+            dict: {'source': [...], 'tipo': [...], 'pagina': [min, max] | None, 'dia': [min, max] | None}
+        """
+        with self._lock:
+            self._sincronizar()
+            paginas = sorted(self._postings["pagina"])
+            dias = sorted(d for d in self._postings["dia"] if d is not None)
+            return {
+                "source": sorted(self._postings["source"]),
+                "tipo": sorted(self._postings["tipo"]),
+                "pagina": [paginas[0], paginas[-1]] if paginas else None,
+                "dia": [dias[0], dias[-1]] if dias else None
+            }
+
+    def stats(self) -> dict:
+        """Chunks indexados e número de valores distintos por faceta."""
+        with self._lock:
+            self._sincronizar()
+            return {"chunks": len(self._por_id), **{f: len(self._postings[f]) for f in FACETAS}}
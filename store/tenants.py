@@ -0,0 +1,99 @@
+"""
+store/tenants.py
+
+Configuração dos tenants (departamentos) atendidos por uma mesma instalação, incluindo:
+- Leitura do arquivo TENANTS_FILE (JSON), com a pasta de dados e os chats do Telegram de cada tenant
+- Tenant padrão (TENANT_DEFAULT), sempre disponível, que usa DATA_DIR e a coleção 'documents'
+- Validação dos nomes e roteamento de um chat do Telegram para o seu tenant
+
+Formato do arquivo (todas as chaves de cada tenant são opcionais):
+    {
+        "rh": {"data_dir": "/dados/rh", "telegram_chats": [123456789]},
+        "ti": {"data_dir": "/dados/ti", "telegram_chats": [-1001234567890]}
+    }
+
+Sem 'data_dir', a pasta do tenant é <DATA_DIR>/<tenant>. Chats sem tenant
+configurado são atendidos pelo tenant padrão.
+"""
+
+# ——————————————————————————————
+import os
+import re
+import json
+from pathlib import Path
+from dotenv import load_dotenv
+
+# ——————————————————————————————
+# Configuração dos tenants
+load_dotenv()
+TENANTS_FILE = os.getenv("TENANTS_FILE", "tenants.json")
+TENANT_DEFAULT = os.getenv("TENANT_DEFAULT", "default")
+DATA_DIR = os.getenv("DATA_DIR")
+
+# Nomes aceitos: também compõem o nome da coleção no Chroma e o nome de pastas
+PADRAO_NOME = re.compile(r"^[a-z0-9]([a-z0-9_-]{0,46}[a-z0-9])?$")
+
+
+# ——————————————————————————————
+def carregar_tenants(caminho: str = TENANTS_FILE) -> dict[str, dict]:
+    """
+    Lê a configuração dos tenants; o tenant padrão é sempre incluído.
+
+    Args:
+        caminho (str): Arquivo JSON de configuração (ausente: apenas o tenant padrão).
+
+    Returns:
+        dict[str, dict]: Configuração por nome de tenant ('data_dir', 'telegram_chats').
+    """
+    tenants = {}
+    if caminho and Path(caminho).is_file():
+        tenants = json.loads(Path(caminho).read_text(encoding="utf-8"))
+    tenants.setdefault(TENANT_DEFAULT, {})
+
+    for nome in tenants:
+        if not PADRAO_NOME.match(nome):
+            raise ValueError(
+                f"Nome de tenant inválido em {caminho}: {nome!r} "
+                "(até 48 letras minúsculas, dígitos, '_' ou '-', sem '_' ou '-' nas pontas)"
+            )
+    return tenants
+
+
+TENANTS = carregar_tenants()
+
+# Chat do Telegram -> tenant
+_TENANT_POR_CHAT = {
+    int(chat_id): nome
+    for nome, config in TENANTS.items()
+    for chat_id in config.get("telegram_chats", [])
+}
+
+
+# ——————————————————————————————
+def validar_tenant(tenant: str | None) -> str:
+    """
+    Resolve o tenant informado (None: tenant padrão) e garante que ele está configurado.
+
+    Raises:
+        ValueError: Se o tenant não existir em TENANTS_FILE.
+    """
+    tenant = tenant or TENANT_DEFAULT
+    if tenant not in TENANTS:
+        raise ValueError(f"Tenant desconhecido: {tenant!r}. Tenants configurados: {', '.join(sorted(TENANTS))}")
+    return tenant
+
+
+def data_dir_do_tenant(tenant: str | None) -> str | None:
+    """Pasta de documentos ingeridos para o tenant (DATA_DIR no tenant padrão)."""
+    tenant = validar_tenant(tenant)
+    configurada = TENANTS[tenant].get("data_dir")
+    if configurada:
+        return configurada
+    if tenant == TENANT_DEFAULT:
+        return DATA_DIR
+    return os.path.join(DATA_DIR, tenant) if DATA_DIR else None
+
+
+def tenant_do_chat(chat_id: int) -> str:
+    """Tenant que atende um chat do Telegram (o padrão, se o chat não estiver configurado)."""
+    return _TENANT_POR_CHAT.get(int(chat_id), TENANT_DEFAULT)
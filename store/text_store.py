@@ -0,0 +1,306 @@
+"""
+store/text_store.py
+
+Armazenamento do texto dos chunks fora do índice vetorial, incluindo:
+- Arquivo de dados append-only ('chunks.bin') lido via memória mapeada (mmap)
+- Índice append-only ('chunks.idx', JSON por linha) de id do chunk -> posição no arquivo
+- Compressão opcional em blocos com zstd (pacote 'zstandard'), com cache dos blocos lidos
+- Releitura incremental do índice, para enxergar chunks gravados por outro processo (pipeline)
+- Marca de geração na primeira linha do índice, trocada a cada limpeza, para que leitores
+  de longa duração (app, bot, serviço) descartem o estado anterior em vez de reaproveitá-lo
+
+O ChromaDB passa a guardar apenas vetores e metadados pequenos; o texto é buscado
+aqui, sob demanda, somente para os trechos finalmente selecionados.
+"""
+
+# ——————————————————————————————
+import os
+import json
+import mmap
+import uuid
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from collections import OrderedDict
+
+# Dependência opcional: sem 'zstandard', os blocos são gravados sem compressão
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Trava entre processos (POSIX); sem 'fcntl' (ex.: Windows), apenas a trava entre threads
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# ——————————————————————————————
+def nova_geracao() -> bytes:
+    """Linha de cabeçalho que marca uma nova geração de um índice append-only."""
+    return json.dumps({"geracao": uuid.uuid4().hex}).encode("utf-8") + b"\n"
+
+
+def recriar_arquivo(caminho: Path, conteudo: bytes = b"") -> None:
+    """
+    Substitui um arquivo por um novo (outro inode) de forma atômica.
+
+    Ao contrário de truncá-lo no lugar, quem já o tem aberto ou mapeado em memória
+    continua lendo o conteúdo anterior até perceber a troca.
+    """
+    tmp = caminho.with_name(f"{caminho.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(conteudo)
+    os.replace(tmp, caminho)
+
+
+def assinatura_arquivo(caminho: Path) -> tuple[int, int, int]:
+    """(inode, tamanho, mtime) de um arquivo: muda a cada escrita ou substituição."""
+    estado = caminho.stat()
+    return estado.st_ino, estado.st_size, estado.st_mtime_ns
+
+
+# ——————————————————————————————
+class TextStore:
+    """
+    Armazena textos por id em um arquivo append-only mapeado em memória.
+
+    Cada escrita ('put_many') grava os textos em blocos de até 'block_size' bytes.
+    Com compressão, cada bloco é comprimido como uma unidade e o índice registra,
+    para cada id, o bloco (offset/tamanho) e a posição do texto dentro dele.
+    Regravações e remoções apenas acrescentam entradas ao índice; a última vence.
+    A limpeza recria os dois arquivos, e o novo índice começa com uma nova marca de geração.
+    """
+
+    def __init__(self, pasta: str, compressao: str = "none", block_size: int = 64 * 1024, blocos_em_cache: int = 256):
+        """
+        Args:
+            pasta (str): Pasta onde 'chunks.bin' e 'chunks.idx' são mantidos.
+            compressao (str): "zstd" para compressão em blocos ou "none".
+            block_size (int): Tamanho alvo (bytes, antes da compressão) de cada bloco.
+            blocos_em_cache (int): Quantidade de blocos descomprimidos mantidos em memória.
+        """
+        self.pasta = Path(pasta)
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self.caminho_dados = self.pasta / "chunks.bin"
+        self.caminho_indice = self.pasta / "chunks.idx"
+        self.caminho_dados.touch(exist_ok=True)
+        self.caminho_indice.touch(exist_ok=True)
+
+        if compressao == "zstd" and zstandard is None:
+            print("⚠️ Pacote 'zstandard' não instalado: texto dos chunks será gravado sem compressão.")
+            compressao = "none"
+        self.compressao = compressao
+        self.block_size = block_size
+
+        self._lock = threading.RLock()
+        self._mmap = None
+        self._blocos = OrderedDict()
+        self._blocos_em_cache = blocos_em_cache
+        self._resetar_estado()
+        self._carregar_indice()
+
+    # ——————————————————————————————
+    def _resetar_estado(self) -> None:
+        """Descarta o índice em memória, o mapeamento dos dados e o cache de blocos."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._tamanho_mmap = 0
+        self._blocos.clear()
+        self._indice: dict[str, dict] = {}
+        self._posicao_indice = 0
+        self._geracao = None
+        self._assinatura_indice = None
+
+    def _carregar_indice(self) -> None:
+        """
+        Lê as entradas do índice acrescentadas desde a última leitura.
+
+        A primeira linha identifica a geração do índice (cabeçalho gravado na limpeza ou,
+        em índices anteriores a ele, a primeira entrada); se mudou, o arquivo foi recriado
+        por outro processo e tudo é relido do início.
+        """
+        with open(self.caminho_indice, "rb") as f:
+            geracao = f.readline()
+            if geracao != self._geracao:
+                self._resetar_estado()
+                self._geracao = geracao
+            f.seek(self._posicao_indice)
+            for linha in f:
+                if not linha.endswith(b"\n"):
+                    # Linha ainda sendo gravada por outro processo: relê na próxima vez
+                    break
+                self._posicao_indice += len(linha)
+                entrada = json.loads(linha)
+                if "geracao" in entrada:
+                    continue
+                if entrada.get("deleted"):
+                    self._indice.pop(entrada["id"], None)
+                else:
+                    self._indice[entrada["id"]] = entrada
+            # Só considera o índice em dia se não sobrou linha incompleta para reler
+            estado = os.fstat(f.fileno())
+            self._assinatura_indice = (
+                (estado.st_ino, estado.st_size, estado.st_mtime_ns)
+                if estado.st_size == self._posicao_indice else None
+            )
+
+    def _sincronizar(self) -> None:
+        """
+        Acompanha escritas de outros processos (ex.: pipeline): se o índice mudou (inode,
+        tamanho ou mtime), lê as novas entradas ou, se ele foi recriado, relê do início.
+        """
+        if assinatura_arquivo(self.caminho_indice) != self._assinatura_indice:
+            self._carregar_indice()
+
+    def _dados(self, fim: int):
+        """Retorna o mmap do arquivo de dados, remapeando se ele cresceu além de 'fim'."""
+        if self._mmap is None or fim > self._tamanho_mmap:
+            if self._mmap is not None:
+                self._mmap.close()
+            tamanho = self.caminho_dados.stat().st_size
+            if tamanho == 0:
+                return b""
+            with open(self.caminho_dados, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._tamanho_mmap = tamanho
+        return self._mmap
+
+    def _bloco(self, offset: int, tamanho: int, codec: str) -> bytes:
+        """Lê (e descomprime, se necessário) um bloco, usando o cache LRU de blocos."""
+        chave = (offset, tamanho)
+        bloco = self._blocos.get(chave)
+        if bloco is not None:
+            self._blocos.move_to_end(chave)
+            return bloco
+
+        bruto = bytes(self._dados(offset + tamanho)[offset:offset + tamanho])
+        bloco = zstandard.ZstdDecompressor().decompress(bruto) if codec == "zstd" else bruto
+        self._blocos[chave] = bloco
+        if len(self._blocos) > self._blocos_em_cache:
+            self._blocos.popitem(last=False)
+        return bloco
+
+    @contextmanager
+    def _escrita(self):
+        """
+        Abre o índice para acréscimo com trava exclusiva entre processos (pipeline e serviço
+        podem gravar no mesmo armazenamento): offsets e entradas de um escritor nunca se
+        intercalam com os de outro.
+        """
+        with self._lock, open(self.caminho_indice, "ab") as indice:
+            if fcntl is not None:
+                fcntl.flock(indice.fileno(), fcntl.LOCK_EX)
+            try:
+                yield indice
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(indice.fileno(), fcntl.LOCK_UN)
+
+    # ——————————————————————————————
+    def put_many(self, itens: list[tuple[str, str]]) -> None:
+        """
+        Grava (ou regrava) textos identificados por id.
+
+        Args:
+            itens (list[tuple[str, str]]): Pares (id, texto).
+        """
+        with self._escrita() as indice, open(self.caminho_dados, "ab") as dados:
+            # Tamanho lido com a trava: inclui o que outro processo acabou de acrescentar
+            offset = os.fstat(dados.fileno()).st_size
+            entradas = []
+
+            # Agrupa os textos em blocos de até 'block_size' bytes
+            blocos, atual, tamanho_atual = [], [], 0
+            for chunk_id, texto in itens:
+                codificado = texto.encode("utf-8")
+                if atual and tamanho_atual + len(codificado) > self.block_size:
+                    blocos.append(atual)
+                    atual, tamanho_atual = [], 0
+                atual.append((chunk_id, codificado))
+                tamanho_atual += len(codificado)
+            if atual:
+                blocos.append(atual)
+
+            compressor = zstandard.ZstdCompressor(level=3) if self.compressao == "zstd" else None
+            for bloco in blocos:
+                bruto = b"".join(codificado for _, codificado in bloco)
+                gravado = compressor.compress(bruto) if compressor else bruto
+                dados.write(gravado)
+
+                interno = 0
+                for chunk_id, codificado in bloco:
+                    entradas.append({
+                        "id": chunk_id,
+                        "off": offset,
+                        "len": len(gravado),
+                        "boff": interno,
+                        "blen": len(codificado),
+                        "codec": self.compressao
+                    })
+                    interno += len(codificado)
+                offset += len(gravado)
+
+            # Dados primeiro, índice depois: um leitor nunca vê entrada sem dados
+            dados.flush()
+            os.fsync(dados.fileno())
+            indice.write(b"".join(json.dumps(e).encode("utf-8") + b"\n" for e in entradas))
+            indice.flush()
+            os.fsync(indice.fileno())
+            self._carregar_indice()
+
+    def get_many(self, ids: list[str]) -> list[str | None]:
+        """
+        Busca textos pelos ids, na mesma ordem (None para ids desconhecidos).
+        """
+        with self._lock:
+            self._sincronizar()
+
+            textos = []
+            for chunk_id in ids:
+                entrada = self._indice.get(chunk_id)
+                if entrada is None:
+                    textos.append(None)
+                    continue
+                bloco = self._bloco(entrada["off"], entrada["len"], entrada["codec"])
+                textos.append(bloco[entrada["boff"]:entrada["boff"] + entrada["blen"]].decode("utf-8"))
+            return textos
+
+    def delete(self, ids: list[str]) -> None:
+        """Marca ids como removidos (entradas de remoção no índice, gravadas em disco como em 'put_many')."""
+        with self._escrita() as indice:
+            indice.write(b"".join(json.dumps({"id": i, "deleted": True}).encode("utf-8") + b"\n" for i in ids))
+            indice.flush()
+            os.fsync(indice.fileno())
+            self._carregar_indice()
+
+    def clear(self) -> None:
+        """
+        Remove todo o conteúdo do armazenamento.
+
+        Os arquivos são recriados, e não truncados: o índice primeiro, com uma nova geração,
+        de modo que outros processos o descartem antes de ler os novos dados; quem ainda
+        tiver os dados antigos mapeados em memória continua com um mapeamento válido.
+        """
+        with self._lock:
+            recriar_arquivo(self.caminho_indice, nova_geracao())
+            recriar_arquivo(self.caminho_dados)
+            self._resetar_estado()
+            self._carregar_indice()
+
+    def ids(self) -> list[str]:
+        """Ids atualmente armazenados."""
+        with self._lock:
+            self._sincronizar()
+            return list(self._indice)
+
+    def stats(self) -> dict:
+        """Quantidade de textos e tamanho em disco dos arquivos de dados e índice."""
+        with self._lock:
+            return {
+                "textos": len(self._indice),
+                "dados_bytes": self.caminho_dados.stat().st_size,
+                "indice_bytes": self.caminho_indice.stat().st_size,
+                "compressao": self.compressao
+            }
@@ -3,22 +3,41 @@ telegram_bot.py
 
 Bridge entre o Telegram e o Chatbot Documental Inteligente:
   - Recebe mensagens via polling
-  - Recupera contexto no ChromaDB
+  - Enfileira cada pergunta em uma fila por chat (ordem preservada dentro do chat)
+  - Executa busca e geração em um pool limitado de threads, fora do event loop
+  - Aplica limite global de admissão, informando a posição estimada na fila e exibindo "digitando..."
+  - Encaminha cada chat ao seu tenant (coleção de documentos do departamento, via TENANTS_FILE)
+  - Responde na hora perguntas frequentes com resposta pré-computada válida (warm.py)
+  - Mantém a memória de cada chat (interações recentes + resumo, com orçamento de tokens)
+    e reescreve perguntas de continuação para a busca
+  - Recupera contexto no ChromaDB, opcionalmente restrito por comandos de filtro
+    (/doc, /tipo, /paginas, /desde) aplicados como pré-filtros da busca
   - Monta prompt único via prompt_builder
   - Gera resposta via Gemma 3 (Ollama)
   - Envia resposta de volta ao usuário no Telegram, incluindo fontes e distância média
 """
 
 # Importação de bibliotecas e módulos internos
+import asyncio
 import logging
 import os
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from llm.llm import obter_resposta_llama
-from app_config.app_context import get_context
-from app_config.prompt_builder import build_prompt
+# Cliente do serviço de inferência (HTTP se SERVICE_URL definido, senão no próprio processo)
+from service.client import get_context, obter_resposta_llama, obter_resposta_precomputada, gerar_texto
+from app_config.prompt_builder import build_prompt, MENSAGEM_SEM_CONTEXTO
+from app_config.conversation import ConversationStore
+from app_config.job_queue import ChatJobQueue
+from store.tenants import tenant_do_chat
+from store.facet_index import normalizar_filtros
+from metrics.instrumentation import iniciar_servidor_metricas, span
+from metrics.profiling import Profiler
 
 from dotenv import load_dotenv
 from telegram import Update
+from telegram.constants import ChatAction
 from telegram.ext import (
     ApplicationBuilder,
     CommandHandler,
@@ -33,6 +52,24 @@ load_dotenv()
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 K_RESULTS = int(os.getenv("K_RESULTS", 3))
 
+# Quantidade de perguntas processadas em paralelo e limite de perguntas pendentes
+TELEGRAM_WORKERS = int(os.getenv("TELEGRAM_WORKERS", 4))
+TELEGRAM_MAX_PENDING = int(os.getenv("TELEGRAM_MAX_PENDING", 200))
+
+# Porta do endpoint /metrics (formato Prometheus); vazio desativa
+METRICS_PORT = os.getenv("METRICS_PORT")
+
+# Intervalo (s) entre reenvios do indicador "digitando..." (o Telegram o expira em ~5s)
+TYPING_INTERVAL = 4.0
+
+# Comandos que restringem a busca a uma faceta: /<comando> <valor> <pergunta>
+COMANDOS_FILTRO = {
+    "doc": "arquivo (ex.: rotina_6.pdf)",
+    "tipo": "tipo de arquivo (pdf, csv ou txt)",
+    "paginas": "intervalo de páginas (ex.: 3-10)",
+    "desde": "data de ingestão mínima (AAAA-MM-DD)"
+}
+
 # Configuração básica de logging
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -40,49 +77,186 @@ logging.basicConfig(
 )
 
 
+# ——————————————————————————————
+# Pool limitado de threads para as etapas bloqueantes (ChromaDB e Ollama)
+_executor = ThreadPoolExecutor(
+    max_workers=TELEGRAM_WORKERS,
+    thread_name_prefix="chatbot-worker"
+)
+
+# Fila por chat (ordem preservada) com limite global de execução e de admissão
+job_queue = ChatJobQueue(TELEGRAM_WORKERS, TELEGRAM_MAX_PENDING)
+
+# Profiling opcional (variável PROFILE); no-op quando desativado
+perfil = Profiler.from_env("telegram_bot")
+
+# Memória das conversas por chat, com resumo das interações antigas gerado pelo LLM
+conversas = ConversationStore(resumir=gerar_texto)
+
+
+# ——————————————————————————————
+async def _manter_digitando(context: ContextTypes.DEFAULT_TYPE, chat_id: int) -> None:
+    """Reenvia periodicamente o indicador "digitando..." até ser cancelada."""
+    try:
+        while True:
+            await context.bot.send_chat_action(chat_id=chat_id, action=ChatAction.TYPING)
+            await asyncio.sleep(TYPING_INTERVAL)
+    except asyncio.CancelledError:
+        pass
+    except Exception as error:
+        logging.warning(f"Falha ao enviar indicador de digitação: {error}")
+
+
+def filtros_do_comando(comando: str, args: list[str]) -> tuple[dict, str]:
+    """
+    Converte os argumentos de um comando de filtro em filtros de busca e pergunta.
+
+    Ex.: '/doc rotina_6.pdf Qual o prazo?' -> ({'source': ['rotina_6.pdf']}, 'Qual o prazo?')
+
+    Raises:
+        ValueError: Se faltar o valor ou a pergunta, ou se o valor for inválido.
+    """
+    if len(args) < 2:
+        raise ValueError(f"Uso: /{comando} <{COMANDOS_FILTRO[comando]}> <pergunta>")
+    valor, pergunta = args[0], " ".join(args[1:])
+    if comando == "doc":
+        filtros = {"source": valor}
+    elif comando == "tipo":
+        filtros = {"tipo": valor}
+    elif comando == "paginas":
+        # Páginas digitadas a partir de 1; o metadado 'page' dos PDFs começa em 0
+        inicio, _, fim = valor.partition("-")
+        try:
+            primeira, ultima = int(inicio), int(fim or inicio)
+        except ValueError:
+            raise ValueError(f"Intervalo de páginas inválido: {valor} (ex.: 3-10)") from None
+        if primeira < 1 or ultima < primeira:
+            raise ValueError(f"Intervalo de páginas inválido: {valor} (ex.: 3-10)")
+        filtros = {"pagina_min": primeira - 1, "pagina_max": ultima - 1}
+    else:
+        filtros = {"desde": valor}
+    return normalizar_filtros(filtros), pergunta
+
+
+def _gerar_resposta(user_text: str, tenant: str, chat_id: int, filtros: dict | None = None) -> str:
+    """
+    Executa as etapas bloqueantes (busca de contexto e geração) para uma pergunta.
+
+    Roda em uma thread do pool '_executor', nunca no event loop.
+
+    Args:
+        user_text (str): Pergunta enviada pelo usuário.
+        tenant (str): Tenant do chat, cuja coleção é consultada.
+        chat_id (int): Chat de origem, cuja memória de conversa é usada e atualizada.
+        filtros (dict | None): Facetas que restringem a busca (comandos de filtro).
+
+    Returns:
+        str: Texto final a ser enviado ao usuário.
+    """
+    # Continuações ("e isso?") são combinadas com a pergunta anterior para a busca
+    consulta = conversas.consulta(chat_id, user_text)
+
+    # 0) Pergunta frequente com resposta pré-computada ainda válida: sem busca nem geração
+    #    (apenas perguntas autônomas e sem filtros, cujo sentido não depende da conversa)
+    precomputada = None
+    if consulta == user_text and not filtros:
+        precomputada = obter_resposta_precomputada(user_text, tenant=tenant)
+    if precomputada is not None:
+        resposta = precomputada["resposta"]
+        fontes = precomputada["fontes"]
+        distancia_media = precomputada["distancia_media"]
+    else:
+        # 1) Recupera contexto, lista de fontes e distância média
+        contexto, fontes, distancia_media = get_context(consulta, tenant=tenant, filtros=filtros)
+
+        # 2) Se nenhum trecho passou do corte de distância, responde sem acionar o LLM
+        if not contexto.strip():
+            return MENSAGEM_SEM_CONTEXTO
+
+        # 3) Monta prompt único reutilizável, com o histórico limitado da conversa
+        with span("prompt.build"):
+            prompt = build_prompt(user_text, contexto, conversas.historico(chat_id))
+
+        # 4) Gera a resposta via Gemma 3
+        resposta = obter_resposta_llama(pergunta=prompt, contexto="")
+
+    # Memória da conversa: o resumo das interações antigas é atualizado em segundo plano
+    if not resposta.startswith("Erro"):
+        conversas.registrar(chat_id, user_text, resposta, consulta)
+
+    # 5) Formata a mensagem de retorno incluindo fontes e distância média
+    fontes_txt = ", ".join(fontes) if fontes else "nenhuma"
+    return (
+        f"{resposta}\n\n"
+        f"📚 Fontes: {fontes_txt}\n"
+        f"🔎 Distância média: {distancia_media:.3f}"
+    )
+
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handler para o comando /start"""
+    """Handler para o comando /start (também reinicia a memória da conversa)"""
+    conversas.esquecer(update.effective_chat.id)
     await update.message.reply_text(
         "Olá! Eu sou seu Chatbot Documental. Envie qualquer pergunta "
-        "e eu responderei com base nos documentos indexados."
+        "e eu responderei com base nos documentos indexados.\n\n"
+        "Para restringir a busca, use:\n"
+        + "\n".join(f"/{comando} <{descricao}> <pergunta>" for comando, descricao in COMANDOS_FILTRO.items())
     )
 
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handler para qualquer texto recebido — recupera contexto, gera prompt e responde."""
-    user_text = update.message.text
+    """Handler para qualquer texto recebido — enfileira a pergunta e responde sem bloquear o loop."""
+    await _enfileirar(update, context, update.message.text)
+
 
+async def handle_filtro(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler dos comandos de filtro (/doc, /tipo, /paginas, /desde): pergunta restrita à faceta."""
+    comando = update.message.text.split()[0].lstrip("/").split("@")[0].lower()
     try:
-        # 1) Recupera contexto, lista de fontes e distância média
-        contexto, fontes, distancia_media = get_context(user_text)
+        filtros, pergunta = filtros_do_comando(comando, context.args)
+    except ValueError as error:
+        await update.message.reply_text(f"⚠️ {error}")
+        return
+    await _enfileirar(update, context, pergunta, filtros)
 
-        # 2) Se não encontrou contexto, envia fallback
-        if not contexto.strip():
-            await update.message.reply_text(
-                "Não encontrei contexto relevante nos documentos."
-            )
-            return
 
-        # 3) Monta prompt único reutilizável
-        prompt = build_prompt(user_text, contexto)
+async def _enfileirar(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    user_text: str,
+    filtros: dict | None = None
+) -> None:
+    """Enfileira a pergunta na fila do chat, informando a posição ou a recusa por excesso de carga."""
+    chat_id = update.effective_chat.id
+    tenant = tenant_do_chat(chat_id)
 
-        # 4) Gera a resposta via Gemma 3
-        resposta = obter_resposta_llama(pergunta=prompt, contexto="")
+    async def job() -> None:
+        try:
+            loop = asyncio.get_running_loop()
+            reply = await loop.run_in_executor(_executor, _gerar_resposta, user_text, tenant, chat_id, filtros)
+        except Exception as e:
+            logging.error(f"Erro ao processar mensagem (tenant {tenant}): {e}")
+            reply = "Desculpe, ocorreu um erro ao processar sua solicitação."
+
+        # Envia a resposta de volta ao usuário
+        await update.message.reply_text(reply)
 
-        # 5) Formata a mensagem de retorno incluindo fontes e distância média
-        fontes_txt = ", ".join(fontes) if fontes else "nenhuma"
-        reply = (
-            f"{resposta}\n\n"
-            f"📚 Fontes: {fontes_txt}\n"
-            f"🔎 Distância média: {distancia_media:.3f}"
+    # Indicador "digitando..." único por chat, ativo enquanto a fila do chat tiver trabalhos
+    posicao = job_queue.submit(chat_id, job, indicador=lambda: _manter_digitando(context, chat_id))
+    if posicao is None:
+        await update.message.reply_text(
+            "🚦 Estou com muitas solicitações no momento. Tente novamente em instantes."
+        )
+    elif posicao > 0:
+        await update.message.reply_text(
+            f"⏳ Estou ocupado no momento — você é aproximadamente o #{posicao} na fila."
         )
 
-    except Exception as e:
-        logging.error(f"Erro ao processar mensagem: {e}")
-        reply = "Desculpe, ocorreu um erro ao processar sua solicitação."
 
-    # 6) Envia a resposta de volta ao usuário
-    await update.message.reply_text(reply)
+async def _encerrar(app) -> None:
+    """Libera o pool de threads e grava os perfis coletados ao encerrar o bot."""
+    _executor.shutdown(wait=False, cancel_futures=True)
+    perfil.stop()
 
 
 def main():
@@ -90,14 +264,27 @@ def main():
     if not TELEGRAM_TOKEN:
         raise RuntimeError("TELEGRAM_TOKEN não definido no .env")
 
-    app = ApplicationBuilder().token(TELEGRAM_TOKEN).build()
+    # Os handlers apenas enfileiram trabalhos, então o processamento sequencial
+    # de updates preserva a ordem de chegada sem bloquear o loop
+    app = ApplicationBuilder().token(TELEGRAM_TOKEN).post_shutdown(_encerrar).build()
 
     # Registra handlers
     app.add_handler(CommandHandler("start", start))
+    app.add_handler(CommandHandler(list(COMANDOS_FILTRO), handle_filtro))
     app.add_handler(
         MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message)
     )
 
+    # Exposição das métricas para o Prometheus
+    if METRICS_PORT:
+        iniciar_servidor_metricas(int(METRICS_PORT))
+        logging.info(f"Métricas disponíveis em http://127.0.0.1:{METRICS_PORT}/metrics")
+
+    # Profiling: com o modo 'mem', SIGUSR1 grava um snapshot do tracemalloc sob demanda
+    perfil.start()
+    if perfil.ativo and hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda *_: perfil.snapshot_memoria(f"sigusr1_{int(time.time())}"))
+
     # Inicia o polling
     logging.info("Bot iniciado — aguardando mensagens...")
     app.run_polling()
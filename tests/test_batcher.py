@@ -0,0 +1,74 @@
+"""
+tests/test_batcher.py
+
+Testes do micro-batching de embeddings de consulta (embeddings/batcher.py):
+- Validação da resposta da função de embedding (_validar)
+- Agrupamento de pedidos concorrentes e devolução do vetor certo a cada chamador
+- Propagação de erros a todos os pedidos do lote, sem travar os chamadores
+"""
+
+# ——————————————————————————————
+import threading
+
+import pytest
+
+from embeddings.batcher import QueryEmbeddingBatcher
+
+
+# ——————————————————————————————
+def test_validar_aceita_vetores_numericos():
+    assert QueryEmbeddingBatcher._validar([[1, 2], (3.5, 4)], 2) == [[1.0, 2.0], [3.5, 4.0]]
+
+
+@pytest.mark.parametrize("resposta, esperados", [
+    ({"error": "Model is currently loading", "estimated_time": 20.0}, 1),
+    ([[1.0, 2.0]], 2),
+    ([[1.0], []], 2),
+    ([["a", "b"]], 1),
+    ([1.0, 2.0], 2),
+    (None, 1),
+])
+def test_validar_rejeita_respostas_invalidas(resposta, esperados):
+    with pytest.raises(ValueError):
+        QueryEmbeddingBatcher._validar(resposta, esperados)
+
+
+def test_lotes_devolvem_o_vetor_de_cada_texto():
+    chamadas = []
+
+    def embed_fn(textos):
+        chamadas.append(len(textos))
+        return [[float(len(t)), 1.0] for t in textos]
+
+    batcher = QueryEmbeddingBatcher(embed_fn, max_batch=8, max_wait_ms=50)
+    textos = ["a" * n for n in range(1, 9)]
+    resultados = {}
+    barreira = threading.Barrier(len(textos))
+
+    def consultar(texto):
+        barreira.wait()
+        resultados[texto] = batcher.embed(texto, timeout=5)
+
+    threads = [threading.Thread(target=consultar, args=(t,)) for t in textos]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert all(resultados[t] == [float(len(t)), 1.0] for t in textos)
+    assert sum(chamadas) == len(textos)
+    assert len(chamadas) < len(textos)
+
+    metricas = batcher.metrics()
+    assert metricas["textos"] == len(textos)
+    assert metricas["lotes"] == len(chamadas)
+
+
+def test_resposta_invalida_falha_todos_os_pedidos():
+    batcher = QueryEmbeddingBatcher(lambda textos: {"error": "indisponível"}, max_wait_ms=1)
+    with pytest.raises(ValueError, match="indisponível"):
+        batcher.embed("pergunta", timeout=5)
+
+    # O coletor continua ativo após a falha
+    batcher.embed_fn = lambda textos: [[0.5] for _ in textos]
+    assert batcher.embed("outra", timeout=5) == [0.5]
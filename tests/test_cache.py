@@ -0,0 +1,81 @@
+"""
+tests/test_cache.py
+
+Testes do cache persistente de respostas do LLM (llm/cache.py):
+- Chave determinística independente da ordem das opções
+- Critério de opções determinísticas (temperatura 0 com semente fixa)
+- Contadores de acertos/falhas e despejo LRU por entradas e por bytes
+"""
+
+# ——————————————————————————————
+import os
+
+from llm.cache import ResponseCache, gerar_chave, opcoes_deterministicas
+
+
+# ——————————————————————————————
+def _envelhecer(cache: ResponseCache, chave: str, instante: float) -> None:
+    """Define o último acesso de uma entrada (evita depender da resolução do relógio)."""
+    cache._conn.execute("UPDATE respostas SET acessado_em = ? WHERE chave = ?", (instante, chave))
+    cache._conn.commit()
+
+
+def test_chave_ignora_ordem_das_opcoes():
+    a = gerar_chave("gemma3:1b", "prompt", {"temperature": 0, "seed": 42})
+    b = gerar_chave("gemma3:1b", "prompt", {"seed": 42, "temperature": 0})
+    assert a == b
+    assert a != gerar_chave("gemma3:1b", "prompt", {"seed": 7, "temperature": 0})
+    assert a != gerar_chave("outro", "prompt", {"temperature": 0, "seed": 42})
+
+
+def test_opcoes_deterministicas():
+    assert opcoes_deterministicas({"temperature": 0, "seed": 42})
+    assert not opcoes_deterministicas({"temperature": 0.7, "seed": 42})
+    assert not opcoes_deterministicas({"temperature": 0})
+
+
+def test_get_put_e_contadores(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    assert cache.get("a") is None
+    cache.put("a", "m", "resposta")
+    assert cache.get("a") == "resposta"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entradas"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+    cache.clear()
+    assert cache.stats() == {"hits": 0, "misses": 0, "hit_rate": 0.0, "entradas": 0, "bytes": 0}
+
+
+def test_despejo_lru_por_entradas(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_entries=2)
+    cache.put("a", "m", "1")
+    cache.put("b", "m", "2")
+    _envelhecer(cache, "a", 1.0)
+    _envelhecer(cache, "b", 2.0)
+
+    # Acesso a "a" a torna a mais recente: "b" sai ao inserir "c"
+    assert cache.get("a") == "1"
+    cache.put("c", "m", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+def test_despejo_lru_por_bytes(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=10)
+    cache.put("a", "m", "x" * 4)
+    cache.put("b", "m", "y" * 4)
+    _envelhecer(cache, "a", 1.0)
+    _envelhecer(cache, "b", 2.0)
+
+    cache.put("c", "m", "z" * 4)
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 8
+
+
+def test_persistencia_entre_instancias(tmp_path):
+    ResponseCache(str(tmp_path)).put("a", "m", "resposta")
+    assert os.path.exists(tmp_path / "respostas.sqlite3")
+    assert ResponseCache(str(tmp_path)).get("a") == "resposta"
@@ -0,0 +1,117 @@
+"""
+tests/test_chunker.py
+
+Testes do chunker nativo (retriever/retriever.py), com um tokenizer falso no estilo
+WordPiece (palavras quebradas em subtokens, com offsets):
+- Modo "chars": limite de tamanho, frases inteiras e sobreposição
+- Modo "tokens": nenhum chunk acima do limite, inclusive frases longas quebradas
+  no meio, cujos pedaços são medidos de novo
+- Metadados e índices dos chunks em chunk_documents
+"""
+
+# ——————————————————————————————
+import re
+
+import pytest
+
+from retriever import retriever
+from retriever.retriever import _quebrar_longa, chunk_documents, split_text
+
+
+# ——————————————————————————————
+class TokenizerFalso:
+    """
+    Palavras e pontuação viram subtokens com offsets, como no WordPiece: o primeiro
+    com até 2 caracteres e os de continuação ('##') com até 3. Como no tokenizer real,
+    um texto que começa no meio de uma palavra é segmentado de outra forma.
+    """
+
+    @staticmethod
+    def _offsets(texto: str) -> list[tuple[int, int]]:
+        offsets = []
+        for m in re.finditer(r"\w+|[^\w\s]", texto):
+            inicio = m.start()
+            while inicio < m.end():
+                fim = min(inicio + (2 if inicio == m.start() else 3), m.end())
+                offsets.append((inicio, fim))
+                inicio = fim
+        return offsets
+
+    def __call__(self, textos, add_special_tokens=True, return_attention_mask=True, return_offsets_mapping=False):
+        unico = isinstance(textos, str)
+        offsets = [self._offsets(t) for t in ([textos] if unico else textos)]
+        saida = {"input_ids": [list(range(len(o))) for o in offsets]}
+        if return_offsets_mapping:
+            saida["offset_mapping"] = offsets
+        return {chave: valor[0] if unico else valor for chave, valor in saida.items()}
+
+
+@pytest.fixture
+def tokenizer(monkeypatch):
+    falso = TokenizerFalso()
+    monkeypatch.setattr(retriever, "_tokenizer", lambda: falso)
+    monkeypatch.setattr(retriever, "_tokenizer_disponivel", lambda: True)
+    return falso
+
+
+def _tokens(tokenizer: TokenizerFalso, texto: str) -> int:
+    return len(tokenizer(texto, add_special_tokens=False)["input_ids"])
+
+
+TEXTO = (
+    "A rotina diária começa às oito horas. O relatório é enviado ao gestor; depois, revisado. "
+    "Cada equipe registra as pendências no sistema.\n\n"
+    "No segundo parágrafo, falamos de prazos: o prazo padrão é de cinco dias úteis! "
+    "Pedidos urgentes têm prioridade? Sim, quando aprovados pela coordenação."
+)
+
+
+# ——————————————————————————————
+def test_modo_chars_respeita_tamanho_e_frases():
+    chunks = split_text([TEXTO], chunk_size=100, chunk_overlap=40, modo="chars")[0]
+    assert len(chunks) > 1
+    assert all(len(c) <= 100 for c in chunks)
+
+    frases = {f for f, _ in retriever._segmentar(TEXTO)}
+    frases_por_chunk = [set(re.split(r"(?<=[.!?;:])\s+", c.replace("\n\n", " "))) for c in chunks]
+    # Cada chunk é formado por frases inteiras
+    assert all(partes <= frases for partes in frases_por_chunk)
+    # Sobreposição: chunks consecutivos compartilham frases
+    assert any(a & b for a, b in zip(frases_por_chunk, frases_por_chunk[1:]))
+
+
+def test_modo_chars_quebra_frase_maior_que_o_limite():
+    frase = " ".join(f"palavra{i}" for i in range(40))
+    chunks = split_text([frase], chunk_size=50, chunk_overlap=0, modo="chars")[0]
+    assert all(len(c) <= 50 for c in chunks)
+    assert " ".join(chunks).split() == frase.split()
+
+
+def test_modo_tokens_respeita_limite(tokenizer):
+    chunks = split_text([TEXTO * 3], chunk_size=20, chunk_overlap=6, modo="tokens")[0]
+    assert len(chunks) > 1
+    assert all(_tokens(tokenizer, c) <= 20 for c in chunks)
+
+
+@pytest.mark.parametrize("limite", [4, 7, 10])
+def test_quebra_de_frase_longa_em_tokens(tokenizer, limite):
+    # Palavras longas geram vários subtokens: cortes no meio delas aumentariam a contagem
+    frase = " ".join(["anticonstitucionalissimamente", "e", "paralelepípedo", "ok"] * 6)
+    pedacos = _quebrar_longa(frase, limite, "tokens")
+
+    assert all(n == _tokens(tokenizer, p) for p, n in pedacos)
+    assert all(n <= limite for _, n in pedacos)
+    assert "".join(p.replace(" ", "") for p, _ in pedacos) == frase.replace(" ", "")
+
+
+def test_chunk_documents_preserva_metadados(tokenizer):
+    docs = [
+        {"text": TEXTO, "metadata": {"source": "a.pdf", "page": 2}},
+        {"text": "Texto curto.", "metadata": {"source": "b.txt", "paragraph": 1}},
+    ]
+    chunks = chunk_documents(docs, chunk_size=20, chunk_overlap=0, modo="tokens")
+
+    do_pdf = [c for c in chunks if c["metadata"]["source"] == "a.pdf"]
+    assert [c["metadata"]["chunk"] for c in do_pdf] == list(range(len(do_pdf)))
+    assert all(c["metadata"]["page"] == 2 for c in do_pdf)
+    assert [c["text"] for c in chunks if c["metadata"]["source"] == "b.txt"] == ["Texto curto."]
@@ -0,0 +1,112 @@
+"""
+tests/test_compressed_index.py
+
+Testes do índice comprimido (store/compressed_index.py):
+- Busca exata antes do ajuste da PCA e aproximada (PCA + int8, com re-rank) depois
+- Remoções, pré-filtro por ids permitidos e dimensão inconsistente
+- Limpeza e escritas de outro processo vistas por uma instância já aberta
+"""
+
+# ——————————————————————————————
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from store.compressed_index import CompressedIndex
+
+
+# ——————————————————————————————
+def _vetores(n: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+def _vetores_estruturados(n: int, dim: int = 32, latente: int = 8, seed: int = 0) -> np.ndarray:
+    """Vetores próximos de um subespaço de dimensão 'latente', como embeddings reais."""
+    base = np.random.default_rng(1234).standard_normal((latente, dim))
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal((n, latente)) @ base + 0.05 * rng.standard_normal((n, dim))).astype(np.float32)
+
+
+def _adicionar(pasta: str, inicio: int, n: int) -> None:
+    """Acrescenta vetores em outro processo."""
+    CompressedIndex(pasta, dimensao=8).add([f"v{i}" for i in range(inicio, inicio + n)], _vetores(n, seed=inicio))
+
+
+def test_busca_exata_antes_do_ajuste(tmp_path):
+    indice = CompressedIndex(str(tmp_path), dimensao=8)
+    vetores = _vetores(20)
+    indice.add([f"v{i}" for i in range(20)], vetores)
+
+    ids, distancias = indice.search(vetores[7] * 3, k=3)
+    assert ids[0] == "v7"
+    assert distancias[0] == pytest.approx(0.0, abs=1e-5)
+    assert distancias == sorted(distancias)
+
+
+def test_ajuste_e_busca_comprimida(tmp_path):
+    indice = CompressedIndex(str(tmp_path), dimensao=8)
+    assert indice.ajustar() is False  # sem vetores suficientes
+
+    vetores = _vetores_estruturados(300)
+    ids = [f"v{i}" for i in range(300)]
+    indice.add(ids, vetores)
+    assert indice.ajustar() is True
+
+    # Re-rank exato: o próprio vetor volta em primeiro, com distância exata
+    acertos = sum(indice.search(vetores[i], k=1, candidatos=20)[0] == [ids[i]] for i in range(0, 300, 10))
+    assert acertos == 30
+
+    # Vetores acrescentados depois do ajuste também são codificados
+    novos = _vetores_estruturados(5, seed=1)
+    indice.add([f"n{i}" for i in range(5)], novos)
+    assert indice.stats()["codificados"] == 305
+    assert indice.search(novos[2], k=1)[0] == ["n2"]
+
+    reaberto = CompressedIndex(str(tmp_path), dimensao=8)
+    assert reaberto.search(vetores[42], k=1)[0] == ["v42"]
+    np.testing.assert_allclose(
+        reaberto.get_vetores(["v42"])[0], vetores[42] / np.linalg.norm(vetores[42]), rtol=1e-5
+    )
+
+
+def test_remocao_permitidos_e_dimensao(tmp_path):
+    indice = CompressedIndex(str(tmp_path), dimensao=8)
+    vetores = _vetores(10)
+    indice.add([f"v{i}" for i in range(10)], vetores)
+
+    indice.delete(["v3"])
+    assert "v3" not in indice.ids()
+    assert "v3" not in indice.search(vetores[3], k=10)[0]
+
+    ids, _ = indice.search(vetores[0], k=5, permitidos=["v5", "v6", "inexistente"])
+    assert sorted(ids) == ["v5", "v6"]
+
+    with pytest.raises(ValueError):
+        indice.add(["x"], _vetores(1, dim=16))
+
+
+def test_limpeza_vista_por_outra_instancia(tmp_path):
+    escritor = CompressedIndex(str(tmp_path), dimensao=8)
+    leitor = CompressedIndex(str(tmp_path), dimensao=8)
+    escritor.add([f"v{i}" for i in range(10)], _vetores(10))
+    assert len(leitor.ids()) == 10
+
+    escritor.clear()
+    novos = _vetores(10, seed=5)
+    escritor.add([f"w{i}" for i in range(10)], novos)
+    assert sorted(leitor.ids()) == sorted(f"w{i}" for i in range(10))
+    assert leitor.search(novos[4], k=1)[0] == ["w4"]
+
+
+def test_escritas_de_outro_processo(tmp_path):
+    leitor = CompressedIndex(str(tmp_path), dimensao=8)
+    leitor.add([f"v{i}" for i in range(10)], _vetores(10, seed=0))
+
+    processo = multiprocessing.get_context("spawn").Process(target=_adicionar, args=(str(tmp_path), 10, 10))
+    processo.start()
+    processo.join(timeout=60)
+    assert processo.exitcode == 0
+
+    assert len(leitor.ids()) == 20
+    assert leitor.search(_vetores(10, seed=10)[3], k=1)[0] == ["v13"]
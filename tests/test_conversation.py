@@ -0,0 +1,120 @@
+"""
+tests/test_conversation.py
+
+Testes da memória das conversas (app_config/conversation.py):
+- Janela de interações por quantidade e por orçamento de tokens, com resumo das que saem
+- A interação mais recente nunca sai: sua resposta é truncada se exceder o orçamento
+- Reescrita de perguntas de continuação e resumo extrativo quando o LLM falha
+- Descarte de conversas por LRU e por ociosidade
+"""
+
+# ——————————————————————————————
+import pytest
+
+from app_config import conversation
+from app_config.conversation import ConversationStore
+from app_config.prompt_builder import estimar_tokens
+
+
+# ——————————————————————————————
+@pytest.fixture(autouse=True)
+def resumo_pelo_llm(monkeypatch):
+    monkeypatch.setattr(conversation, "MEMORY_SUMMARY_LLM", True)
+
+
+def _aguardar_resumos(store: ConversationStore) -> None:
+    """O resumo roda em uma única thread: encerrá-la espera os agendados."""
+    store._executor.shutdown(wait=True)
+
+
+def test_janela_de_turnos_e_resumo():
+    prompts = []
+
+    def resumir(prompt: str) -> str:
+        prompts.append(prompt)
+        return "RESUMO"
+
+    store = ConversationStore(resumir=resumir, turnos=2, orcamento_tokens=10000)
+    for i in range(4):
+        store.registrar("c", f"pergunta {i}", f"resposta {i}")
+    _aguardar_resumos(store)
+
+    memoria = store.obter("c")
+    assert [p for p, _, _ in memoria.turnos] == ["pergunta 2", "pergunta 3"]
+    assert memoria.resumo == "RESUMO"
+    assert prompts and "pergunta 0" in "".join(prompts)
+
+    historico = store.historico("c")
+    assert historico.startswith("Resumo: RESUMO")
+    assert "Usuário: pergunta 3\nAssistente: resposta 3" in historico
+    assert "pergunta 1" not in historico
+
+
+def test_orcamento_de_tokens_remove_os_mais_antigos():
+    store = ConversationStore(resumir=lambda prompt: "R", turnos=10, orcamento_tokens=200, resumo_tokens=50)
+    for i in range(5):
+        store.registrar("c", f"p{i}", "x" * 200)
+    _aguardar_resumos(store)
+
+    turnos = store.obter("c").turnos
+    assert sum(estimar_tokens(f"{p}\n{r}") for p, r, _ in turnos) <= store.turnos_tokens
+    assert turnos[-1][0] == "p4"
+    assert len(turnos) < 5
+
+
+def test_interacao_mais_recente_e_truncada_nao_descartada():
+    store = ConversationStore(resumir=lambda prompt: "R", turnos=3, orcamento_tokens=100, resumo_tokens=20)
+    store.registrar("c", "primeira", "curta")
+    store.registrar("c", "pergunta longa", "y" * 5000)
+    _aguardar_resumos(store)
+
+    turnos = store.obter("c").turnos
+    assert len(turnos) == 1
+    pergunta, resposta, _ = turnos[0]
+    assert pergunta == "pergunta longa"
+    assert resposta.endswith("…")
+    assert estimar_tokens(f"{pergunta}\n{resposta}") <= store.turnos_tokens
+
+
+def test_reescrita_de_continuacoes():
+    store = ConversationStore(resumir=None)
+    assert store.consulta("c", "e isso?") == "e isso?"  # conversa nova: nada a combinar
+
+    store.registrar("c", "Qual o prazo do relatório mensal?", "Cinco dias.")
+    assert store.consulta("c", "e o anual?") == "Qual o prazo do relatório mensal? e o anual?"
+    assert store.consulta("c", "Quem aprova as férias dos analistas?") == "Quem aprova as férias dos analistas?"
+
+    # A consulta registrada (já reescrita) é a base da próxima continuação
+    store.registrar("c", "e o anual?", "Dez dias.", "Qual o prazo do relatório mensal? e o anual?")
+    assert store.obter("c").ultima_consulta == "Qual o prazo do relatório mensal? e o anual?"
+
+
+def test_resumo_extrativo_quando_o_llm_falha():
+    def resumir(prompt: str) -> str:
+        raise RuntimeError("LLM indisponível")
+
+    store = ConversationStore(resumir=resumir, turnos=1, orcamento_tokens=10000)
+    store.registrar("c", "Qual o horário?", "Das 8h às 17h.")
+    store.registrar("c", "Onde fica o arquivo?", "No bloco B.")
+    _aguardar_resumos(store)
+
+    assert store.obter("c").resumo == "Qual o horário?"
+
+
+def test_descarte_por_lru_e_ociosidade():
+    store = ConversationStore(resumir=None, max_conversas=2, ocioso_s=60)
+    for chat in ("a", "b", "c"):
+        store.registrar(chat, "pergunta", "resposta")
+    assert list(store._conversas) == ["b", "c"]
+
+    # Conversa ociosa além do limite é descartada no próximo acesso
+    store._conversas["b"].ultimo_uso -= 120
+    store.obter("c")
+    assert list(store._conversas) == ["c"]
+
+
+def test_memoria_desativada():
+    store = ConversationStore(resumir=None, ativa=False)
+    store.registrar("c", "pergunta", "resposta")
+    assert store.historico("c") == ""
+    assert store.consulta("c", "e isso?") == "e isso?"
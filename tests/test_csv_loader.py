@@ -0,0 +1,71 @@
+"""
+tests/test_csv_loader.py
+
+Testes do carregamento vetorizado de CSVs (loaders/csv_loader.py):
+- Serialização "coluna: valor; ..." omitindo células vazias
+- Um documento por linha, grupos de N linhas e grupos por coluna-chave,
+  inclusive quando um grupo atravessa blocos de leitura
+"""
+
+# ——————————————————————————————
+import numpy as np
+import pandas as pd
+import pytest
+
+from loaders.csv_loader import load_csv, serializar_linhas
+
+
+# ——————————————————————————————
+@pytest.fixture
+def csv_pedidos(tmp_path):
+    caminho = tmp_path / "pedidos.csv"
+    pd.DataFrame({
+        "cliente": ["ana", "ana", "ana", "bia", "bia", "ana", "caio"],
+        "item": ["caneta", "lápis", "", "papel", "cola", "borracha", "régua"],
+        "qtd": ["1", "2", "3", "4", "5", "6", "7"],
+    }).to_csv(caminho, index=False)
+    return str(caminho)
+
+
+def test_serializar_linhas_omite_celulas_vazias():
+    df = pd.DataFrame({
+        "a": ["1", np.nan, "  ", "x"],
+        "b": [" 2 ", "3", np.nan, np.nan],
+        "c": ["", "4", np.nan, "y"],
+    })
+    assert serializar_linhas(df).tolist() == ["a: 1; b: 2", "b: 3; c: 4", "", "a: x; c: y"]
+
+
+def test_uma_linha_por_documento(csv_pedidos):
+    docs = load_csv(csv_pedidos, agrupar_linhas=1, chunksize=3)
+    assert len(docs) == 7
+    assert docs[2]["text"] == "cliente: ana; qtd: 3"
+    assert [d["metadata"]["row"] for d in docs] == list(range(7))
+    assert docs[6]["metadata"] == {"row": 6, "row_start": 6, "row_end": 6}
+
+
+def test_grupos_de_n_linhas(csv_pedidos):
+    # chunksize é ajustado para múltiplo de N: nenhum grupo fica dividido entre blocos
+    docs = load_csv(csv_pedidos, agrupar_linhas=3, chunksize=4)
+    assert [(d["metadata"]["row_start"], d["metadata"]["row_end"]) for d in docs] == [(0, 2), (3, 5), (6, 6)]
+    assert docs[0]["text"].split("\n") == [
+        "cliente: ana; item: caneta; qtd: 1",
+        "cliente: ana; item: lápis; qtd: 2",
+        "cliente: ana; qtd: 3",
+    ]
+
+
+def test_grupos_por_chave_atravessam_blocos(csv_pedidos):
+    docs = load_csv(csv_pedidos, agrupar_por="cliente", chunksize=2)
+    assert [(d["metadata"]["group_key"], d["metadata"]["row_start"], d["metadata"]["row_end"]) for d in docs] == [
+        ("ana", 0, 2),
+        ("bia", 3, 4),
+        ("ana", 5, 5),
+        ("caio", 6, 6),
+    ]
+    assert docs[0]["text"].count("\n") == 2
+
+
+def test_coluna_de_agrupamento_inexistente(csv_pedidos):
+    with pytest.raises(ValueError, match="setor"):
+        load_csv(csv_pedidos, agrupar_por="setor")
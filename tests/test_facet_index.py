@@ -0,0 +1,124 @@
+"""
+tests/test_facet_index.py
+
+Testes das facetas e pré-filtros da busca (store/facet_index.py):
+- Facetas extraídas dos metadados, inclusive de chunks antigos (sem 'tipo'/'indexado_em')
+- Normalização e validação dos filtros e filtro equivalente do Chroma
+- Interseção das posting lists, regravações e remoções
+- Limpeza e escritas de outro processo vistas por uma instância já aberta
+"""
+
+# ——————————————————————————————
+import multiprocessing
+from datetime import datetime
+
+import pytest
+
+from store.facet_index import FacetIndex, filtro_chroma, normalizar_filtros, valores_facetas
+
+
+# ——————————————————————————————
+def _epoch(dia: str) -> int:
+    return int(datetime.fromisoformat(f"{dia}T12:00:00").timestamp())
+
+
+METADADOS = {
+    "a_p0000_000": {"source": "Rotina.pdf", "tipo": "pdf", "page": 0, "indexado_em": _epoch("2024-05-01")},
+    "a_p0003_000": {"source": "Rotina.pdf", "tipo": "pdf", "page": 3, "indexado_em": _epoch("2024-05-01")},
+    "b_0001": {"source": "base.csv", "tipo": "csv", "row": 1, "indexado_em": _epoch("2024-06-10")},
+    "c_0000": {"source": "notas.txt", "paragraph": 0},  # indexado antes de 'tipo'/'indexado_em'
+}
+
+
+def _indexar(pasta: str) -> None:
+    """Indexa os metadados de exemplo em outro processo."""
+    FacetIndex(pasta).add(list(METADADOS), list(METADADOS.values()))
+
+
+@pytest.fixture
+def indice(tmp_path):
+    indice = FacetIndex(str(tmp_path))
+    indice.add(list(METADADOS), list(METADADOS.values()))
+    return indice
+
+
+def test_valores_facetas_de_chunks_antigos():
+    assert valores_facetas(METADADOS["c_0000"]) == {"source": "notas.txt", "tipo": "txt", "pagina": 0, "dia": None}
+    assert valores_facetas(METADADOS["a_p0003_000"])["dia"] == "2024-05-01"
+
+
+def test_normalizar_filtros():
+    assert normalizar_filtros(None) is None
+    assert normalizar_filtros({"source": "", "pagina_min": ""}) is None
+    assert normalizar_filtros({"source": " a.pdf ", "tipo": ["PDF"], "pagina_max": "4", "desde": "2024-05-01"}) == {
+        "source": ["a.pdf"], "tipo": ["pdf"], "pagina_max": 4, "desde": "2024-05-01"
+    }
+    with pytest.raises(ValueError):
+        normalizar_filtros({"tipo": "docx"})
+    with pytest.raises(ValueError):
+        normalizar_filtros({"desde": "01/05/2024"})
+    with pytest.raises(ValueError):
+        normalizar_filtros({"pagina_min": "três"})
+
+
+def test_filtro_chroma():
+    assert filtro_chroma({"source": ["a.pdf"]}, ["a.pdf"]) == {"source": {"$in": ["a.pdf"]}}
+    filtro = filtro_chroma({"pagina_min": 2, "ate": "2024-05-01"}, ["a.pdf", "b.pdf"])
+    assert filtro["$and"][:2] == [{"source": {"$in": ["a.pdf", "b.pdf"]}}, {"page": {"$gte": 2}}]
+    assert filtro["$and"][2]["indexado_em"]["$lt"] == int(datetime(2024, 5, 2).timestamp())
+
+
+def test_filtrar(indice):
+    def filtrar(**filtros):
+        return indice.filtrar(normalizar_filtros(filtros))
+
+    assert filtrar(source="rotina.PDF") == {"a_p0000_000", "a_p0003_000"}
+    assert filtrar(tipo=["csv", "txt"]) == {"b_0001", "c_0000"}
+    assert filtrar(tipo="pdf", pagina_min=1) == {"a_p0003_000"}
+    # Chunks sem data não atendem a filtros de data
+    assert filtrar(desde="2024-01-01") == {"a_p0000_000", "a_p0003_000", "b_0001"}
+    assert filtrar(desde="2024-06-01", ate="2024-06-30") == {"b_0001"}
+    assert filtrar(source="inexistente.pdf") == set()
+    assert indice.filtrar({}) == set(METADADOS)
+
+    assert indice.fontes({"a_p0000_000", "c_0000", "x"}) == ["Rotina.pdf", "notas.txt"]
+    assert indice.valores() == {
+        "source": ["Rotina.pdf", "base.csv", "notas.txt"],
+        "tipo": ["csv", "pdf", "txt"],
+        "pagina": [0, 3],
+        "dia": ["2024-05-01", "2024-06-10"],
+    }
+
+
+def test_regravacao_e_remocao(indice, tmp_path):
+    indice.add(["a_p0003_000"], [{**METADADOS["a_p0003_000"], "page": 7}])
+    indice.delete(["b_0001"])
+    assert indice.filtrar({"pagina_min": 5}) == {"a_p0003_000"}
+    assert indice.filtrar({"tipo": ["csv"]}) == set()
+    assert "csv" not in indice.valores()["tipo"]
+
+    reaberto = FacetIndex(str(tmp_path))
+    assert reaberto.stats() == indice.stats()
+    assert reaberto.filtrar({"pagina_min": 5}) == {"a_p0003_000"}
+
+
+def test_limpeza_vista_por_outra_instancia(indice, tmp_path):
+    leitor = FacetIndex(str(tmp_path))
+    assert not leitor.vazio()
+
+    indice.clear()
+    assert leitor.vazio()
+    indice.add(["novo"], [{"source": "novo.txt", "tipo": "txt"}])
+    assert leitor.filtrar({}) == {"novo"}
+
+
+def test_escritas_de_outro_processo(tmp_path):
+    leitor = FacetIndex(str(tmp_path))
+    assert leitor.vazio()
+
+    processo = multiprocessing.get_context("spawn").Process(target=_indexar, args=(str(tmp_path),))
+    processo.start()
+    processo.join(timeout=60)
+    assert processo.exitcode == 0
+
+    assert leitor.filtrar({"tipo": ["pdf"]}) == {"a_p0000_000", "a_p0003_000"}
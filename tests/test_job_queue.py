@@ -0,0 +1,123 @@
+"""
+tests/test_job_queue.py
+
+Testes da fila de trabalhos por chat do bot do Telegram (app_config/job_queue.py):
+- Ordem preservada dentro de cada chat e limite de trabalhos simultâneos
+- Recusa ao atingir o limite global de admissão
+- Estimativa da posição e indicador único por chat
+"""
+
+# ——————————————————————————————
+import asyncio
+
+from app_config.job_queue import ChatJobQueue
+
+
+# ——————————————————————————————
+def _trabalho(registro: list, rotulo, espera: float = 0.01, ativos: list | None = None):
+    """Trabalho que registra seu rótulo ao terminar (e, opcionalmente, a concorrência)."""
+    async def job() -> None:
+        if ativos is not None:
+            ativos[0] += 1
+            ativos[1] = max(ativos[1], ativos[0])
+        await asyncio.sleep(espera)
+        if ativos is not None:
+            ativos[0] -= 1
+        registro.append(rotulo)
+    return job
+
+
+async def _aguardar(fila: ChatJobQueue) -> None:
+    while fila.pending:
+        await asyncio.sleep(0.005)
+
+
+def test_ordem_por_chat_e_limite_de_workers():
+    async def cenario():
+        fila = ChatJobQueue(workers=2, max_pending=50)
+        registro, ativos = [], [0, 0]
+        for i in range(5):
+            for chat in (1, 2, 3):
+                fila.submit(chat, _trabalho(registro, (chat, i), ativos=ativos))
+        await _aguardar(fila)
+        return registro, ativos[1], fila
+
+    registro, maximo, fila = asyncio.run(cenario())
+    for chat in (1, 2, 3):
+        assert [i for c, i in registro if c == chat] == list(range(5))
+    assert maximo <= 2
+    assert fila.pending == 0 and not fila._filas and not fila._pendentes_chat
+
+
+def test_admissao_limitada():
+    async def cenario():
+        fila = ChatJobQueue(workers=1, max_pending=2)
+        registro = []
+        respostas = [fila.submit(chat, _trabalho(registro, chat)) for chat in (1, 2, 3)]
+        await _aguardar(fila)
+        # Após esvaziar, volta a admitir
+        respostas.append(fila.submit(4, _trabalho(registro, 4)))
+        await _aguardar(fila)
+        return respostas, registro
+
+    respostas, registro = asyncio.run(cenario())
+    assert respostas == [0, 1, None, 0]
+    assert registro == [1, 2, 4]
+
+
+def test_posicao_estimada_considera_fila_do_chat():
+    async def cenario():
+        fila = ChatJobQueue(workers=2, max_pending=50)
+        registro = []
+        # Dois pedidos do mesmo chat: o segundo espera o primeiro, mesmo com slot livre
+        posicoes = [fila.submit(1, _trabalho(registro, i)) for i in range(2)]
+        # Outro chat ainda encontra um slot livre
+        posicoes.append(fila.submit(2, _trabalho(registro, "b")))
+        # Terceiro chat: os dois slots estão ocupados por outros chats
+        posicoes.append(fila.submit(3, _trabalho(registro, "c")))
+        posicoes.append(fila.submit(4, _trabalho(registro, "d")))
+        await _aguardar(fila)
+        return posicoes
+
+    assert asyncio.run(cenario()) == [0, 1, 0, 1, 2]
+
+
+def test_indicador_unico_por_chat():
+    async def cenario():
+        fila = ChatJobQueue(workers=1, max_pending=50)
+        eventos = []
+
+        async def indicador() -> None:
+            eventos.append("inicio")
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                eventos.append("fim")
+                raise
+
+        registro = []
+        for i in range(3):
+            fila.submit(1, _trabalho(registro, i), indicador=indicador)
+        await _aguardar(fila)
+        await asyncio.sleep(0.01)
+        return eventos, registro
+
+    eventos, registro = asyncio.run(cenario())
+    assert eventos == ["inicio", "fim"]
+    assert registro == [0, 1, 2]
+
+
+def test_erro_em_um_trabalho_nao_interrompe_o_chat():
+    async def cenario():
+        fila = ChatJobQueue(workers=1, max_pending=50)
+        registro = []
+
+        async def falha() -> None:
+            raise RuntimeError("falha")
+
+        fila.submit(1, falha)
+        fila.submit(1, _trabalho(registro, "depois"))
+        await _aguardar(fila)
+        return registro, fila.pending
+
+    assert asyncio.run(cenario()) == (["depois"], 0)
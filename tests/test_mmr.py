@@ -0,0 +1,49 @@
+"""
+tests/test_mmr.py
+
+Testes da diversificação por Maximal Marginal Relevance (retriever/mmr.py):
+- Primeiro escolhido é o mais relevante; lambda 1.0 mantém a ordem por relevância
+- Quase duplicados são descartados e candidatos diversos são promovidos
+- Limite de resultados e entradas vazias
+"""
+
+# ——————————————————————————————
+import numpy as np
+
+from retriever.mmr import mmr
+
+
+# ——————————————————————————————
+CONSULTA = np.array([1.0, 0.0, 0.0])
+CANDIDATOS = np.array([
+    [0.9, 0.1, 0.0],    # 0: relevante
+    [0.9, 0.1, 0.001],  # 1: quase duplicado do 0
+    [0.7, 0.0, 0.7],    # 2: relevante e diverso
+    [0.8, 0.6, 0.0],    # 3: relevante, próximo do 0
+    [0.0, 1.0, 0.0],    # 4: irrelevante
+])
+
+
+def test_lambda_um_ordena_por_relevancia():
+    relevancia = CANDIDATOS @ CONSULTA / np.linalg.norm(CANDIDATOS, axis=1)
+    ordem = mmr(CONSULTA, CANDIDATOS, lambda_=1.0, limite_similaridade=1.01)
+    assert ordem == list(np.argsort(-relevancia, kind="stable"))
+
+
+def test_descarta_quase_duplicados_e_promove_diversidade():
+    ordem = mmr(CONSULTA, CANDIDATOS, lambda_=0.5, limite_similaridade=0.95)
+    assert ordem[0] == 0
+    assert 1 not in ordem
+    # O candidato diverso passa à frente do que só repete o primeiro
+    assert ordem.index(2) < ordem.index(3)
+
+
+def test_maximo_e_entradas_vazias():
+    assert len(mmr(CONSULTA, CANDIDATOS, maximo=2)) == 2
+    assert mmr(CONSULTA, np.empty((0, 3))) == []
+    assert mmr(CONSULTA, []) == []
+
+
+def test_vetores_nao_normalizados():
+    # A escala dos vetores não altera a escolha (similaridade cosseno)
+    assert mmr(CONSULTA * 5, CANDIDATOS * 3) == mmr(CONSULTA, CANDIDATOS)
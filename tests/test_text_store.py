@@ -0,0 +1,86 @@
+"""
+tests/test_text_store.py
+
+Testes do armazenamento de texto dos chunks (store/text_store.py):
+- Ida e volta com e sem compressão, regravações e remoções
+- Limpeza vista por outra instância (nova geração do índice)
+- Releitura de escritas feitas por outros processos, inclusive concorrentes
+"""
+
+# ——————————————————————————————
+import multiprocessing
+
+import pytest
+
+from store.text_store import TextStore, zstandard
+
+
+# ——————————————————————————————
+def _gravar(pasta: str, prefixo: str, quantidade: int) -> None:
+    """Grava textos em outro processo, em várias chamadas pequenas."""
+    store = TextStore(pasta, block_size=256)
+    for inicio in range(0, quantidade, 10):
+        store.put_many([(f"{prefixo}{i}", f"texto {prefixo}{i} " * 5) for i in range(inicio, inicio + 10)])
+
+
+def _em_processos(*args_por_processo) -> None:
+    contexto = multiprocessing.get_context("spawn")
+    processos = [contexto.Process(target=_gravar, args=args) for args in args_por_processo]
+    for p in processos:
+        p.start()
+    for p in processos:
+        p.join(timeout=60)
+        assert p.exitcode == 0
+
+
+COMPRESSOES = ["none", pytest.param("zstd", marks=pytest.mark.skipif(zstandard is None, reason="sem zstandard"))]
+
+
+@pytest.mark.parametrize("compressao", COMPRESSOES)
+def test_ida_e_volta(tmp_path, compressao):
+    store = TextStore(str(tmp_path), compressao=compressao, block_size=64)
+    itens = [(f"id{i}", f"trecho {i} com acentuação ✓ " * (i + 1)) for i in range(20)]
+    store.put_many(itens)
+
+    assert store.get_many([i for i, _ in itens]) == [t for _, t in itens]
+    assert store.get_many(["ausente", "id3"]) == [None, itens[3][1]]
+    assert store.stats()["textos"] == 20
+
+    # Regravação: a última entrada vence; remoção: o id deixa de existir
+    store.put_many([("id3", "novo")])
+    store.delete(["id4"])
+    assert store.get_many(["id3", "id4"]) == ["novo", None]
+
+    reaberto = TextStore(str(tmp_path), compressao=compressao)
+    assert reaberto.get_many(["id3", "id4", "id5"]) == ["novo", None, itens[5][1]]
+    assert sorted(reaberto.ids()) == sorted({i for i, _ in itens} - {"id4"})
+
+
+def test_limpeza_vista_por_outra_instancia(tmp_path):
+    escritor = TextStore(str(tmp_path))
+    leitor = TextStore(str(tmp_path))
+    escritor.put_many([("a", "antigo"), ("b", "outro")])
+    assert leitor.get_many(["a", "b"]) == ["antigo", "outro"]
+
+    # A limpeza recria os arquivos: o leitor descarta o índice e o mapeamento anteriores
+    escritor.clear()
+    escritor.put_many([("c", "antigo")])
+    assert leitor.get_many(["a", "b", "c"]) == [None, None, "antigo"]
+    assert leitor.ids() == ["c"]
+
+
+def test_releitura_de_escritas_de_outro_processo(tmp_path):
+    leitor = TextStore(str(tmp_path))
+    assert leitor.ids() == []
+
+    _em_processos((str(tmp_path), "p", 50))
+    assert len(leitor.ids()) == 50
+    assert leitor.get_many(["p0", "p49"]) == ["texto p0 " * 5, "texto p49 " * 5]
+
+
+def test_escritores_concorrentes(tmp_path):
+    _em_processos((str(tmp_path), "x", 200), (str(tmp_path), "y", 200))
+
+    store = TextStore(str(tmp_path))
+    ids = [f"{p}{i}" for p in "xy" for i in range(200)]
+    assert store.get_many(ids) == [f"texto {i} " * 5 for i in ids]
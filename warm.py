@@ -0,0 +1,181 @@
+"""
+warm.py
+
+Pré-computação offline das respostas de perguntas frequentes (aquecimento após deploy ou reinício):
+  1. Lê as perguntas de um arquivo (uma por linha) e/ou minera as mais frequentes do QUERY_LOG.
+  2. Ignora as que já têm resposta pré-computada válida (exceto com --force).
+  3. Para cada pergunta, em lote controlado (WARM_WORKERS threads), busca o contexto
+     e gera a resposta, pelo serviço de inferência (SERVICE_URL) ou no próprio processo.
+  4. Armazena a resposta com a impressão digital das fontes do contexto (llm/precomputed.py);
+     o pipeline invalida a resposta quando alguma dessas fontes é reindexada com alterações.
+
+Uso:
+    python warm.py --questions perguntas.txt --tenant rh
+    python warm.py --logs .cache/consultas.jsonl --top 300 --min-count 2
+"""
+
+# ——————————————————————————————
+# Bibliotecas
+import os
+import json
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from tqdm import tqdm
+from dotenv import load_dotenv
+
+# ——————————————————————————————
+# Carrega variáveis de ambiente do arquivo .env
+load_dotenv()
+WARM_WORKERS = int(os.getenv("WARM_WORKERS", 1))
+
+# ——————————————————————————————
+# Importação de módulos internos
+from service.client import get_context, obter_resposta_llama
+from llm.llm import DETERMINISTIC_OPTIONS
+from app_config.prompt_builder import build_prompt
+from llm.precomputed import precomputed_answers, normalizar_pergunta, QUERY_LOG, OLLAMA_MODEL
+from store.tenants import TENANTS, validar_tenant
+from metrics.instrumentation import registry, span, STAGE_METRIC
+
+
+# ——————————————————————————————
+def ler_perguntas(caminho: str) -> list[str]:
+    """Lê um arquivo com uma pergunta por linha (linhas vazias e iniciadas por '#' são ignoradas)."""
+    with open(caminho, encoding="utf-8") as f:
+        return [linha.strip() for linha in f if linha.strip() and not linha.lstrip().startswith("#")]
+
+
+def minerar_logs(caminho: str, top: int, min_count: int, tenant: str | None = None) -> list[tuple[str, str]]:
+    """
+    Seleciona as perguntas mais frequentes de um registro de consultas (QUERY_LOG).
+
+    Perguntas iguais após a normalização contam juntas; a forma mais recente é a usada.
+
+    Args:
+        caminho (str): Arquivo JSON por linha com 'tenant' e 'pergunta'.
+        top (int): Número máximo de perguntas por tenant.
+        min_count (int): Ocorrências mínimas para a pergunta ser considerada.
+        tenant (str | None): Considera apenas este tenant (None: todos).
+
+    Returns:
+        list[tuple[str, str]]: Pares (tenant, pergunta), dos mais para os menos frequentes.
+    """
+    contagem = Counter()
+    forma = {}
+    with open(caminho, encoding="utf-8") as f:
+        for linha in f:
+            try:
+                registro = json.loads(linha)
+            except json.JSONDecodeError:
+                # Linha truncada (ex.: processo encerrado durante a escrita)
+                continue
+            if tenant is not None and registro.get("tenant") != tenant:
+                continue
+            chave = (registro.get("tenant"), normalizar_pergunta(registro["pergunta"]))
+            contagem[chave] += 1
+            forma[chave] = registro["pergunta"]
+
+    selecionadas = []
+    por_tenant = Counter()
+    for chave, vezes in contagem.most_common():
+        if vezes < min_count:
+            break
+        if por_tenant[chave[0]] < top:
+            por_tenant[chave[0]] += 1
+            selecionadas.append((chave[0], forma[chave]))
+    return selecionadas
+
+
+# ——————————————————————————————
+def aquecer(tenant: str, pergunta: str, forcar: bool = False) -> str:
+    """
+    Pré-computa a resposta de uma pergunta.
+
+    Returns:
+        str: "valida" (já havia resposta válida), "gerada", "sem_contexto",
+             "sem_impressao" (fonte sem impressão digital: reexecute o pipeline) ou "erro".
+    """
+    if not forcar and precomputed_answers.get(tenant, pergunta, OLLAMA_MODEL) is not None:
+        return "valida"
+
+    # Impressões digitais lidas antes da busca: se uma fonte mudar durante a geração,
+    # a resposta já é gravada como inválida
+    fingerprints = precomputed_answers.fingerprints(tenant)
+    contexto, fontes, distancia_media = get_context(pergunta, tenant=tenant)
+    if not contexto.strip():
+        return "sem_contexto"
+
+    with span("prompt.build"):
+        prompt = build_prompt(pergunta, contexto)
+    # Opções determinísticas: regerar a mesma pergunta com o mesmo contexto reaproveita o cache
+    resposta = obter_resposta_llama(pergunta=prompt, contexto="", options=DETERMINISTIC_OPTIONS)
+    if resposta.startswith("Erro"):
+        return "erro"
+
+    gravada = precomputed_answers.put(
+        tenant, pergunta, OLLAMA_MODEL, resposta, contexto, fontes, distancia_media, fingerprints
+    )
+    return "gerada" if gravada else "sem_impressao"
+
+
+# ——————————————————————————————
+def main():
+    parser = argparse.ArgumentParser(description="Pré-computa respostas de perguntas frequentes")
+    parser.add_argument("--questions", help="Arquivo com uma pergunta por linha")
+    parser.add_argument("--logs", nargs="?", const=QUERY_LOG, help="Registro de consultas a minerar (padrão: QUERY_LOG)")
+    parser.add_argument("--top", type=int, default=300, help="Perguntas mais frequentes mineradas por tenant")
+    parser.add_argument("--min-count", type=int, default=2, help="Ocorrências mínimas de uma pergunta minerada")
+    parser.add_argument("--tenant", help="Tenant das perguntas do arquivo e filtro dos registros (padrão: TENANT_DEFAULT)")
+    parser.add_argument("--workers", type=int, default=WARM_WORKERS, help="Perguntas processadas em paralelo")
+    parser.add_argument("--force", action="store_true", help="Regera mesmo as respostas ainda válidas")
+    args = parser.parse_args()
+
+    if not args.questions and not args.logs:
+        parser.error("informe --questions e/ou --logs (ou defina QUERY_LOG)")
+
+    # Lista de (tenant, pergunta), sem repetições após a normalização
+    itens = []
+    if args.questions:
+        tenant = validar_tenant(args.tenant)
+        itens += [(tenant, pergunta) for pergunta in ler_perguntas(args.questions)]
+    if args.logs:
+        # Tenants removidos da configuração desde o registro são ignorados
+        itens += [
+            (validar_tenant(tenant), pergunta)
+            for tenant, pergunta in minerar_logs(args.logs, args.top, args.min_count, args.tenant)
+            if tenant is None or tenant in TENANTS
+        ]
+    itens = list({(tenant, normalizar_pergunta(pergunta)): (tenant, pergunta) for tenant, pergunta in itens}.values())
+    print(f"🔥 {len(itens)} pergunta(s) a aquecer com {args.workers} worker(s)")
+
+    # Lote controlado: no máximo 'workers' gerações simultâneas
+    resultados = Counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futuros = [executor.submit(aquecer, tenant, pergunta, args.force) for tenant, pergunta in itens]
+        for futuro, (tenant, pergunta) in tqdm(zip(futuros, itens), total=len(itens), desc="Aquecendo"):
+            try:
+                resultados[futuro.result()] += 1
+            except Exception as error:
+                print(f"❌  [{tenant}] '{pergunta}': {error}")
+                resultados["erro"] += 1
+
+    print(
+        f"\n✅  Aquecimento concluído: {resultados['gerada']} gerada(s), {resultados['valida']} já válida(s), "
+        f"{resultados['sem_contexto']} sem contexto, {resultados['erro']} erro(s)"
+    )
+    if resultados["sem_impressao"]:
+        print(
+            f"⚠️  {resultados['sem_impressao']} resposta(s) não gravada(s): fontes sem impressão digital. "
+            "Execute 'python pipeline.py --incremental' para registrá-las."
+        )
+
+    # Tempos por etapa (busca, geração) das perguntas processadas
+    for serie, snap in sorted(registry.snapshot()["histograms"].items()):
+        if serie.startswith(STAGE_METRIC):
+            print(f"   {serie[len(STAGE_METRIC):]:<40} {snap['sum']:8.2f}s | p95 {snap['p95'] * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()